@@ -1,7 +1,11 @@
+from multiprocessing import freeze_support
+
 from ksem_transformer.cli.core import cli
 
 
 def main():
+    # Needed for worker processes to start in the PyInstaller build
+    freeze_support()
     cli()
 
 
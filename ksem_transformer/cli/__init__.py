@@ -1,3 +1,8 @@
+from . import bench as bench
+from . import build as build
+from . import check as check
+from . import convert as convert
 from . import core as core
 from . import from_ksem as from_ksem
+from . import query as query
 from . import to_ksem as to_ksem
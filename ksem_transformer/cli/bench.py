@@ -0,0 +1,157 @@
+import json
+import sys
+from pathlib import Path
+
+import click
+
+from ksem_transformer.cli.core import cli
+from ksem_transformer.models.bench import (
+    BENCHMARKS,
+    DEFAULT_THRESHOLD,
+    compare_results,
+    measure_memory,
+    missing_from_baseline,
+    results_from_baseline,
+    results_to_baseline,
+    run_benchmarks,
+)
+from ksem_transformer.utils.files import atomic_write_text
+from ksem_transformer.utils.progress import format_size
+
+
+@cli.command()
+@click.option(
+    "--benchmark",
+    "-b",
+    "benchmarks",
+    multiple=True,
+    type=click.Choice(list(BENCHMARKS)),
+    help="Benchmark to run. Can be given multiple times. Defaults to all of them.",
+)
+@click.option(
+    "--instruments",
+    type=click.IntRange(min=1),
+    help=(
+        "Roughly how many instruments the generated library should have. Defaults "
+        "to the baseline's, or 400 (10,000 with --memory)."
+    ),
+)
+@click.option(
+    "--repeat",
+    "-r",
+    default=7,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="How many times to time each benchmark.",
+)
+@click.option(
+    "--baseline",
+    type=Path,
+    help="Baseline JSON (from --save-baseline) to compare the results with.",
+)
+@click.option(
+    "--save-baseline",
+    type=Path,
+    help="File to save the results to, as a baseline for later runs.",
+)
+@click.option(
+    "--threshold",
+    default=DEFAULT_THRESHOLD,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help=(
+        "How much slower than the baseline (as a fraction of it) a benchmark can get "
+        "before it fails. Slowdowns within the noise of the samples never fail."
+    ),
+)
+@click.option(
+    "--memory",
+    is_flag=True,
+    help=(
+        "Measure the peak memory of the benchmarks on the library instead of timing "
+        "them, failing any that go over their ceiling."
+    ),
+)
+def bench(
+    benchmarks: tuple[str, ...],
+    instruments: int | None,
+    repeat: int,
+    baseline: Path | None,
+    save_baseline: Path | None,
+    threshold: float,
+    memory: bool,
+):
+    # Time the core conversions on a generated library, failing if they've regressed
+    if memory:
+        if baseline is not None or save_baseline is not None:
+            raise click.UsageError("--memory can't be used with baselines")
+        memory_results = measure_memory(benchmarks or BENCHMARKS, instruments or 10_000)
+        for result in memory_results:
+            click.echo(
+                f"{result.name:<16} {format_size(result.peak):>10} "
+                f"(ceiling {format_size(result.ceiling)}) "
+                f"{'EXCEEDED' if result.exceeded else 'ok'}"
+            )
+        if exceeded := [r for r in memory_results if r.exceeded]:
+            click.echo(
+                f"{len(exceeded)} benchmark(s) went over their memory ceiling", err=True
+            )
+            sys.exit(1)
+        return
+
+    baseline_results = None
+    baseline_instruments = None
+    if baseline is not None:
+        try:
+            baseline_data = json.loads(baseline.read_text())
+            baseline_results = results_from_baseline(baseline_data)
+            baseline_instruments = int(baseline_data["instruments"])
+        except (OSError, ValueError, KeyError) as e:
+            raise click.BadParameter(
+                f"{baseline} isn't a usable baseline: {e}", param_hint="--baseline"
+            ) from e
+    if instruments is None:
+        instrument_count = baseline_instruments or 400
+    elif baseline_instruments is not None and baseline_instruments != instruments:
+        raise click.UsageError(
+            f"The baseline was recorded with --instruments {baseline_instruments}"
+        )
+    else:
+        instrument_count = instruments
+
+    results = run_benchmarks(benchmarks or BENCHMARKS, instrument_count, repeat)
+    if save_baseline is not None:
+        atomic_write_text(
+            save_baseline,
+            json.dumps(results_to_baseline(results, instrument_count), indent=2),
+        )
+
+    if baseline_results is None:
+        for result in results:
+            click.echo(
+                f"{result.name:<16} {result.median * 1000:9.2f} ms "
+                f"(± {result.spread * 1000:.2f} ms)"
+            )
+        return
+
+    comparisons = compare_results(baseline_results, results, threshold)
+    for comparison in comparisons:
+        click.echo(
+            f"{comparison.current.name:<16} "
+            f"{comparison.current.median * 1000:9.2f} ms "
+            f"(baseline {comparison.baseline.median * 1000:.2f} ms, "
+            f"{comparison.change:+.1%}) "
+            f"{'REGRESSED' if comparison.regressed else 'ok'}"
+        )
+    if missing := missing_from_baseline(baseline_results, results):
+        click.echo(
+            f"{len(missing)} benchmark(s) aren't in the baseline, so weren't "
+            f"compared: {', '.join(missing)}",
+            err=True,
+        )
+    if regressed := [c for c in comparisons if c.regressed]:
+        click.echo(
+            f"{len(regressed)} benchmark(s) regressed by more than {threshold:.0%}",
+            err=True,
+        )
+        sys.exit(1)
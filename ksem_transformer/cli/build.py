@@ -0,0 +1,64 @@
+import sys
+import time
+from pathlib import Path
+
+import click
+
+from ksem_transformer.cli.core import cache_options, cli, make_render_cache
+from ksem_transformer.models.build import BuildManifest, run_build
+
+
+@cli.command()
+@click.option(
+    "--manifest",
+    "-m",
+    help=(
+        "YAML file listing the libraries to build, as `targets` with an `input` "
+        "library, an `output` directory and optionally `only` patterns (as in "
+        "to-ksem). Relative paths are relative to the manifest."
+    ),
+    required=True,
+    type=Path,
+)
+@click.option(
+    "--jobs",
+    "-j",
+    help="Number of worker processes to build targets with. Defaults to the CPU count.",
+    type=click.IntRange(min=1),
+)
+@cache_options
+def build(
+    manifest: Path,
+    jobs: int | None,
+    cache_dir: Path | None,
+    cache_max_size: int | None,
+    cache_hard_links: bool,
+):
+    # Build every library in the manifest in one process (and one worker pool)
+    start = time.perf_counter()
+    targets = BuildManifest.from_file(manifest).targets
+    cache = make_render_cache(cache_dir, cache_max_size, cache_hard_links)
+    total_files = 0
+    failed = 0
+    for result in run_build(targets, jobs=jobs, cache=cache):
+        if cache is not None:
+            cache.stats += result.cache_stats
+        if result.error is not None:
+            failed += 1
+            click.echo(f"{result.target.input}: failed: {result.error}", err=True)
+            continue
+        total_files += result.files_written
+        click.echo(
+            f"{result.target.input} -> {result.target.output}: "
+            f"{result.files_written} file(s) in {result.seconds:.2f}s"
+        )
+
+    if cache is not None:
+        cache.evict()
+        click.echo(f"Render cache: {cache.stats}", err=True)
+    click.echo(
+        f"Built {len(targets) - failed} of {len(targets)} target(s) "
+        f"({total_files} file(s)) in {time.perf_counter() - start:.2f}s"
+    )
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+import click
+
+from ksem_transformer.cli.core import ShardParamType, cli
+from ksem_transformer.models.check import check_library
+from ksem_transformer.models.selection import Shard
+from ksem_transformer.storage.library_file import load_library_data
+
+
+@cli.command()
+@click.option(
+    "--input-file",
+    "-i",
+    help="Library file (YAML, JSON, JSON Lines or SQLite) to check",
+    required=True,
+    type=Path,
+)
+@click.option(
+    "--jobs",
+    "-j",
+    help="Number of worker processes to check instruments with. Defaults to the CPU count.",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--shard",
+    type=ShardParamType(),
+    help=(
+        "Only check one slice of the library's instruments, e.g. `2/4` for the "
+        "second of four. Uses the same slices as `to-ksem --shard`."
+    ),
+)
+def check(input_file: Path, jobs: int | None, shard: Shard | None):
+    # Report every problem in the library without writing anything
+    problems = check_library(load_library_data(input_file), jobs=jobs, shard=shard)
+    for problem in problems:
+        click.echo(str(problem), err=True)
+
+    if problems:
+        click.echo(f"Found {len(problems)} problem(s) in {input_file}", err=True)
+        sys.exit(1)
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import click
+
+from ksem_transformer.cli.core import cli
+from ksem_transformer.models.root import Root
+
+
+@cli.command()
+@click.option(
+    "--input-file",
+    "-i",
+    help="Library file (YAML, JSON, JSON Lines or SQLite) to read",
+    required=True,
+    type=Path,
+)
+@click.option(
+    "--output-file",
+    "-o",
+    help=(
+        "File to write the library to. Its format is picked from its extension: "
+        ".json for JSON, .jsonl for JSON Lines, .db, .sqlite and .sqlite3 for "
+        "SQLite, and anything else for YAML."
+    ),
+    required=True,
+    type=Path,
+)
+@click.option("--yes", help="Answer yes to any prompts", is_flag=True)
+def convert(input_file: Path, output_file: Path, yes: bool):
+    # Copy a library from one storage format to another
+    if output_file.exists() and not yes:
+        click.confirm(
+            f"{output_file} already exists. Do you want to overwrite it?", abort=True
+        )
+    Root.from_file(input_file).to_file(output_file)
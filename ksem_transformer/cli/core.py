@@ -1,6 +1,147 @@
+import json
+import sys
+from collections.abc import Callable, Generator
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Any
+
 import click
 
+from ksem_transformer.models.selection import Shard
+from ksem_transformer.storage.render_cache import (
+    CACHE_DIR_ENV_VAR,
+    CACHE_MAX_SIZE_ENV_VAR,
+    DEFAULT_MAX_SIZE,
+    RenderCache,
+)
+from ksem_transformer.utils import counters, instrumentation
+from ksem_transformer.utils.counters import OperationStats
+from ksem_transformer.utils.files import atomic_write_text
+from ksem_transformer.utils.instrumentation import Observer
+from ksem_transformer.utils.memory import MemoryProfile, tracing
+from ksem_transformer.utils.progress import BuildSummary, ProgressDisplay
+
 
 @click.group()
 def cli():
     pass
+
+
+class ShardParamType(click.ParamType):
+    """
+    A `--shard INDEX/COUNT` option.
+    """
+
+    name = "INDEX/COUNT"
+
+    def convert(
+        self, value: Any, param: click.Parameter | None, ctx: click.Context | None
+    ) -> Shard:
+        if isinstance(value, Shard):
+            return value
+        try:
+            return Shard.parse(value)
+        except ValueError as e:
+            self.fail(str(e), param, ctx)
+
+
+def cache_options[F: Callable[..., Any]](command: F) -> F:
+    """
+    Adds the `--cache-*` options of the render cache (see `make_render_cache`) to a
+    command.
+    """
+    command = click.option(
+        "--cache-hard-links",
+        is_flag=True,
+        help=(
+            "Hard link output files to the cache rather than copying them. Faster, "
+            "but editing an output file then edits the cached copy too."
+        ),
+    )(command)
+    command = click.option(
+        "--cache-max-size",
+        envvar=CACHE_MAX_SIZE_ENV_VAR,
+        type=click.IntRange(min=0),
+        help=(
+            "How big the cache (keys included) can get, in MiB, before the least "
+            "recently used configs are evicted. Defaults to "
+            f"${CACHE_MAX_SIZE_ENV_VAR}, or 1024."
+        ),
+    )(command)
+    return click.option(
+        "--cache-dir",
+        envvar=CACHE_DIR_ENV_VAR,
+        type=Path,
+        help=(
+            "Directory to cache rendered KSEM configs in, which can be shared "
+            "between runs, checkouts and branches. Defaults to "
+            f"${CACHE_DIR_ENV_VAR}, if set."
+        ),
+    )(command)
+
+
+def make_render_cache(
+    cache_dir: Path | None, cache_max_size: int | None, cache_hard_links: bool
+) -> RenderCache | None:
+    """
+    Creates the render cache asked for by the `--cache-*` options, if any.
+    """
+    if cache_dir is None:
+        return None
+    return RenderCache(
+        cache_dir,
+        max_size=(
+            cache_max_size * 1024 * 1024
+            if cache_max_size is not None
+            else DEFAULT_MAX_SIZE
+        ),
+        hard_link=cache_hard_links,
+    )
+
+
+@contextmanager
+def reporting(
+    progress: bool,
+    summary_file: Path | None,
+    stats: bool = False,
+    memory_profile: bool = False,
+) -> Generator[None, None, None]:
+    """
+    Shows the progress of the block if `progress` (and stderr is a terminal), and
+    writes a JSON summary of it to `summary_file` once it's done, if given. If
+    `stats`, the operations done in the block are counted, and if `memory_profile`,
+    the memory each stage takes is profiled. Either is printed to stderr (and added
+    to the summary).
+    """
+    summary = BuildSummary()
+    observers: list[Observer] = []
+    if progress:
+        observers.append(ProgressDisplay(sys.stderr))
+    if summary_file is not None:
+        observers.append(summary)
+
+    succeeded = False
+    with ExitStack() as stack:
+        operations = None
+        if stats:
+            operations = OperationStats(stack.enter_context(counters.counting()))
+            observers.append(operations)
+        memory = None
+        if memory_profile:
+            stack.enter_context(tracing())
+            memory = MemoryProfile()
+            observers.append(memory)
+        try:
+            with instrumentation.observe(*observers):
+                yield
+            succeeded = True
+        finally:
+            summary_json = {"succeeded": succeeded, **summary.to_json()}
+            if operations is not None:
+                click.echo(operations.format(), err=True)
+                summary_json["operations"] = operations.to_json()
+            if memory is not None:
+                click.echo(memory.format(), err=True)
+                summary_json["memory"] = memory.to_json()
+            if summary_file is not None:
+                atomic_write_text(summary_file, json.dumps(summary_json, indent=2))
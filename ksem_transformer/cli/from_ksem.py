@@ -2,21 +2,35 @@ from pathlib import Path
 from typing import get_args
 
 import click
+from click.core import ParameterSource
 
-from ksem_transformer.cli.core import cli
+from ksem_transformer.cli.core import cli, reporting
+from ksem_transformer.models import hoisting
 from ksem_transformer.models.root import Root, SettingsLocation
+from ksem_transformer.utils import instrumentation
 
 
 @cli.command()
+@click.option("--input-file", "-i", help="KSEM JSON file to read", type=Path)
 @click.option(
-    "--input-file", "-i", help="KSEM JSON file to read", required=True, type=Path
+    "--input-dir",
+    help=(
+        "Directory of KSEM JSON files to read instead of a single file, laid out as "
+        "`Product/Instrument group/Instrument.json` (the way to-ksem writes them). "
+        "The names of the products, groups and instruments are taken from the paths, "
+        "so --product, --group and --instrument can't be used with it."
+    ),
+    type=Path,
 )
 @click.option(
     "--output-file",
     "-o",
     help=(
-        "File to write new YAML config to. If the file already exists, we'll insert "
-        "the new data into it"
+        "File to write new YAML config to. Ending it in .json, .jsonl, .db, .sqlite "
+        "or .sqlite3 writes a JSON, JSON Lines or SQLite library instead. If the "
+        "file already exists, we'll insert the new data into it. Concurrent runs "
+        "writing to the same file take turns, using an empty `<file>.lock` file "
+        "that's left next to it and can be deleted when nothing is writing"
     ),
     required=True,
     type=Path,
@@ -50,44 +64,133 @@ from ksem_transformer.models.root import Root, SettingsLocation
     default="instrument",
     help=(
         "When generating the settings field, at what level do you want it stored? "
-        "`root` is the highest level, `instrument` is the lowest."
+        "`root` is the highest level, `instrument` is the lowest. Can't be used with "
+        "--hoist-settings."
+    ),
+)
+@click.option(
+    "--hoist-settings",
+    is_flag=True,
+    help=(
+        "Store all imported settings on the instruments, then move the ones that are "
+        "the same for every instrument in a group up to the group, and the ones that "
+        "are the same for every group in a product up to the product. Can't be used "
+        "with --store-settings-in or --store-pitch-range-setting-in, or to insert "
+        "into an existing output file."
     ),
 )
 @click.option("--yes", help="Answer yes to any prompts", is_flag=True)
+@click.option(
+    "--progress",
+    is_flag=True,
+    help=(
+        "Show the current stage, instruments per second, bytes read and an ETA "
+        "as it goes. Ignored if stderr isn't a terminal."
+    ),
+)
+@click.option(
+    "--summary-file",
+    type=Path,
+    help=(
+        "File to write a JSON summary of the run to once it's done: counts, stage "
+        "durations, and the slowest instruments."
+    ),
+)
+@click.option(
+    "--stats",
+    is_flag=True,
+    help=(
+        "Count hot-path operations (model validations, settings merges, notes "
+        "created, JSON bytes encoded, ...) and print them per run and per "
+        "instrument once it's done."
+    ),
+)
+@click.option(
+    "--memory-profile",
+    is_flag=True,
+    help=(
+        "Trace memory allocations, and print the peak and retained memory of each "
+        "stage, with the lines that allocated the most, once it's done. Slows the "
+        "run down a lot."
+    ),
+)
 def from_ksem(
     *,
-    input_file: Path,
+    input_file: Path | None,
+    input_dir: Path | None,
     output_file: Path,
     product_name: str | None,
     instrument_group_name: str | None,
     instrument_name: str | None,
     store_settings_in: SettingsLocation | None,
     store_pitch_range_setting_in: SettingsLocation,
+    hoist_settings: bool,
     yes: bool,
+    progress: bool,
+    summary_file: Path | None,
+    stats: bool,
+    memory_profile: bool,
 ):
-    # Load the root configuration from a YAML file and write KSEM config files
-    original_data = None
-    if output_file.exists():
-        if not yes:
-            click.confirm(
-                (
-                    f"{output_file} already exists. Do you want to insert this new "
-                    "data into it?"
-                ),
-                abort=True,
+    # Load the KSEM config file(s) and insert them into the YAML config
+    if (input_file is None) == (input_dir is None):
+        raise click.UsageError("Exactly one of --input-file and --input-dir is needed")
+    if input_dir is not None and (
+        product_name is not None
+        or instrument_group_name is not None
+        or instrument_name is not None
+    ):
+        raise click.UsageError(
+            "--input-dir takes the product, group and instrument names from the "
+            "paths, so it can't be used with --product, --group or --instrument"
+        )
+    if hoist_settings:
+        if output_file.exists():
+            # Hoisting only sees the imported instruments, so settings it moved up
+            # would change the instruments already in the library too
+            raise click.UsageError(
+                "--hoist-settings can't be used to insert into an existing library"
+            )
+        if store_settings_in is not None:
+            raise click.UsageError(
+                "--hoist-settings can't be used with --store-settings-in"
             )
-        original_data = Root.from_file(output_file)
+        source = click.get_current_context().get_parameter_source(
+            "store_pitch_range_setting_in"
+        )
+        if source is not ParameterSource.DEFAULT:
+            raise click.UsageError(
+                "--hoist-settings can't be used with --store-pitch-range-setting-in"
+            )
+        store_settings_in = store_pitch_range_setting_in = "instrument"
 
-    data = Root.from_ksem_config(
-        input_file,
-        product_name=product_name or "Unknown product",
-        instrument_group_name=instrument_group_name or "Unknown instrument group",
-        instrument_name=instrument_name or "Unknown instrument",
-        store_settings_in=store_settings_in,
-        store_pitch_range_setting_in=store_pitch_range_setting_in,
-    )
-    if original_data:
-        # Merge new data into the previous data
-        data = Root.combine(original_data, data)
+    if output_file.exists() and not yes:
+        click.confirm(
+            (
+                f"{output_file} already exists. Do you want to insert this new "
+                "data into it?"
+            ),
+            abort=True,
+        )
 
-    output_file.write_text(data.to_yaml())
+    with reporting(progress, summary_file, stats, memory_profile):
+        if input_dir is not None:
+            data = Root.from_ksem_config_dir(
+                input_dir,
+                store_settings_in=store_settings_in,
+                store_pitch_range_setting_in=store_pitch_range_setting_in,
+            )
+        else:
+            assert input_file is not None
+            data = Root.from_ksem_config(
+                input_file,
+                product_name=product_name or "Unknown product",
+                instrument_group_name=instrument_group_name
+                or "Unknown instrument group",
+                instrument_name=instrument_name or "Unknown instrument",
+                store_settings_in=store_settings_in,
+                store_pitch_range_setting_in=store_pitch_range_setting_in,
+            )
+        if hoist_settings:
+            with instrumentation.stage("hoist"):
+                hoisting.hoist_settings(data)
+        data.insert_into_file(output_file)
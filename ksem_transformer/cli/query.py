@@ -0,0 +1,81 @@
+import json
+from pathlib import Path
+
+import click
+
+from ksem_transformer.cli.core import cli
+from ksem_transformer.models.query import LibraryIndex
+
+
+def _parse_filter(
+    ctx: click.Context, param: click.Parameter, value: tuple[str, ...]
+) -> dict[str, str]:
+    filters: dict[str, str] = {}
+    for item in value:
+        field, sep, field_value = item.partition("=")
+        if not sep:
+            raise click.BadParameter(f"expected FIELD=VALUE, got {item!r}")
+        filters[field] = field_value
+    return filters
+
+
+@cli.command()
+@click.option(
+    "--input-file",
+    "-i",
+    help="Library file (YAML, JSON, JSON Lines or SQLite) to query",
+    required=True,
+    type=Path,
+)
+@click.option(
+    "--where",
+    "-w",
+    "filters",
+    multiple=True,
+    callback=_parse_filter,
+    help=(
+        "Only match instruments where FIELD=VALUE. FIELD is `product`, `group`, "
+        "`instrument`, a keyswitch field (`name`, `key`, `second_key`, `cc_n`, "
+        "`cc_v`, `program`, `color`, ...) or a settings path like "
+        "`settings.middle_c`. VALUE may contain glob wildcards. Can be given "
+        "multiple times."
+    ),
+)
+@click.option(
+    "--count-by",
+    help="Instead of listing instruments, count them by the values of this field",
+)
+@click.option(
+    "--index-cache",
+    type=Path,
+    help=(
+        "File to cache the built index in. It's reused for as long as the input "
+        "file doesn't change."
+    ),
+)
+@click.option("--json", "as_json", is_flag=True, help="Print results as JSON")
+def query(
+    input_file: Path,
+    filters: dict[str, str],
+    count_by: str | None,
+    index_cache: Path | None,
+    as_json: bool,
+):
+    # Answer questions about a library from its indexes
+    index = LibraryIndex.from_file(input_file, cache_file=index_cache)
+
+    if count_by is not None:
+        counts = dict(index.count_by(count_by, filters).most_common())
+        if as_json:
+            click.echo(json.dumps(counts, indent=2))
+        else:
+            for value, count in counts.items():
+                click.echo(f"{count}\t{value}")
+        return
+
+    paths = index.find(filters)
+    if as_json:
+        click.echo(json.dumps(["/".join(path) for path in paths], indent=2))
+    else:
+        for path in paths:
+            click.echo("/".join(path))
@@ -2,13 +2,24 @@ from pathlib import Path
 
 import click
 
-from ksem_transformer.cli.core import cli
+from ksem_transformer.cli.core import (
+    ShardParamType,
+    cache_options,
+    cli,
+    make_render_cache,
+    reporting,
+)
 from ksem_transformer.models.root import Root
+from ksem_transformer.models.selection import InstrumentFilter, Shard
 
 
 @cli.command()
 @click.option(
-    "--input-file", "-i", help="YAML config file to read", required=True, type=Path
+    "--input-file",
+    "-i",
+    help="Library file (YAML, JSON, JSON Lines or SQLite) to read",
+    required=True,
+    type=Path,
 )
 @click.option(
     "--output-dir",
@@ -17,7 +28,81 @@ from ksem_transformer.models.root import Root
     required=True,
     type=Path,
 )
-def to_ksem(input_file: Path, output_dir: Path):
+@click.option(
+    "--only",
+    multiple=True,
+    help=(
+        "Only build instruments matching this `Product/Group/Instrument` glob "
+        "pattern (e.g. 'VSL*/Solo Strings/*'). Shorter patterns like `Product` "
+        "select everything below them. Can be given multiple times."
+    ),
+)
+@click.option(
+    "--shard",
+    type=ShardParamType(),
+    help=(
+        "Only build one slice of the library's instruments, e.g. `2/4` for the "
+        "second of four, to split a build across machines. The slices are balanced "
+        "by keyswitch count and together build exactly what a single run would."
+    ),
+)
+@cache_options
+@click.option(
+    "--progress",
+    is_flag=True,
+    help=(
+        "Show the current stage, instruments per second, bytes written and an ETA "
+        "as it goes. Ignored if stderr isn't a terminal."
+    ),
+)
+@click.option(
+    "--summary-file",
+    type=Path,
+    help=(
+        "File to write a JSON summary of the run to once it's done: counts, stage "
+        "durations, cache hits and the slowest instruments."
+    ),
+)
+@click.option(
+    "--stats",
+    is_flag=True,
+    help=(
+        "Count hot-path operations (model validations, settings merges, notes "
+        "created, JSON bytes encoded, ...) and print them per run and per "
+        "instrument once it's done."
+    ),
+)
+@click.option(
+    "--memory-profile",
+    is_flag=True,
+    help=(
+        "Trace memory allocations, and print the peak and retained memory of each "
+        "stage, with the lines that allocated the most, once it's done. Slows the "
+        "run down a lot."
+    ),
+)
+def to_ksem(
+    input_file: Path,
+    output_dir: Path,
+    only: tuple[str, ...],
+    shard: Shard | None,
+    cache_dir: Path | None,
+    cache_max_size: int | None,
+    cache_hard_links: bool,
+    progress: bool,
+    summary_file: Path | None,
+    stats: bool,
+    memory_profile: bool,
+):
     # Load the root configuration from a YAML file and write KSEM config files
-    loaded = Root.from_file(input_file)
-    loaded.write_ksem_config_files(output_dir)
+    cache = make_render_cache(cache_dir, cache_max_size, cache_hard_links)
+    with reporting(progress, summary_file, stats, memory_profile):
+        loaded = Root.from_file(
+            input_file,
+            only=InstrumentFilter.from_patterns(only) if only else None,
+            shard=shard,
+        )
+        loaded.write_ksem_config_files(output_dir, cache)
+    if cache is not None:
+        cache.evict()
+        click.echo(f"Render cache: {cache.stats}", err=True)
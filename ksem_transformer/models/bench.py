@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import gc
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Iterable, Mapping
+from pathlib import Path
+from typing import Any
+
+import attrs
+
+from ksem_transformer.models.root import Root
+from ksem_transformer.note import Note, key_to_offset
+from ksem_transformer.utils.generate import generate_library
+from ksem_transformer.utils.memory import tracing
+
+BASELINE_FORMAT_VERSION = 1
+DEFAULT_THRESHOLD = 0.1
+# A slowdown also has to be bigger than this many standard deviations (estimated
+# from the median absolute deviation of the samples) not to be put down to noise
+NOISE_FACTOR = 3.0
+# Generated libraries have this many products and groups per product
+_PRODUCTS = 4
+_GROUPS_PER_PRODUCT = 5
+_NOTE_COUNT = 10_000
+# The most memory (in bytes per instrument of the generated library) each benchmark
+# on the library may allocate at once. About 25% over what they took on a 10,000
+# instrument library
+MEMORY_CEILINGS: dict[str, int] = {
+    "from_file": 52_000,
+    "combine": 14_000,
+    "to_ksem_configs": 15_000,
+    "to_yaml": 22_000,
+}
+# Allowed on top of the ceilings, for what doesn't grow with the library (caches
+# filled on first use, interned strings, ...), which would otherwise decide whether
+# a small library goes over
+MEMORY_BASE_ALLOWANCE = 2 * 1024 * 1024
+
+
+@attrs.define()
+class Fixture:
+    """
+    The generated library (and other inputs) the benchmarks run on.
+    """
+
+    file: Path
+    root: Root
+    product_roots: list[Root]
+    note_strings: list[str]
+    midi_values: list[int]
+
+    @classmethod
+    def create(cls, directory: Path, instruments: int) -> Fixture:
+        data = generate_library(
+            _PRODUCTS,
+            _GROUPS_PER_PRODUCT,
+            max(1, instruments // (_PRODUCTS * _GROUPS_PER_PRODUCT)),
+        )
+        root = Root.model_validate(data)
+        file = directory / "library.yaml"
+        root.to_file(file)
+        return Fixture(
+            file=file,
+            root=root,
+            product_roots=[
+                Root.model_validate({**data, "products": {name: product}})
+                for name, product in data["products"].items()
+            ],
+            note_strings=[
+                f"{note}{octave}"
+                for octave in range(-1, 9)
+                for note in key_to_offset
+                for _ in range(_NOTE_COUNT // (10 * len(key_to_offset)))
+            ],
+            midi_values=[i % 128 for i in range(_NOTE_COUNT)],
+        )
+
+
+# Each benchmark is set up with the fixture, and returns what's timed
+BENCHMARKS: dict[str, Callable[[Fixture], Callable[[], object]]] = {
+    "from_file": lambda f: lambda: Root.from_file(f.file),
+    "combine": lambda f: lambda: Root.combine(*f.product_roots),
+    "to_ksem_configs": lambda f: f.root.to_ksem_configs,
+    "to_yaml": lambda f: f.root.to_yaml,
+    "note_from_str": lambda f: lambda: [Note.from_str(s) for s in f.note_strings],
+    "note_from_midi": lambda f: lambda: [
+        Note.from_midi(midi, "C3") for midi in f.midi_values
+    ],
+}
+
+
+@attrs.define(frozen=True)
+class BenchmarkResult:
+    name: str
+    # Seconds each run took
+    samples: tuple[float, ...]
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples)
+
+    @property
+    def spread(self) -> float:
+        """
+        An estimate of the samples' standard deviation that outliers barely affect.
+        """
+        median = self.median
+        return 1.4826 * statistics.median(abs(s - median) for s in self.samples)
+
+
+@attrs.define(frozen=True)
+class Comparison:
+    baseline: BenchmarkResult
+    current: BenchmarkResult
+    threshold: float
+
+    @property
+    def change(self) -> float:
+        """
+        How much slower the current run is than the baseline, as a fraction of it.
+        """
+        return self.current.median / self.baseline.median - 1
+
+    @property
+    def regressed(self) -> bool:
+        slowdown = self.current.median - self.baseline.median
+        noise = NOISE_FACTOR * max(self.baseline.spread, self.current.spread)
+        return self.change > self.threshold and slowdown > noise
+
+
+def run_benchmarks(
+    names: Iterable[str], instruments: int, repeat: int
+) -> list[BenchmarkResult]:
+    """
+    Runs each benchmark `repeat` times (after a warm-up run) on a generated library
+    of about `instruments` instruments. The garbage collector is paused while each
+    run is timed, so collections it triggers don't add noise.
+    """
+    results: list[BenchmarkResult] = []
+    with tempfile.TemporaryDirectory() as directory:
+        fixture = Fixture.create(Path(directory), instruments)
+        for name in names:
+            benchmark = BENCHMARKS[name](fixture)
+            benchmark()
+            samples: list[float] = []
+            for _ in range(repeat):
+                gc.collect()
+                gc.disable()
+                try:
+                    start = time.perf_counter()
+                    benchmark()
+                    samples.append(time.perf_counter() - start)
+                finally:
+                    gc.enable()
+            results.append(BenchmarkResult(name, tuple(samples)))
+    return results
+
+
+@attrs.define(frozen=True)
+class MemoryResult:
+    name: str
+    instruments: int
+    # Most bytes allocated at once while the benchmark ran
+    peak: int
+
+    @property
+    def ceiling(self) -> int:
+        return MEMORY_CEILINGS[self.name] * self.instruments + MEMORY_BASE_ALLOWANCE
+
+    @property
+    def exceeded(self) -> bool:
+        return self.peak > self.ceiling
+
+
+def measure_memory(names: Iterable[str], instruments: int) -> list[MemoryResult]:
+    """
+    Measures the peak memory of each benchmark with a memory ceiling, on a generated
+    library of about `instruments` instruments.
+    """
+    results: list[MemoryResult] = []
+    with tempfile.TemporaryDirectory() as directory:
+        fixture = Fixture.create(Path(directory), instruments)
+        # Counted the way the ceilings are, rather than by what was asked for
+        instruments = sum(1 for _ in fixture.root.iter_instruments())
+        for name in names:
+            if name not in MEMORY_CEILINGS:
+                continue
+            benchmark = BENCHMARKS[name](fixture)
+            # Anything cached on the first run isn't counted
+            benchmark()
+            gc.collect()
+            with tracing():
+                tracemalloc.reset_peak()
+                start = tracemalloc.get_traced_memory()[0]
+                benchmark()
+                peak = tracemalloc.get_traced_memory()[1] - start
+            results.append(MemoryResult(name, instruments, peak))
+    return results
+
+
+def results_to_baseline(
+    results: Iterable[BenchmarkResult], instruments: int
+) -> dict[str, Any]:
+    return {
+        "version": BASELINE_FORMAT_VERSION,
+        "python": platform.python_version(),
+        "instruments": instruments,
+        "results": {
+            result.name: {"median": result.median, "samples": list(result.samples)}
+            for result in results
+        },
+    }
+
+
+def results_from_baseline(baseline: Mapping[str, Any]) -> dict[str, BenchmarkResult]:
+    if baseline.get("version") != BASELINE_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported baseline version {baseline.get('version')!r}, expected "
+            f"{BASELINE_FORMAT_VERSION}"
+        )
+    try:
+        return {
+            name: BenchmarkResult(name, tuple(result["samples"]))
+            for name, result in baseline["results"].items()
+        }
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Malformed baseline: {e!r}") from e
+
+
+def compare_results(
+    baseline: Mapping[str, BenchmarkResult],
+    current: Iterable[BenchmarkResult],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> list[Comparison]:
+    """
+    Compares each current result with the baseline's result for the same benchmark.
+    Benchmarks missing from the baseline are left out (see `missing_from_baseline`).
+    """
+    return [
+        Comparison(baseline[result.name], result, threshold)
+        for result in current
+        if result.name in baseline
+    ]
+
+
+def missing_from_baseline(
+    baseline: Mapping[str, BenchmarkResult], current: Iterable[BenchmarkResult]
+) -> list[str]:
+    """
+    The names of the current results the baseline has nothing to compare with.
+    """
+    return [result.name for result in current if result.name not in baseline]
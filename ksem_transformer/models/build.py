@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+import attrs
+from pydantic import BaseModel, Field
+
+from ksem_transformer.models.root import Root
+from ksem_transformer.models.selection import InstrumentFilter
+from ksem_transformer.storage.render_cache import RenderCache, RenderCacheStats
+from ksem_transformer.utils.yaml_utils import yaml_load_file
+
+
+class BuildTarget(BaseModel):
+    """
+    A library to build into a directory of KSEM configs, like a single `to-ksem` run.
+    """
+
+    input: Path
+    output: Path
+    only: list[str] = Field(default_factory=list)
+
+
+class BuildManifest(BaseModel):
+    """
+    A list of libraries to build in one go.
+    """
+
+    targets: list[BuildTarget]
+
+    @classmethod
+    def from_file(cls, file: Path) -> BuildManifest:
+        """
+        Loads a manifest from a YAML (or JSON) file. Relative paths in it are taken as
+        relative to the manifest's directory.
+        """
+        manifest = BuildManifest.model_validate(yaml_load_file(file))
+        for target in manifest.targets:
+            target.input = file.parent / target.input
+            target.output = file.parent / target.output
+        return manifest
+
+
+@attrs.define(frozen=True)
+class BuildResult:
+    """
+    The outcome of building a single target.
+    """
+
+    target: BuildTarget
+    files_written: int
+    seconds: float
+    error: str | None = None
+    # How the target used the render cache, if there was one
+    cache_stats: RenderCacheStats = attrs.field(factory=RenderCacheStats)
+
+
+def build_target(target: BuildTarget, cache: RenderCache | None = None) -> BuildResult:
+    """
+    Builds a single target. Errors are returned in the result rather than raised, so
+    one broken library doesn't stop the rest of a build.
+    """
+    start = time.perf_counter()
+    if cache is not None:
+        # Only count this target's use of the cache
+        cache = attrs.evolve(cache, stats=RenderCacheStats())
+    try:
+        root = Root.from_file(
+            target.input,
+            only=InstrumentFilter.from_patterns(target.only) if target.only else None,
+        )
+        files_written = root.write_ksem_config_files(target.output, cache)
+    except Exception as e:
+        return BuildResult(
+            target, 0, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+        )
+    return BuildResult(
+        target,
+        files_written,
+        time.perf_counter() - start,
+        cache_stats=cache.stats if cache is not None else RenderCacheStats(),
+    )
+
+
+def run_build(
+    targets: Sequence[BuildTarget],
+    jobs: int | None = None,
+    cache: RenderCache | None = None,
+) -> Iterator[BuildResult]:
+    """
+    Builds every target, yielding their results in the order the targets were given.
+
+    Targets are spread over a single pool of `jobs` worker processes (defaulting to the
+    number of CPUs), so each worker only pays for its imports and model schemas once
+    however many targets it builds. If `cache` is given, every target is built
+    through it, and each result says how it used it.
+    """
+    jobs = min(jobs or os.cpu_count() or 1, len(targets))
+    if jobs <= 1:
+        for target in targets:
+            yield build_target(target, cache)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(build_target, targets, repeat(cache))
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, cast
+
+import attrs
+from pydantic import ValidationError
+
+from ksem_transformer.models.root import Instrument, Root
+from ksem_transformer.models.selection import Shard, instrument_cost
+from ksem_transformer.models.settings.settings import Settings
+from ksem_transformer.utils.parallel import get_worker_count
+
+
+@attrs.define(frozen=True)
+class Problem:
+    """
+    A single problem found in a library, along with where it was found.
+    """
+
+    path: tuple[str, ...]
+    message: str
+
+    def __str__(self) -> str:
+        return f"{'/'.join(self.path) or '<root>'}: {self.message}"
+
+
+@attrs.define()
+class _InstrumentCheck:
+    path: tuple[str, str, str]
+    data: object
+    # `None` if the settings of one of the instrument's ancestors are invalid. Those
+    # problems are reported on the ancestor.
+    parent_settings: Settings | None
+
+
+def _validation_problems(
+    path: tuple[str, ...], error: ValidationError, loc_prefix: tuple[str, ...] = ()
+) -> list[Problem]:
+    problems: list[Problem] = []
+    for err in error.errors():
+        loc = (*loc_prefix, *(str(i) for i in err["loc"]))
+        problems.append(
+            Problem(path, f"{'.'.join(loc)}: {err['msg']}" if loc else err["msg"])
+        )
+    return problems
+
+
+def _get_children(
+    data: object, key: str, path: tuple[str, ...], problems: list[Problem]
+) -> Mapping[str, object]:
+    if not isinstance(data, Mapping):
+        problems.append(Problem(path, "must be a mapping"))
+        return {}
+    children = cast(Mapping[str, Any], data).get(key)
+    if not isinstance(children, Mapping):
+        problems.append(Problem(path, f"`{key}` must be a mapping"))
+        return {}
+    return cast(Mapping[str, object], children)
+
+
+def _get_settings(
+    data: object, path: tuple[str, ...], problems: list[Problem]
+) -> Settings | None:
+    if not isinstance(data, Mapping):
+        return None
+    try:
+        return Settings.model_validate(
+            cast(Mapping[str, Any], data).get("settings", {})
+        )
+    except ValidationError as e:
+        problems.extend(_validation_problems(path, e, ("settings",)))
+        return None
+
+
+def _merge_settings(parent: Settings | None, child: Settings | None) -> Settings | None:
+    if parent is None or child is None:
+        return None
+    return Settings.combine(parent, child)
+
+
+def _iter_instrument_checks(
+    data: object, problems: list[Problem]
+) -> Iterable[_InstrumentCheck]:
+    root_settings = _get_settings(data, (), problems)
+    for product_name, product in _get_children(data, "products", (), problems).items():
+        product_path = (product_name,)
+        product_settings = _merge_settings(
+            root_settings, _get_settings(product, product_path, problems)
+        )
+        for group_name, group in _get_children(
+            product, "instrument_groups", product_path, problems
+        ).items():
+            group_path = (*product_path, group_name)
+            group_settings = _merge_settings(
+                product_settings, _get_settings(group, group_path, problems)
+            )
+            for instrument_name, instrument in _get_children(
+                group, "instruments", group_path, problems
+            ).items():
+                yield _InstrumentCheck(
+                    (*group_path, instrument_name), instrument, group_settings
+                )
+
+
+def _check_instrument(check: _InstrumentCheck) -> list[Problem]:
+    try:
+        instrument = Instrument.model_validate(check.data)
+    except ValidationError as e:
+        return _validation_problems(check.path, e)
+    if check.parent_settings is None:
+        return []
+
+    problems: list[Problem] = []
+    settings = (
+        check.parent_settings
+        if instrument.settings.is_default()
+        else Settings.combine(check.parent_settings, instrument.settings)
+    )
+    try:
+        Root.get_keyswitch_amount_option(instrument, check.path[-1])
+    except ValueError as e:
+        problems.append(Problem(check.path, str(e)))
+    problems.extend(
+        Problem(check.path, message)
+        for message in instrument.keyswitches.check(settings)
+    )
+    return problems
+
+
+def check_library(
+    data: object, jobs: int | None = None, shard: Shard | None = None
+) -> list[Problem]:
+    """
+    Checks a library (as loaded from its file, before validation) for every problem
+    that would stop it from being converted to KSEM. Nothing is rendered or written.
+
+    Instruments are checked in `jobs` worker processes (defaulting to the number of
+    CPUs), unless the library is too small for that to pay off. If `shard` is given,
+    only the instruments in it are checked, though the settings of every product and
+    group still are.
+    """
+    problems: list[Problem] = []
+    checks = list(_iter_instrument_checks(data, problems))
+    if shard is not None:
+        selected = shard.select(
+            {check.path: instrument_cost(check.data) for check in checks}
+        )
+        checks = [check for check in checks if check.path in selected]
+
+    jobs = get_worker_count(len(checks), jobs)
+    if jobs <= 1:
+        for check in checks:
+            problems.extend(_check_instrument(check))
+        return problems
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for result in executor.map(
+            _check_instrument, checks, chunksize=max(1, len(checks) // (jobs * 4))
+        ):
+            problems.extend(result)
+    return problems
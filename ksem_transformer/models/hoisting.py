@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+from ksem_transformer.models.root import Container, Root
+from ksem_transformer.models.settings.settings import Settings
+
+
+def hoist_settings(root: Root) -> None:
+    """
+    Moves settings shared by every instrument in a group up to the group, then
+    settings shared by every group in a product up to the product. Only what differs
+    between siblings is left on them, and every instrument's merged settings stay the
+    same.
+
+    Settings are hoisted one top-level field at a time, since that's how
+    `Settings.combine` merges them. That includes `colors`, which is only hoisted when
+    every sibling has the same palette.
+    """
+    for product in root.products.values():
+        for group in product.instrument_groups.values():
+            _hoist(group, list(group.instruments.values()))
+        _hoist(product, list(product.instrument_groups.values()))
+
+
+def _hoist(parent: Container[Any], children: Sequence[Container[Any]]) -> None:
+    if not children:
+        return
+
+    default = Settings().model_dump()
+    dumped = [child.settings.model_dump() for child in children]
+    parent_update: dict[str, Any] = {}
+
+    for field in Settings.model_fields:
+        # A child left at the default inherits the parent's value instead, so every
+        # child has to set the same non-default value for it to be hoisted
+        if dumped[0][field] != default[field] and all(
+            d[field] == dumped[0][field] for d in dumped[1:]
+        ):
+            parent_update[field] = getattr(children[0].settings, field)
+
+    if not parent_update:
+        return
+    parent.settings = parent.settings.model_copy(update=parent_update)
+    for child in children:
+        child.settings = child.settings.model_copy(
+            update={
+                field: Settings.model_fields[field].get_default(
+                    call_default_factory=True
+                )
+                for field in parent_update
+            }
+        )
@@ -1,13 +1,20 @@
 # Mapping of keyswitch fields to KSEM keys
-from typing import Literal, cast
+from collections.abc import Callable, Sequence
+from typing import Any, Literal, cast
 
 from bidict import bidict
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import (
+    ConfigDict,
+    Field,
+    ValidationInfo,
+    field_serializer,
+    field_validator,
+)
 
 from ksem_transformer.models.ksem_json_types import EMPTY_VALUE, KsemKeyswitchesEntry
-from ksem_transformer.models.note_field import NoteField
 from ksem_transformer.models.settings.settings import Settings
-from ksem_transformer.note import Note, NoteLiteral
+from ksem_transformer.note import Note, NoteLiteral, key_to_offset
+from ksem_transformer.utils import counters, interning
 from ksem_transformer.utils.color import hex_color_to_tuple
 
 type KeyswitchField = Literal[
@@ -40,7 +47,42 @@ keyswitch_field_to_ksem_key = bidict(
 )
 
 
-class KeyswitchesRootOctaves(BaseModel):
+def _validate_str(value: object) -> None:
+    if not isinstance(value, str):
+        raise ValueError(f"expected text, got {value!r}")
+
+
+def _validate_note_name(value: object) -> None:
+    if not isinstance(value, str) or value not in key_to_offset:
+        raise ValueError(
+            f"`{value}` isn't a note name. Use just the note (e.g. C or F#), the "
+            "octave goes in `root_octaves`."
+        )
+
+
+def _validate_int(value: object) -> None:
+    # bools are ints too, but never what's meant here
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError(f"expected a whole number, got {value!r}")
+
+
+# How the cells of each column are validated. Cells can also be `-` (`EMPTY_VALUE`)
+# in any column, to leave that field out of a keyswitch.
+keyswitch_field_validators: dict[KeyswitchField, Callable[[object], None]] = {
+    "name": _validate_str,
+    "key": _validate_note_name,
+    "second_key": _validate_note_name,
+    "bank": _validate_int,
+    "sub": _validate_int,
+    "program": _validate_int,
+    "cc_n": _validate_int,
+    "cc_v": _validate_int,
+    "chain": _validate_int,
+    "color": _validate_str,
+}
+
+
+class KeyswitchesRootOctaves(counters.CountedModel):
     """
     Represents the root octaves for keyswitches.
     """
@@ -49,7 +91,7 @@ class KeyswitchesRootOctaves(BaseModel):
     second_key: int | None = None
 
 
-class Keyswitches(BaseModel):
+class Keyswitches(counters.CountedModel):
     """
     Represents the keyswitches configuration with root octaves, mapping, and values.
     """
@@ -57,8 +99,98 @@ class Keyswitches(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     root_octaves: KeyswitchesRootOctaves = Field(default_factory=KeyswitchesRootOctaves)
-    mapping: list[KeyswitchField]
-    values: list[list[NoteField | str | int]]
+    # Tuples, so they can be shared between instruments (see `interning`)
+    mapping: tuple[KeyswitchField, ...]
+    values: tuple[tuple[str | int, ...], ...]
+
+    @field_validator("mapping", mode="after")
+    @classmethod
+    def _share_mapping(
+        cls, mapping: tuple[KeyswitchField, ...]
+    ) -> tuple[KeyswitchField, ...]:
+        return interning.intern_row(mapping)
+
+    @field_validator("values", mode="plain")
+    @classmethod
+    def _validate_values(
+        cls, values: Any, info: ValidationInfo
+    ) -> tuple[tuple[str | int, ...], ...]:
+        # Each column is checked by the validator for the field it's mapped to, rather
+        # than trying every type on every cell
+        if "mapping" not in info.data:
+            # The mapping is invalid, which is reported on its own
+            return values
+        mapping: tuple[KeyswitchField, ...] = info.data["mapping"]
+        validators = [keyswitch_field_validators[field] for field in mapping]
+
+        if not isinstance(values, (list, tuple)):
+            raise ValueError("must be a list of keyswitches")
+        out: list[tuple[str | int, ...]] = []
+        for row_idx, row in enumerate(cast(Sequence[Any], values), start=1):
+            is_row = isinstance(row, (list, tuple))
+            if not is_row or len(cast(Sequence[Any], row)) != len(mapping):
+                raise ValueError(
+                    f"Keyswitch {row_idx} must be a list of {len(mapping)} values, one "
+                    f"for each field in `mapping` ({', '.join(mapping)}). Use "
+                    f"`{EMPTY_VALUE}` to leave a field out."
+                )
+            for field, validator, value in zip(mapping, validators, row):
+                if value == EMPTY_VALUE:
+                    continue
+                try:
+                    validator(value)
+                except ValueError as e:
+                    raise ValueError(f"Keyswitch {row_idx} (`{field}`): {e}") from e
+            out.append(interning.intern_row(cast(Sequence[str | int], row)))
+        return interning.intern_rows(out)
+
+    @field_serializer("values", when_used="json")
+    def _serialize_values(
+        self, values: tuple[tuple[str | int, ...], ...]
+    ) -> list[list[str | int]]:
+        # Pydantic can't infer how to dump these to JSON past the plain validator
+        return [list(row) for row in values]
+
+    def check(self, settings: Settings) -> list[str]:
+        """
+        Finds every problem that would stop these keyswitches from being converted to
+        KSEM with the given settings, without converting them.
+        """
+        problems: list[str] = []
+        for field_name in ("key", "second_key"):
+            if (
+                field_name in self.mapping
+                and getattr(self.root_octaves, field_name) is None
+            ):
+                problems.append(
+                    f"`root_octaves.{field_name}` must be defined since you're "
+                    f"mapping `{field_name}`"
+                )
+
+        for row_idx, row in enumerate(self.values, start=1):
+            for field_name, value in zip(self.mapping, row):
+                if value == EMPTY_VALUE:
+                    continue
+                if field_name in ("key", "second_key"):
+                    root_octave = getattr(self.root_octaves, field_name)
+                    if root_octave is None:
+                        continue
+                    try:
+                        Note(
+                            cast(NoteLiteral, value),
+                            root_octave,
+                            middle_c=settings.middle_c,
+                        )
+                    except (ValueError, TypeError) as e:
+                        problems.append(f"Keyswitch {row_idx} (`{field_name}`): {e}")
+
+                elif field_name == "color" and value not in settings.colors:
+                    problems.append(
+                        f"Keyswitch {row_idx} (`color`): color `{value}` isn't "
+                        "defined in `settings.colors`"
+                    )
+
+        return problems
 
     def to_ksem_config(self, settings: Settings) -> dict[str, KsemKeyswitchesEntry]:
         """
@@ -92,7 +224,10 @@ class Keyswitches(BaseModel):
             for value_idx, value in enumerate(row):
                 ksem_key = keyswitch_field_to_ksem_key[self.mapping[value_idx]]
 
-                if ksem_key == "key":
+                if value == EMPTY_VALUE:
+                    continue
+
+                elif ksem_key == "key":
                     assert self.root_octaves.key is not None
                     assert isinstance(value, str)
                     row_out[ksem_key] = Note(
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable, Iterator, Mapping
+from pathlib import Path
+from typing import Any, cast
+
+from ksem_transformer.models.ksem_json_types import KsemConfig
+
+# Files are read into a single buffer that's grown to fit the largest one so far
+_INITIAL_BUFFER_SIZE = 64 * 1024
+
+
+class KsemConfigView(Mapping[str, Any]):
+    """
+    A read-only view of a KSEM config's raw JSON. Nothing is decoded until a section
+    (`ks`, `midiControls`, ...) is first read, so views are cheap to create in bulk
+    and ones that are never read cost nothing to decode.
+
+    The whole document is decoded at once on first access: finding where a single
+    section starts and ends is slower in Python than decoding all of it in C. Decoded
+    sections are shared between reads and mustn't be modified.
+    """
+
+    __slots__ = ("_raw", "_sections", "size")
+
+    def __init__(self, raw: bytes) -> None:
+        self._raw: bytes | None = raw
+        # Size of the raw JSON, in bytes
+        self.size = len(raw)
+        self._sections: dict[str, Any] | None = None
+
+    @classmethod
+    def from_file(cls, file: Path) -> KsemConfigView:
+        return KsemConfigView(file.read_bytes())
+
+    @property
+    def decoded(self) -> bool:
+        return self._sections is not None
+
+    def _decode(self) -> dict[str, Any]:
+        if self._sections is None:
+            self._sections = cast(dict[str, Any], json.loads(cast(bytes, self._raw)))
+            # The raw JSON isn't needed anymore
+            self._raw = None
+        return self._sections
+
+    def __getitem__(self, key: str) -> Any:
+        return self._decode()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._decode())
+
+    def __len__(self) -> int:
+        return len(self._decode())
+
+    def as_config(self) -> KsemConfig:
+        """
+        The view typed as a `KsemConfig`, to pass to the `from_ksem_config`
+        classmethods, which only ever read sections from it.
+        """
+        return cast(KsemConfig, self)
+
+
+def iter_ksem_config_views(files: Iterable[Path]) -> Iterator[KsemConfigView]:
+    """
+    Reads KSEM configs one after the other into a single reusable buffer, using
+    unbuffered file objects that read straight into it rather than a fresh buffer
+    for every file. Meant for importing many small files.
+    """
+    buffer = bytearray(_INITIAL_BUFFER_SIZE)
+    for file in files:
+        with file.open("rb", buffering=0) as f:
+            size = 0
+            while True:
+                if size == len(buffer):
+                    buffer.extend(bytes(len(buffer)))
+                with memoryview(buffer) as view:
+                    read = f.readinto(view[size:])
+                if not read:
+                    break
+                size += read
+        with memoryview(buffer) as view:
+            raw = bytes(view[:size])
+        yield KsemConfigView(raw)
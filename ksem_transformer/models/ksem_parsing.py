@@ -29,7 +29,7 @@ class Color:
 def make_keyswitches(config: KsemConfig, settings: Settings) -> Keyswitches:
     mapping_order = list(keyswitch_field_to_ksem_key.keys())
 
-    mapping = list[KeyswitchField](
+    mapping = tuple[KeyswitchField, ...](
         sorted(
             {
                 cast(KeyswitchField, keyswitch_field_to_ksem_key.inv[field])
@@ -41,11 +41,12 @@ def make_keyswitches(config: KsemConfig, settings: Settings) -> Keyswitches:
         )
     )
 
-    colors: list[Color] = []
+    # Names of the colors used, and their hex values
+    colors: dict[str, str] = {}
     notes = {"key": set[Note](), "second_key": set[Note]()}
-    values: list[list[Note | int | str]] = []
+    values: list[tuple[str | int, ...]] = []
     for ks in config["ks"].values():
-        row: list[Note | int | str] = []
+        row: list[str | int] = []
         # Add each field from the mapping into this row
         for field in mapping:
             raw_value = cast(
@@ -54,6 +55,8 @@ def make_keyswitches(config: KsemConfig, settings: Settings) -> Keyswitches:
             )
 
             if raw_value == EMPTY_VALUE:
+                # Keep the cell so the rest of the row stays lined up with `mapping`
+                row.append(EMPTY_VALUE)
                 continue
 
             if field in ("key", "second_key"):
@@ -69,19 +72,19 @@ def make_keyswitches(config: KsemConfig, settings: Settings) -> Keyswitches:
                 assert isinstance(raw_value, list)
                 # We're keeping track of the unique colors and assigning identities
                 # to them (using their hex value)
-                color = Color(*raw_value)
-                if color not in colors:
-                    colors.append(color)
+                color_hex = Color(*raw_value).to_hex()
                 # The user will be responsible for assigning more useful color names
-                row.append(f"Color_{color.to_hex()}")
+                color_name = f"Color_{color_hex}"
+                colors.setdefault(color_name, f"#{color_hex}")
+                row.append(color_name)
 
             else:
                 # This is some other unspecial value. We'll just use it raw
                 assert isinstance(raw_value, (str, int))
                 row.append(cast(Any, raw_value))
 
-        if row:
-            values.append(row)
+        if any(value != EMPTY_VALUE for value in row):
+            values.append(tuple(row))
 
     # Infer the root octaves of the keyswitch notes
     root_octaves = KeyswitchesRootOctaves()
@@ -96,8 +99,8 @@ def make_keyswitches(config: KsemConfig, settings: Settings) -> Keyswitches:
             )
         setattr(root_octaves, _field_name, notes[_field_name].pop().octave)
 
-    # Store the colors in the `Settings`
-    for color in colors:
-        settings.colors[f"Color_{color.to_hex()}"] = f"#{color.to_hex()}"
+    # Store the colors in the `Settings`. Replaced rather than updated, since the
+    # colors may be shared with other settings
+    settings.colors = {**settings.colors, **colors}
 
-    return Keyswitches(root_octaves=root_octaves, mapping=mapping, values=values)
+    return Keyswitches(root_octaves=root_octaves, mapping=mapping, values=tuple(values))
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import Counter
+from collections.abc import Iterator, Mapping
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Any, cast
+
+import attrs
+
+from ksem_transformer.models.ksem_json_types import EMPTY_VALUE
+from ksem_transformer.models.root import Root
+from ksem_transformer.models.selection import InstrumentPath
+from ksem_transformer.models.settings.settings import Settings
+from ksem_transformer.note import Note, key_to_offset, offset_to_key
+
+# Bump this whenever the layout of `LibraryIndex` changes, so old caches get rebuilt
+INDEX_FORMAT_VERSION = 1
+
+type Postings = dict[str, list[int]]
+
+
+def _index_key(value: object) -> str:
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _canonical_note(note: str, octave: int) -> str:
+    # Spell enharmonic notes one way so that e.g. C# and Db are found by either name
+    return f"{offset_to_key[key_to_offset[note]]}{octave}"
+
+
+def _flatten_settings(
+    data: Mapping[str, Any], prefix: str = "settings"
+) -> Iterator[tuple[str, Any]]:
+    for k, v in data.items():
+        path = f"{prefix}.{k}"
+        if isinstance(v, Mapping) and v:
+            yield from _flatten_settings(cast(Mapping[str, Any], v), path)
+        else:
+            yield path, v
+
+
+@attrs.define()
+class LibraryIndex:
+    """
+    Inverted indexes over every instrument in a library, mapping the values of each
+    field to the instruments that use them.
+
+    Fields are `product`, `group` and `instrument` for an instrument's path, the
+    keyswitch fields (`name`, `key`, `cc_n`, ...) for the values in its keyswitches,
+    and dotted `settings.*` paths (e.g. `settings.middle_c`) for its resolved
+    settings. Notes are indexed with their octave (e.g. `C#0`).
+    """
+
+    instruments: list[InstrumentPath]
+    keyswitch_counts: list[int]
+    fields: dict[str, Postings]
+    source_hash: str = ""
+
+    @classmethod
+    def build(cls, root: Root, source_hash: str = "") -> LibraryIndex:
+        """
+        Builds the indexes for a library in a single pass over its instruments.
+        """
+        index = LibraryIndex(
+            instruments=[], keyswitch_counts=[], fields={}, source_hash=source_hash
+        )
+
+        def _add(field: str, value: object, instrument_id: int) -> None:
+            postings = index.fields.setdefault(field, {}).setdefault(
+                _index_key(value), []
+            )
+            if not postings or postings[-1] != instrument_id:
+                postings.append(instrument_id)
+
+        for product_name, product in root.products.items():
+            for group_name, group in product.instrument_groups.items():
+                group_settings = group.get_merged_settings()
+                group_settings_flat = list(
+                    _flatten_settings(group_settings.model_dump(mode="json"))
+                )
+
+                for instrument_name, instrument in group.instruments.items():
+                    instrument_id = len(index.instruments)
+                    index.instruments.append(
+                        (product_name, group_name, instrument_name)
+                    )
+                    keyswitches = instrument.keyswitches
+                    index.keyswitch_counts.append(len(keyswitches.values))
+
+                    _add("product", product_name, instrument_id)
+                    _add("group", group_name, instrument_id)
+                    _add("instrument", instrument_name, instrument_id)
+
+                    for row in keyswitches.values:
+                        for field, value in zip(keyswitches.mapping, row):
+                            if value == EMPTY_VALUE:
+                                continue
+                            octave = (
+                                getattr(keyswitches.root_octaves, field)
+                                if field in ("key", "second_key")
+                                else None
+                            )
+                            if octave is not None and value in key_to_offset:
+                                value = _canonical_note(cast(str, value), octave)
+                            _add(field, value, instrument_id)
+
+                    settings_flat = (
+                        group_settings_flat
+                        if instrument.settings.is_default()
+                        else _flatten_settings(
+                            Settings.combine(
+                                group_settings, instrument.settings
+                            ).model_dump(mode="json")
+                        )
+                    )
+                    for field, value in settings_flat:
+                        _add(field, value, instrument_id)
+
+        return index
+
+    @classmethod
+    def from_file(cls, file: Path, cache_file: Path | None = None) -> LibraryIndex:
+        """
+        Builds the index for a library file. If `cache_file` is given, the index is
+        read from it when it was built from the same library, and written to it
+        otherwise.
+        """
+        source_hash = hashlib.sha256(
+            f"{INDEX_FORMAT_VERSION}:".encode() + file.read_bytes()
+        ).hexdigest()
+
+        if cache_file is not None and cache_file.exists():
+            cached = json.loads(cache_file.read_text())
+            if cached.get("source_hash") == source_hash:
+                return LibraryIndex(
+                    instruments=[tuple(i) for i in cached["instruments"]],
+                    keyswitch_counts=cached["keyswitch_counts"],
+                    fields=cached["fields"],
+                    source_hash=source_hash,
+                )
+
+        index = LibraryIndex.build(Root.from_file(file), source_hash=source_hash)
+        if cache_file is not None:
+            cache_file.write_text(json.dumps(attrs.asdict(index)))
+        return index
+
+    def find(self, filters: Mapping[str, str]) -> list[InstrumentPath]:
+        """
+        Finds the instruments matching every filter. Filters map field names to
+        values, which may contain glob wildcards.
+        """
+        return [self.instruments[i] for i in sorted(self._find_ids(filters))]
+
+    def _find_ids(self, filters: Mapping[str, str]) -> set[int]:
+        matched = set(range(len(self.instruments)))
+        for field, value in filters.items():
+            postings = self.fields.get(field, {})
+            if field in ("key", "second_key"):
+                try:
+                    note = Note.from_str(value)
+                except ValueError:
+                    pass
+                else:
+                    value = _canonical_note(note.note, note.octave)
+            if any(c in value for c in "*?["):
+                field_ids = {
+                    i
+                    for key, ids in postings.items()
+                    if fnmatchcase(key, value)
+                    for i in ids
+                }
+            else:
+                field_ids = set(postings.get(value, ()))
+            matched &= field_ids
+            if not matched:
+                break
+        return matched
+
+    def count_by(
+        self, field: str, filters: Mapping[str, str] | None = None
+    ) -> Counter[str]:
+        """
+        Counts the instruments matching `filters` by their values of `field`. An
+        instrument is counted once for every distinct value it has.
+        """
+        matched = self._find_ids(filters or {})
+        return Counter(
+            {
+                key: count
+                for key, ids in self.fields.get(field, {}).items()
+                if (count := len(matched.intersection(ids)))
+            }
+        )
+
+    def keyswitch_count(self, filters: Mapping[str, str] | None = None) -> int:
+        """
+        Counts the keyswitches of the instruments matching `filters`.
+        """
+        return sum(self.keyswitch_counts[i] for i in self._find_ids(filters or {}))
@@ -1,11 +1,20 @@
 # pyright: reportUnknownMemberType=none, reportUnknownVariableType=none
 from __future__ import annotations
 
+import gc
+import hashlib
 import json
-from collections.abc import Generator
-from functools import reduce
+import time
+import weakref
+from collections.abc import Callable, Generator, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cache, partial
+from io import StringIO
+from itertools import repeat
 from pathlib import Path
-from typing import Annotated, Any, Literal, Protocol, Self, cast
+from typing import Annotated, Any, Literal, Protocol, Self, TextIO, cast
 
 import attrs
 from pydantic import (
@@ -13,25 +22,61 @@ from pydantic import (
     BaseModel,
     ConfigDict,
     Field,
+    PrivateAttr,
+    SerializationInfo,
     SerializerFunctionWrapHandler,
     model_serializer,
     model_validator,
 )
-from ruamel.yaml import YAML as Yaml  # pyright: ignore[reportMissingTypeStubs]
+from ruamel.yaml.comments import (  # pyright: ignore[reportMissingTypeStubs]
+    CommentedMap,
+)
 
 from ksem_transformer.models.keyswitches import Keyswitches
+from ksem_transformer.models.ksem_config_view import (
+    KsemConfigView,
+    iter_ksem_config_views,
+)
 from ksem_transformer.models.ksem_json_types import KsemConfig
 from ksem_transformer.models.ksem_parsing import make_keyswitches
+from ksem_transformer.models.selection import (
+    InstrumentFilter,
+    Shard,
+    filter_library,
+    instrument_costs,
+)
 from ksem_transformer.models.settings.settings import Settings
 from ksem_transformer.note import Note
-from ksem_transformer.utils.tree import Tree, deep_join_trees
-from ksem_transformer.utils.yaml_utils import yaml_dumps, yaml_load
+from ksem_transformer.storage.json_library import (
+    append_to_jsonl_library,
+    merge_into_json_library,
+    write_json_library,
+    write_jsonl_library,
+)
+from ksem_transformer.storage.library_file import get_library_format, load_library_data
+from ksem_transformer.storage.render_cache import TOOL_VERSION, RenderCache
+from ksem_transformer.storage.sqlite_library import SqliteLibrary
+from ksem_transformer.utils import counters, instrumentation
+from ksem_transformer.utils.files import atomic_write, atomic_write_text, file_lock
+from ksem_transformer.utils.interning import interning
+from ksem_transformer.utils.parallel import get_worker_count
+from ksem_transformer.utils.tree import Tree, deep_update_tree
+from ksem_transformer.utils.yaml_utils import (
+    to_commented,
+    yaml_dumps,
+    yaml_load_round_trip,
+)
 
 KSEM_VERSION = "4.2"
 
 type SettingsLocation = Literal["root", "product", "instrument_group", "instrument"]
 
 
+@cache
+def _default_settings_dump(mode: str) -> dict[str, Any]:
+    return Settings().model_dump(mode=mode)
+
+
 class HasSettings(Protocol):
     settings: Settings
 
@@ -46,21 +91,116 @@ class KsemConfigFile:
     data: KsemConfig
 
 
-class Container[Parent: "Container | None"](BaseModel):
-    parent: Parent | None = Field(default=None, exclude=True)
+_pending_adoptions: ContextVar[
+    list[tuple[Container[Any], ChildDict[Any, Any, Any]]] | None
+] = ContextVar("pending_adoptions", default=None)
+
+
+@contextmanager
+def bulk_loading() -> Generator[None, None, None]:
+    """
+    Builds the trees validated in the block faster: the cyclic garbage collector is
+    paused, and children are only linked to their parents once the block ends
+    (rather than as each container is validated).
+
+    Nothing in the block should use the `parent` of the containers it builds.
+    """
+    if _pending_adoptions.get() is not None:
+        # Already bulk loading
+        yield
+        return
+
+    pending: list[tuple[Container[Any], ChildDict[Any, Any, Any]]] = []
+    token = _pending_adoptions.set(pending)
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        _pending_adoptions.reset(token)
+        for parent, children in pending:
+            children.adopt(parent)
+        if gc_was_enabled:
+            gc.enable()
+
+
+class Container[Parent: "Container | None"](counters.CountedModel):
     settings: Settings = Field(default_factory=Settings)
+    # Held weakly, so trees don't keep themselves alive through parent <-> child
+    # cycles until the cyclic garbage collector gets to them
+    _parent_ref: weakref.ref[Any] | None = PrivateAttr(default=None)
+
+    @property
+    def parent(self) -> Parent | None:
+        """
+        The container this one is in. It's held weakly, so the `Root` has to be kept
+        alive while its containers are used: once it's gone, this raises
+        `ReferenceError`. E.g. `Root.from_file(path).products["X"]` can't get at its
+        parent, since nothing keeps the `Root` alive.
+        """
+        if self._parent_ref is None:
+            return None
+        parent = self._parent_ref()
+        if parent is None:
+            raise ReferenceError(
+                f"The parent of this {type(self).__name__} no longer exists. Keep a "
+                "reference to the Root while using the containers in it."
+            )
+        return parent
+
+    @parent.setter
+    def parent(self, new_parent: Parent | None) -> None:
+        self._parent_ref = weakref.ref(new_parent) if new_parent is not None else None
+
+    def __getstate__(self) -> dict[Any, Any]:
+        state = super().__getstate__()
+        # Weak references can't be pickled. Each parent links its children again as
+        # it's unpickled, so only a container pickled on its own loses its parent
+        state["__pydantic_private__"] = {
+            **state["__pydantic_private__"],
+            "_parent_ref": None,
+        }
+        return state
+
+    def __setstate__(self, state: dict[Any, Any]) -> None:
+        super().__setstate__(state)
+        for value in self.__dict__.values():
+            if isinstance(value, ChildDict):
+                cast(ChildDict[Any, Any, Any], value).adopt(self)
 
     @model_serializer(mode="wrap")
     def _serialize_main_models(
-        self: HasSettings, handler: SerializerFunctionWrapHandler
+        self: HasSettings,
+        handler: SerializerFunctionWrapHandler,
+        info: SerializationInfo,
     ):
+        if counters.is_counting():
+            counters.count(f"dump.{type(self).__name__}")
         with Note.with_middle_c(self.settings.middle_c):
             partial_value = handler(self)
-        if self.settings.is_default():
+        if info.context is not None and info.context.get("full_settings"):
+            # Dumped to be merged over another library, where the fields left at
+            # their defaults have to reset whatever they're merged over
+            if self.settings.is_default():
+                del partial_value["settings"]
+            return partial_value
+        # `Settings.combine` ignores fields left at their defaults, so there's no
+        # point writing them out
+        default = _default_settings_dump(info.mode)
+        settings = {
+            k: v for k, v in partial_value["settings"].items() if v != default[k]
+        }
+        if settings:
+            partial_value["settings"] = settings
+        else:
             del partial_value["settings"]
         return partial_value
 
     def get_merged_settings(self) -> Settings:
+        """
+        Merges the settings of this container and every container it's in. Raises
+        `ReferenceError` if the `Root` is no longer alive (see `parent`).
+        """
         settings_ascending: list[Settings] = [self.settings]
         obj = self
         while hasattr(obj, "parent") and obj.parent is not None:
@@ -71,33 +211,46 @@ class Container[Parent: "Container | None"](BaseModel):
 
 
 class ChildProto[T](Protocol):
-    parent: T | None
+    @property
+    def parent(self) -> T | None: ...
+
+    @parent.setter
+    def parent(self, new_parent: T | None) -> None: ...
 
 
 class ChildDict[K, V: ChildProto[Any], Parent](dict[K, V]):
-    _parent: Parent | None = None
+    _parent_ref: weakref.ref[Any] | None = None
+
+    def __getstate__(self) -> None:
+        # The weak reference to the parent can't be pickled, and the parent adopts
+        # the dict again when it's unpickled
+        return None
 
     @property
     def parent(self) -> Parent | None:
-        return self._parent
+        return self._parent_ref() if self._parent_ref is not None else None
 
-    @parent.setter
-    def parent(self, new_parent: Parent | None) -> None:
-        self._parent = new_parent
-        self._update_parents()
-
-    def _update_parents(self):
+    def adopt(self, parent: Parent) -> None:
+        """
+        Makes `parent` the parent of this dict's children, and of any added later.
+        """
+        self._parent_ref = weakref.ref(parent)
         for v in self.values():
-            v.parent = self.parent
-
-    def __attrs_post_init__(self):
-        self._update_parents()
+            v.parent = parent
 
     def __setitem__(self, key: K, value: V) -> None:
         value.parent = self.parent
         super().__setitem__(key, value)
 
 
+def _adopt_children(parent: Container[Any], children: ChildDict[Any, Any, Any]) -> None:
+    pending = _pending_adoptions.get()
+    if pending is not None:
+        pending.append((parent, children))
+    else:
+        children.adopt(parent)
+
+
 class Instrument(Container["InstrumentGroup"], BaseModel):
     """
     Represents an instrument.
@@ -126,9 +279,9 @@ class InstrumentGroup(Container["Product"], BaseModel):
 
     @model_validator(mode="after")
     def set_parent(self) -> Self:
-        cast(
-            ChildDict[str, Instrument, InstrumentGroup], self.instruments
-        ).parent = self
+        _adopt_children(
+            self, cast(ChildDict[str, Instrument, InstrumentGroup], self.instruments)
+        )
         return self
 
 
@@ -152,9 +305,9 @@ class Product(Container["Root"], BaseModel):
 
     @model_validator(mode="after")
     def set_parent(self) -> Self:
-        cast(
-            ChildDict[str, InstrumentGroup, Product], self.instrument_groups
-        ).parent = self
+        _adopt_children(
+            self, cast(ChildDict[str, InstrumentGroup, Product], self.instrument_groups)
+        )
         return self
 
 
@@ -178,18 +331,33 @@ class Root(Container[None], BaseModel):
 
     @model_validator(mode="after")
     def set_parent(self) -> Self:
-        cast(ChildDict[str, Product, Root], self.products).parent = self
+        _adopt_children(self, cast(ChildDict[str, Product, Root], self.products))
         return self
 
     @classmethod
-    def from_file(cls, file: Path) -> Root:
+    def from_file(
+        cls,
+        file: Path,
+        only: InstrumentFilter | None = None,
+        shard: Shard | None = None,
+    ) -> Root:
         """
-        Loads a Root configuration from a YAML file.
+        Loads a Root configuration from a library file (YAML, JSON, JSON Lines or
+        SQLite, going by its extension).
+
+        If `only` is given, just the instruments it matches (and their ancestors'
+        settings) are validated and loaded. Everything else is left out. If `shard`
+        is given, the (matching) instruments are split into shards and only the ones
+        in `shard` are validated and loaded.
         """
-        yaml = Yaml(typ="safe")
-        with file.open() as f:
-            data = yaml.load(f)
-        return Root.model_validate(data)
+        with instrumentation.stage("load"):
+            data = load_library_data(file, only.matches if only is not None else None)
+            if shard is not None:
+                data = filter_library(
+                    data, shard.select(instrument_costs(data)).__contains__
+                )
+        with instrumentation.stage("validate"), bulk_loading(), interning():
+            return Root.model_validate(data)
 
     @classmethod
     def from_ksem_config(
@@ -202,8 +370,30 @@ class Root(Container[None], BaseModel):
         store_settings_in: SettingsLocation | None = "root",
         store_pitch_range_setting_in: SettingsLocation = "instrument",
     ) -> Root:
-        config = cast(KsemConfig, json.loads(config_path.read_text()))
+        return Root.from_ksem_config_data(
+            KsemConfigView.from_file(config_path).as_config(),
+            product_name=product_name,
+            instrument_group_name=instrument_group_name,
+            instrument_name=instrument_name,
+            store_settings_in=store_settings_in,
+            store_pitch_range_setting_in=store_pitch_range_setting_in,
+        )
 
+    @classmethod
+    def from_ksem_config_data(
+        cls,
+        config: KsemConfig,
+        *,
+        product_name: str,
+        instrument_group_name: str,
+        instrument_name: str,
+        store_settings_in: SettingsLocation | None = "root",
+        store_pitch_range_setting_in: SettingsLocation = "instrument",
+    ) -> Root:
+        """
+        Like `from_ksem_config`, for a config that's already been read (e.g. a
+        `KsemConfigView`).
+        """
         settings = Settings.from_ksem_config(config)
 
         instrument = Instrument(keyswitches=make_keyswitches(config, settings))
@@ -239,66 +429,227 @@ class Root(Container[None], BaseModel):
 
         return root
 
+    @classmethod
+    def from_ksem_config_dir(
+        cls,
+        root_dir: Path,
+        *,
+        store_settings_in: SettingsLocation | None = "root",
+        store_pitch_range_setting_in: SettingsLocation = "instrument",
+    ) -> Root:
+        """
+        Loads every KSEM config in a directory laid out the way
+        `write_ksem_config_files` writes them (`Product/Instrument group/Instrument.json`),
+        taking the names of the products, groups and instruments from the paths.
+        """
+        files = sorted(root_dir.glob("*/*/*.json"))
+        if not files:
+            raise ValueError(
+                f"No KSEM configs found in {root_dir}. They should be laid out as "
+                "`Product/Instrument group/Instrument.json`."
+            )
+        roots: list[Root] = []
+        with instrumentation.stage("import", total=len(files)), bulk_loading():
+            for file, view in zip(files, iter_ksem_config_views(files)):
+                start = time.perf_counter()
+                roots.append(
+                    Root.from_ksem_config_data(
+                        view.as_config(),
+                        product_name=file.parent.parent.name,
+                        instrument_group_name=file.parent.name,
+                        instrument_name=file.stem,
+                        store_settings_in=store_settings_in,
+                        store_pitch_range_setting_in=store_pitch_range_setting_in,
+                    )
+                )
+                instrumentation.item_done(
+                    file.relative_to(root_dir).with_suffix("").parts,
+                    time.perf_counter() - start,
+                    view.size,
+                )
+        with instrumentation.stage("merge"), bulk_loading(), interning():
+            return Root.combine(*roots)
+
     @classmethod
     def combine(cls, *roots: Root) -> Root:
-        return Root.model_validate(
-            reduce(
-                lambda a, b: deep_join_trees(a, b),
-                (cast(Tree[object, object], i.model_dump()) for i in roots),
+        # Each dump is a new tree, so they can be merged in place, without copying
+        # what's been merged so far at every step
+        combined: Tree[object, object] = {}
+        for root in roots:
+            deep_update_tree(
+                combined, cast(Tree[object, object], root.dump_for_merge())
             )
-        )
+        return Root.model_validate(combined)
 
     def to_yaml(
         self, compact_settings: bool = True, compact_keyswitch_values: bool = True
     ) -> str:
-        data = yaml_load(self.model_dump())
-
-        def _iter_settings() -> Generator[Any, None, None]:
-            if "settings" in data:
-                yield data["settings"]
-
-            for product in data["products"].values():
-                if "settings" in product:
-                    yield product["settings"]
-
-                for group in product["instrument_groups"].values():
-                    if "settings" in group:
-                        yield group["settings"]
-
-                    for instrument in group["instruments"].values():
-                        if "settings" in instrument:
-                            yield instrument["settings"]
-
-        def _set_flow_style(obj: Any) -> None:
-            if hasattr(obj, "fa"):
-                obj.fa.set_flow_style()
-
-        if compact_settings:
-            for settings in _iter_settings():
-                if settings is None:
-                    continue
-                for field in list(settings["midi_controls"].values()) + list(
-                    settings["custom_bank"].values()
-                ):
-                    _set_flow_style(field)
-
-        if compact_keyswitch_values:
-            # Set flow style for concise keyswitch fields
-            for keyswitches in (
-                cast(Any, instrument["keyswitches"])
-                for product in data["products"].values()
-                for group in product["instrument_groups"].values()
-                for instrument in group["instruments"].values()
+        stream = StringIO()
+        self.write_yaml(
+            stream,
+            compact_settings=compact_settings,
+            compact_keyswitch_values=compact_keyswitch_values,
+        )
+        return stream.getvalue()
+
+    def write_yaml(
+        self,
+        stream: TextIO,
+        compact_settings: bool = True,
+        compact_keyswitch_values: bool = True,
+        jobs: int | None = 1,
+    ) -> None:
+        """
+        Writes the Root configuration to `stream` as YAML, one product at a time, so
+        the YAML objects for the whole library are never held in memory at once.
+
+        Products are rendered in `jobs` worker processes (`None` for the number of
+        CPUs) when the library is big enough for that to pay off. They're written in
+        order either way, and the output is the same as `to_yaml`'s.
+        """
+        data = self.model_dump()
+        product_dumps: dict[str, Any] = data.pop("products")
+        header = to_commented({**data, "products": {}})
+        if compact_settings and header.get("settings") is not None:
+            _compact_settings(header["settings"])
+        if not product_dumps:
+            stream.write(yaml_dumps(header))
+            return
+        del header["products"]
+        if header:
+            stream.write(yaml_dumps(header))
+        stream.write("products:\n")
+
+        instrument_count = sum(
+            len(group.instruments)
+            for product in self.products.values()
+            for group in product.instrument_groups.values()
+        )
+        jobs = min(get_worker_count(instrument_count, jobs), len(self.products))
+        if jobs <= 1:
+            for product_name, product_dump in product_dumps.items():
+                stream.write(
+                    _product_to_yaml(
+                        product_name,
+                        product_dump,
+                        compact_settings,
+                        compact_keyswitch_values,
+                    )
+                )
+            return
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for fragment in executor.map(
+                _product_to_yaml,
+                product_dumps.keys(),
+                product_dumps.values(),
+                repeat(compact_settings),
+                repeat(compact_keyswitch_values),
             ):
-                keyswitches["mapping"].fa.set_flow_style()
-                for value in keyswitches["values"]:
-                    _set_flow_style(value)
+                stream.write(fragment)
 
-        return yaml_dumps(data)
+    def dump_for_merge(
+        self, mode: Literal["python", "json"] = "python"
+    ) -> dict[str, Any]:
+        """
+        Dumps the configuration to be deep-merged over another library. Unlike
+        `model_dump`, settings that aren't all default are dumped in full, so the
+        fields they leave at their defaults reset what they're merged over.
+        """
+        return self.model_dump(mode=mode, context={"full_settings": True})
 
-    def _get_keyswitch_amount_option(
-        self, instrument: Instrument, instrument_name: str
+    def to_yaml_data(
+        self, compact_settings: bool = True, compact_keyswitch_values: bool = True
+    ) -> CommentedMap:
+        """
+        Converts the Root configuration to a round-trip YAML document, with flow style
+        applied to the compact fields. Settings are dumped as by `dump_for_merge`, since
+        the document is spliced into existing files.
+        """
+        data = to_commented(self.dump_for_merge())
+        if compact_settings and data.get("settings") is not None:
+            _compact_settings(data["settings"])
+        for product in data["products"].values():
+            _compact_product(product, compact_settings, compact_keyswitch_values)
+        return data
+
+    def to_file(self, file: Path) -> None:
+        """
+        Writes this configuration to a new library file, replacing anything that was
+        already there. The format is picked from the file's extension.
+        """
+        match get_library_format(file):
+            case "sqlite":
+                file.unlink(missing_ok=True)
+                with SqliteLibrary.open(file) as library:
+                    library.merge(self.model_dump(mode="json"))
+            case "json":
+                write_json_library(file, self.model_dump(mode="json"))
+            case "jsonl":
+                write_jsonl_library(file, self.model_dump(mode="json"))
+            case "yaml":
+                with file.open("w") as f:
+                    self.write_yaml(f, jobs=None)
+
+    def insert_into_file(self, file: Path) -> None:
+        """
+        Inserts this configuration into a library file, creating it if it doesn't
+        exist yet. Only the parts of the library this configuration defines are
+        touched.
+
+        The file is locked while it's updated, so concurrent inserts into the same
+        file are applied one after the other, each merging into what the others
+        wrote (see `file_lock`, which leaves a `<file>.lock` file next to it). YAML
+        and JSON files are replaced atomically.
+        """
+        with file_lock(file):
+            library_format = get_library_format(file)
+            if library_format == "yaml" and file.exists():
+                self.insert_into_yaml_file(file)
+                return
+            with instrumentation.stage("write"):
+                match library_format:
+                    case "sqlite":
+                        with SqliteLibrary.open(file) as library:
+                            library.merge(self.dump_for_merge(mode="json"))
+                    case "json":
+                        merge_into_json_library(file, self.dump_for_merge(mode="json"))
+                    case "jsonl":
+                        append_to_jsonl_library(file, self.dump_for_merge(mode="json"))
+                    case "yaml":
+                        with atomic_write(file) as f:
+                            self.write_yaml(f)
+
+    def insert_into_yaml_file(
+        self,
+        file: Path,
+        compact_settings: bool = True,
+        compact_keyswitch_values: bool = True,
+    ) -> None:
+        """
+        Splices this configuration into an existing YAML file. Only the subtrees this
+        configuration defines are rewritten, so the rest of the file (including its
+        comments and formatting) is kept as it was, and nothing but the new data is
+        validated.
+        """
+        with instrumentation.stage("to_yaml"):
+            data = self.to_yaml_data(
+                compact_settings=compact_settings,
+                compact_keyswitch_values=compact_keyswitch_values,
+            )
+        with instrumentation.stage("write"):
+            document, dumper = yaml_load_round_trip(file.read_text())
+            deep_update_tree(document, data)
+            atomic_write_text(file, yaml_dumps(document, dumper))
+
+    @staticmethod
+    def get_keyswitch_amount_option(
+        instrument: Instrument, instrument_name: str
     ) -> int:
+        """
+        The KSEM `keySwitchAmount` option for the instrument's number of keyswitches.
+        Raises a `ValueError` if it has more than KSEM supports.
+        """
         total_keyswitches = len(instrument.keyswitches.values)
         if total_keyswitches <= 16:
             return 1
@@ -319,9 +670,11 @@ class Root(Container[None], BaseModel):
         group_name: str,
         instrument_name: str,
         instrument: Instrument,
+        settings: Settings | None = None,
     ):
         file = Path(product_name, group_name, f"{instrument_name}.json")
-        settings = instrument.get_merged_settings()
+        if settings is None:
+            settings = instrument.get_merged_settings()
 
         with Note.with_middle_c(settings.middle_c):
             ksem_config: KsemConfig = {
@@ -330,7 +683,7 @@ class Root(Container[None], BaseModel):
                 "midiControls": settings.midi_controls.to_ksem_config(),
                 "customBank": settings.custom_bank.to_ksem_config(),
                 "keySwitchSettings": {
-                    "keySwitchAmount": self._get_keyswitch_amount_option(
+                    "keySwitchAmount": self.get_keyswitch_amount_option(
                         instrument, instrument_name
                     ),
                     "sendMainKey": int(settings.send_main_key),
@@ -349,46 +702,252 @@ class Root(Container[None], BaseModel):
                     "automationKey": settings.automation.automation_key.to_midi(),
                 },
                 "pad": settings.control_pad.to_ksem_config(),
-                "comments": (
-                    settings.comment_template.format(
-                        product=product_name,
-                        instrument_group=group_name,
-                        instrument=instrument_name,
-                    )
-                    if settings.comment_template
-                    else ""
+                "comments": _format_comment(
+                    settings, product_name, group_name, instrument_name
                 ),
             }
 
         return KsemConfigFile(file=file, data=ksem_config)
 
-    def write_ksem_config_files(self, root_dir: Path) -> None:
+    def write_ksem_config_files(
+        self, root_dir: Path, cache: RenderCache | None = None
+    ) -> int:
         """
-        Writes KSEM configuration files to the specified root directory.
+        Writes KSEM configuration files to the specified root directory. Each file is
+        written as soon as it's rendered, so only one is held in memory at a time.
+
+        If `cache` is given, instruments it has already rendered are copied from it
+        rather than rendered again, and the rest are added to it.
+
+        Returns the number of files written.
         """
-        for config in self.to_ksem_configs():
-            file = root_dir / config.file
-            file.parent.mkdir(parents=True, exist_ok=True)
-            file.write_text(json.dumps(config.data, indent=2))
+        total = (
+            sum(1 for _ in self.iter_instruments())
+            if instrumentation.is_observed()
+            else None
+        )
+        with instrumentation.stage("render", total=total):
+            if cache is None:
+                return write_ksem_config_files(root_dir, self.iter_ksem_configs())
+            files = (
+                (
+                    Path(product, group, f"{name}.json"),
+                    partial(
+                        self._write_cached_ksem_config,
+                        cache,
+                        product,
+                        group,
+                        name,
+                        instrument,
+                    ),
+                )
+                for product, group, name, instrument in self.iter_instruments()
+            )
+            return _write_files(root_dir, files)
 
-    def to_ksem_configs(self) -> list[KsemConfigFile]:
+    def _write_cached_ksem_config(
+        self,
+        cache: RenderCache,
+        product_name: str,
+        group_name: str,
+        name: str,
+        instrument: Instrument,
+        file: Path,
+    ) -> tuple[int, bool | None]:
         """
-        Converts the Root configuration to a list of KsemConfigFile instances.
+        Copies an instrument's KSEM config to `file` from `cache`, or renders it into
+        both if it isn't cached yet. Returns its size and whether it was cached.
         """
-        out: list[KsemConfigFile] = []
+        settings = instrument.get_merged_settings()
+        keyswitches_dump = instrument.keyswitches.model_dump(mode="json")
+        settings_dump = settings.model_dump(mode="json")
+        counters.count("dump.Keyswitches")
+        counters.count("dump.Settings")
+        key = _render_key(
+            keyswitches_dump,
+            settings_dump,
+            _format_comment(settings, product_name, group_name, name),
+        )
+        if cache.restore(key, file):
+            return _written_size(file), True
+
+        config = self._make_ksem_config(
+            product_name=product_name,
+            group_name=group_name,
+            instrument_name=name,
+            instrument=instrument,
+            settings=settings,
+        )
+        text = json.dumps(config.data, indent=2)
+        counters.count("json.bytes_encoded", len(text))
+        cache.store(key, file, text)
+        return _written_size(file), False
 
+    def iter_instruments(self) -> Iterator[tuple[str, str, str, Instrument]]:
+        """
+        Yields every instrument along with the names of its product and group.
+        """
         for product_name, product in self.products.items():
             for group_name, group in product.instrument_groups.items():
                 for instrument_name, instrument in group.instruments.items():
-                    out.append(
-                        self._make_ksem_config(
-                            product_name=product_name,
-                            group_name=group_name,
-                            instrument_name=instrument_name,
-                            instrument=instrument,
-                        )
-                    )
-        return out
+                    yield product_name, group_name, instrument_name, instrument
+
+    def iter_ksem_configs(self) -> Iterator[KsemConfigFile]:
+        """
+        Converts the Root configuration to KsemConfigFile instances, rendering each one
+        only when it's asked for.
+        """
+        for product_name, group_name, name, instrument in self.iter_instruments():
+            yield self._make_ksem_config(
+                product_name=product_name,
+                group_name=group_name,
+                instrument_name=name,
+                instrument=instrument,
+            )
+
+    def to_ksem_configs(self) -> list[KsemConfigFile]:
+        """
+        Converts the Root configuration to a list of KsemConfigFile instances.
+        """
+        return list(self.iter_ksem_configs())
+
+
+def _set_flow_style(obj: Any) -> None:
+    if hasattr(obj, "fa"):
+        obj.fa.set_flow_style()
+
+
+def _compact_settings(settings: Any) -> None:
+    for key in ("midi_controls", "custom_bank"):
+        for field in settings.get(key, {}).values():
+            _set_flow_style(field)
+
+
+def _compact_product(
+    product: Any, compact_settings: bool, compact_keyswitch_values: bool
+) -> None:
+    """
+    Applies flow style to the compact fields of a product's round-trip YAML data.
+    """
+    containers = [product]
+    for group in product["instrument_groups"].values():
+        containers.append(group)
+        containers.extend(group["instruments"].values())
+
+    for container in containers:
+        if compact_settings and container.get("settings") is not None:
+            _compact_settings(container["settings"])
+        if compact_keyswitch_values and "keyswitches" in container:
+            # Set flow style for concise keyswitch fields
+            keyswitches = container["keyswitches"]
+            keyswitches["mapping"].fa.set_flow_style()
+            for value in keyswitches["values"]:
+                _set_flow_style(value)
+
+
+def _format_comment(
+    settings: Settings, product_name: str, group_name: str, instrument_name: str
+) -> str:
+    if not settings.comment_template:
+        return ""
+    return settings.comment_template.format(
+        product=product_name, instrument_group=group_name, instrument=instrument_name
+    )
+
+
+def _render_key(
+    keyswitches_dump: dict[str, Any], settings_dump: dict[str, Any], comment: str
+) -> str:
+    """
+    Hashes everything an instrument's KSEM config is rendered from: its keyswitches
+    and merged settings (dumped as JSON), and its comment. The names of the
+    instrument and its ancestors only matter through its comment, so identical
+    instruments in different places share a key.
+    """
+    return hashlib.sha256(
+        json.dumps(
+            [TOOL_VERSION, KSEM_VERSION, keyswitches_dump, settings_dump, comment]
+        ).encode()
+    ).hexdigest()
+
+
+def _product_to_yaml(
+    product_name: str,
+    product_dump: dict[str, Any],
+    compact_settings: bool,
+    compact_keyswitch_values: bool,
+) -> str:
+    """
+    Renders a single product as the YAML it's written as under `products:`.
+    """
+    product = to_commented(product_dump)
+    _compact_product(product, compact_settings, compact_keyswitch_values)
+    # Dumping the product under its real parent key gives the same indentation and
+    # line wrapping as dumping the whole library, then the parent key is dropped
+    fragment = yaml_dumps(
+        CommentedMap({"products": CommentedMap({product_name: product})})
+    )
+    return fragment.removeprefix("products:\n")
+
+
+def write_ksem_config_files(root_dir: Path, configs: Iterable[KsemConfigFile]) -> int:
+    """
+    Writes KSEM configuration files to the specified root directory, consuming
+    `configs` one file at a time. Returns the number of files written.
+
+    Each file is replaced atomically, so several builds can write into the same
+    directory at once: every file ends up whole, from whichever build wrote it last.
+    """
+    return _write_files(
+        root_dir,
+        ((config.file, partial(_write_ksem_config, config)) for config in configs),
+    )
+
+
+def _write_ksem_config(config: KsemConfigFile, file: Path) -> tuple[int, bool | None]:
+    text = json.dumps(config.data, indent=2)
+    counters.count("json.bytes_encoded", len(text))
+    atomic_write_text(file, text)
+    return _written_size(file), None
+
+
+def _written_size(file: Path) -> int:
+    """
+    The size of a file that was just written, for reporting. Read back from the
+    file, since text mode may have changed the line endings. Skipped (and reported
+    as 0) when nothing is observing.
+    """
+    return file.stat().st_size if instrumentation.is_observed() else 0
+
+
+def _write_files(
+    root_dir: Path,
+    files: Iterable[tuple[Path, Callable[[Path], tuple[int, bool | None]]]],
+) -> int:
+    """
+    Writes files under `root_dir`, each given as its path relative to `root_dir` and
+    a function that writes it there (returning its size, and whether it came from
+    the render cache). Directories are created as they're needed, and each file is
+    reported to `instrumentation`. Returns the number of files written.
+    """
+    created_dirs: set[Path] = set()
+    files_written = 0
+    # Rendering may happen as `files` is iterated, so each file is timed from when
+    # the previous one was written
+    start = time.perf_counter()
+    for relative_file, write in files:
+        file = root_dir / relative_file
+        if file.parent not in created_dirs:
+            file.parent.mkdir(parents=True, exist_ok=True)
+            created_dirs.add(file.parent)
+        size, cached = write(file)
+        files_written += 1
+        end = time.perf_counter()
+        instrumentation.item_done(
+            relative_file.with_suffix("").parts, end - start, size, cached
+        )
+        start = end
+    return files_written
 
 
 if __name__ == "__main__":
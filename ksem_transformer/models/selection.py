@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import heapq
+from collections.abc import Callable, Iterable, Mapping
+from fnmatch import fnmatchcase
+from typing import Any, cast
+
+import attrs
+
+type InstrumentPath = tuple[str, str, str]
+
+
+@attrs.define(frozen=True)
+class InstrumentFilter:
+    """
+    Selects instruments with `Product/Group/Instrument`-style glob patterns. Patterns
+    with fewer parts select everything below them, so `Product` selects a whole
+    product and `Product/Group` selects a whole group.
+    """
+
+    patterns: tuple[tuple[str, ...], ...]
+
+    @classmethod
+    def from_patterns(cls, patterns: Iterable[str]) -> InstrumentFilter:
+        return InstrumentFilter(
+            tuple(tuple(pattern.split("/", maxsplit=2)) for pattern in patterns)
+        )
+
+    def matches(self, path: InstrumentPath) -> bool:
+        return any(
+            all(fnmatchcase(name, part) for name, part in zip(path, pattern))
+            for pattern in self.patterns
+        )
+
+
+@attrs.define(frozen=True)
+class Shard:
+    """
+    One of `count` slices of a library's instruments, numbered from 1, for splitting
+    a build across machines.
+
+    Instruments are spread over the shards by their estimated cost, longest first,
+    each going to the shard with the least work so far. Ties are broken by path, so
+    every machine works out the same slices from the same library, and together the
+    shards cover every instrument exactly once.
+    """
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, spec: str) -> Shard:
+        """
+        Parses an `INDEX/COUNT` spec, like `2/4` for the second of four shards.
+        """
+        index, sep, count = spec.partition("/")
+        if not sep or not index.isdigit() or not count.isdigit():
+            raise ValueError(f"Shard {spec!r} should look like INDEX/COUNT, e.g. 2/4")
+        shard = Shard(int(index), int(count))
+        if not 1 <= shard.index <= shard.count:
+            raise ValueError(
+                f"Shard index {shard.index} should be between 1 and {shard.count}"
+            )
+        return shard
+
+    def select(self, costs: Mapping[InstrumentPath, int]) -> set[InstrumentPath]:
+        """
+        Picks this shard's instruments, given the estimated cost of every instrument.
+        """
+        loads = [(0, i) for i in range(1, self.count + 1)]
+        selected: set[InstrumentPath] = set()
+        for path, cost in sorted(costs.items(), key=lambda item: (-item[1], item[0])):
+            load, index = heapq.heappop(loads)
+            if index == self.index:
+                selected.add(path)
+            heapq.heappush(loads, (load + cost, index))
+        return selected
+
+
+def instrument_cost(data: object) -> int:
+    """
+    Estimates how much work an instrument (before validation) is to build, going by
+    its number of keyswitches.
+    """
+    if not isinstance(data, Mapping):
+        return 1
+    keyswitches = cast(Mapping[str, Any], data).get("keyswitches")
+    if not isinstance(keyswitches, Mapping):
+        return 1
+    values = cast(Mapping[str, Any], keyswitches).get("values")
+    return 1 + (len(cast(list[Any], values)) if isinstance(values, list) else 0)
+
+
+def instrument_costs(data: Any) -> dict[InstrumentPath, int]:
+    """
+    Estimates the cost of every instrument in a library that hasn't been validated
+    yet.
+    """
+    return {
+        (product_name, group_name, instrument_name): instrument_cost(instrument)
+        for product_name, product in cast(Mapping[str, Any], data["products"]).items()
+        for group_name, group in cast(
+            Mapping[str, Any], product["instrument_groups"]
+        ).items()
+        for instrument_name, instrument in cast(
+            Mapping[str, Any], group["instruments"]
+        ).items()
+    }
+
+
+def filter_library(data: Any, keep: Callable[[InstrumentPath], bool]) -> dict[str, Any]:
+    """
+    Returns a copy of a library that hasn't been validated yet, with only the
+    instruments `keep` returns `True` for (along with the settings of their
+    ancestors). The rest of the library is never looked at beyond its keys, so it
+    isn't validated either.
+    """
+    products: dict[str, Any] = {}
+    for product_name, product in cast(Mapping[str, Any], data["products"]).items():
+        groups: dict[str, Any] = {}
+        for group_name, group in cast(
+            Mapping[str, Any], product["instrument_groups"]
+        ).items():
+            instruments = {
+                instrument_name: instrument
+                for instrument_name, instrument in cast(
+                    Mapping[str, Any], group["instruments"]
+                ).items()
+                if keep((product_name, group_name, instrument_name))
+            }
+            if instruments:
+                groups[group_name] = {**group, "instruments": instruments}
+        if groups:
+            products[product_name] = {**product, "instrument_groups": groups}
+
+    return {**data, "products": products}
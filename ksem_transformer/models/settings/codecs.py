@@ -0,0 +1,117 @@
+"""
+Declarative conversion between settings fields and the values KSEM stores them as.
+
+Each settings model declares a `KsemFields` table mapping its fields to the keys of
+its KSEM config section, along with the codec for each one. Lookup tables (like the
+value <-> index tables for enum-like `Literal` fields) are built once, when the table
+is declared, so converting a model is just a dict lookup per field.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from typing import Any, Protocol, TypeAliasType, get_args
+
+import attrs
+
+
+class Codec[T](Protocol):
+    def decode(self, raw: Any) -> T: ...
+
+    def encode(self, value: T) -> Any: ...
+
+
+@attrs.define(frozen=True)
+class EnumCodec[T]:
+    """
+    Converts the values of a `Literal` type to and from their position in it, which
+    is how KSEM stores them.
+    """
+
+    options: tuple[T, ...]
+    indexes: dict[T, int]
+    as_float: bool = False
+
+    @classmethod
+    def from_literal(
+        cls, literal: TypeAliasType, as_float: bool = False
+    ) -> EnumCodec[Any]:
+        return EnumCodec.from_options(get_args(literal.__value__), as_float)
+
+    @classmethod
+    def from_options[U](
+        cls, options: Sequence[U], as_float: bool = False
+    ) -> EnumCodec[U]:
+        return EnumCodec(
+            tuple(options), {v: i for i, v in enumerate(options)}, as_float
+        )
+
+    def decode(self, raw: Any) -> T:
+        return self.options[int(raw)]
+
+    def encode(self, value: T) -> int | float:
+        index = self.indexes[value]
+        return float(index) if self.as_float else index
+
+
+@attrs.define(frozen=True)
+class BoolCodec:
+    """
+    Converts a bool to and from the 0/1 KSEM stores it as. If `inverted`, KSEM's
+    setting means the opposite of ours.
+    """
+
+    inverted: bool = False
+    as_float: bool = False
+
+    def decode(self, raw: Any) -> bool:
+        return bool(raw) != self.inverted
+
+    def encode(self, value: bool) -> int | float:
+        raw = int(value != self.inverted)
+        return float(raw) if self.as_float else raw
+
+
+@attrs.define(frozen=True)
+class PassthroughCodec:
+    """
+    For values KSEM stores as they are.
+    """
+
+    def decode(self, raw: Any) -> Any:
+        return raw
+
+    def encode(self, value: Any) -> Any:
+        return value
+
+
+@attrs.define(frozen=True)
+class KsemFields:
+    """
+    Maps the fields of a settings model to the keys of its KSEM config section, each
+    with the codec that converts it. `constants` are written to KSEM as they are and
+    ignored when reading it.
+    """
+
+    fields: dict[str, tuple[str, Codec[Any]]]
+    constants: dict[str, Any] = attrs.field(factory=dict)
+
+    def decode(self, section: Mapping[str, Any]) -> dict[str, Any]:
+        """
+        Reads the fields' values from a KSEM config section.
+        """
+        return {
+            field: codec.decode(section[ksem_key])
+            for field, (ksem_key, codec) in self.fields.items()
+        }
+
+    def encode(self, model: object) -> dict[str, Any]:
+        """
+        Writes a model's fields as a KSEM config section.
+        """
+        section = {
+            ksem_key: codec.encode(getattr(model, field))
+            for field, (ksem_key, codec) in self.fields.items()
+        }
+        section.update(self.constants)
+        return section
@@ -1,16 +1,44 @@
 from __future__ import annotations
 
-from typing import Literal, get_args
+from typing import Any, Literal, cast
 
-from pydantic import BaseModel
+import attrs
+from pydantic import ConfigDict
 
 from ksem_transformer.models.ksem_json_types import KsemConfig, KsemPad
+from ksem_transformer.models.settings.codecs import BoolCodec, EnumCodec, KsemFields
+from ksem_transformer.utils.counters import CountedModel
 
 type FontSize = Literal[1, 2, 3, 4]
 type Justification = Literal["left", "center"]
 
 
-class ControlPad(BaseModel):
+@attrs.define(frozen=True)
+class _FontSizeCodec:
+    options: EnumCodec[FontSize] = EnumCodec.from_literal(FontSize)
+
+    # This one is weird. The font size comes from the third element in the list
+    def decode(self, raw: Any) -> FontSize:
+        return self.options.decode(raw[2])
+
+    def encode(self, value: FontSize) -> list[int | float]:
+        return [0, 0, self.options.encode(value)]
+
+
+_ksem_fields = KsemFields(
+    {
+        "font_size": ("fontSize", _FontSizeCodec()),
+        "justification": ("justification", EnumCodec.from_literal(Justification)),
+        "show_ks_number": ("showKSNumbers", BoolCodec()),
+        "show_ks_note": ("showKSNotes", BoolCodec()),
+    },
+    constants={"fontSizeButton": 0},  # I think this setting does nothing
+)
+
+
+class ControlPad(CountedModel):
+    model_config = ConfigDict(frozen=True)
+
     font_size: FontSize = 2
     justification: Justification = "center"
     show_ks_number: bool = True
@@ -18,22 +46,7 @@ class ControlPad(BaseModel):
 
     @classmethod
     def from_ksem_config(cls, config: KsemConfig) -> ControlPad:
-        cfg = config["pad"]
-        return ControlPad(
-            # This one is weird. The font size comes from the third element in the list
-            font_size=get_args(FontSize.__value__)[cfg["fontSize"][2]],
-            justification=get_args(Justification.__value__)[cfg["justification"]],
-            show_ks_number=bool(cfg["showKSNumbers"]),
-            show_ks_note=bool(cfg["showKSNotes"]),
-        )
+        return ControlPad(**_ksem_fields.decode(config["pad"]))
 
     def to_ksem_config(self) -> KsemPad:
-        return {
-            "fontSize": [0, 0, get_args(FontSize.__value__).index(self.font_size)],
-            "justification": get_args(Justification.__value__).index(
-                self.justification
-            ),
-            "showKSNumbers": int(self.show_ks_number),
-            "showKSNotes": int(self.show_ks_note),
-            "fontSizeButton": 0,  # I think this setting does nothing
-        }
+        return cast(KsemPad, _ksem_fields.encode(self))
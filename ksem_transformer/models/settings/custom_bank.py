@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from typing import Literal, cast
+from typing import Any, Literal, TypedDict, cast
 
 from bidict import bidict
-from pydantic import BaseModel, Field
+from pydantic import ConfigDict, TypeAdapter, model_serializer, model_validator
 
 from ksem_transformer.models.ksem_json_types import KsemConfig, KsemCustomBank
+from ksem_transformer.utils.counters import CountedModel
 
 # Mapping of internal MIDI control names to custom bank selection indices
 midi_control_to_ksem_custom_bank_selection = bidict(
@@ -66,7 +67,19 @@ type MidiControlTarget = Literal[
 ]
 
 
-class CustomBankKnob(BaseModel):
+KNOB_COUNT = 8
+knob_names = tuple(f"knob_{i:02d}" for i in range(1, KNOB_COUNT + 1))
+
+# KSEM keys for each knob, built once rather than on every render
+_menu_keys = tuple(f"ctrl{i}_menu" for i in range(1, KNOB_COUNT + 1))
+_label_keys = tuple(f"ctrl{i}" for i in range(1, KNOB_COUNT + 1))
+
+# KSEM writes "-" for knobs without a target. They're packed as 0, which isn't a
+# selection index.
+_NO_TARGET = "-"
+
+
+class CustomBankKnob(CountedModel):
     """
     Represents a knob in a custom bank with a name and control target.
     """
@@ -75,59 +88,121 @@ class CustomBankKnob(BaseModel):
     control_target: MidiControlTarget | None = None
 
 
-class CustomBank(BaseModel):
+class _CustomBankKnobData(TypedDict, total=False):
+    name: str
+    control_target: MidiControlTarget | None
+
+
+class _CustomBankData(TypedDict, total=False):
+    custom_bank_visible: bool
+    knob_01: _CustomBankKnobData
+    knob_02: _CustomBankKnobData
+    knob_03: _CustomBankKnobData
+    knob_04: _CustomBankKnobData
+    knob_05: _CustomBankKnobData
+    knob_06: _CustomBankKnobData
+    knob_07: _CustomBankKnobData
+    knob_08: _CustomBankKnobData
+
+
+_custom_bank_data_adapter = TypeAdapter(_CustomBankData)
+
+
+def _target_to_selection(target: MidiControlTarget | None) -> int:
+    return 0 if target is None else midi_control_to_ksem_custom_bank_selection[target]
+
+
+def _selection_to_target(selection: int) -> MidiControlTarget | None:
+    if selection == 0:
+        return None
+    return cast(
+        MidiControlTarget, midi_control_to_ksem_custom_bank_selection.inv[selection]
+    )
+
+
+def _read_selection(cfg: dict[str, Any], key: str) -> int:
+    # Custom banks are built without validation, so the selections are checked here
+    # rather than failing once they're decoded
+    raw = cfg[key]
+    if raw == _NO_TARGET:
+        return 0
+    if (
+        isinstance(raw, bool)
+        or raw not in midi_control_to_ksem_custom_bank_selection.inv
+    ):
+        raise ValueError(
+            f"`customBank.{key}` is {raw!r}, which isn't a custom bank target (1 to "
+            f"{len(midi_control_to_ksem_custom_bank_selection)}, or `{_NO_TARGET}`)"
+        )
+    return int(raw)
+
+
+class CustomBank(CountedModel):
     """
     Represents a custom bank configuration with visibility and multiple knobs.
+
+    The knobs are packed into fixed-size arrays rather than held as a model each,
+    but they're read from and written to YAML as `knob_01` to `knob_08`.
     """
 
+    model_config = ConfigDict(frozen=True)
+
     custom_bank_visible: bool = True
-    knob_01: CustomBankKnob = Field(default_factory=CustomBankKnob)
-    knob_02: CustomBankKnob = Field(default_factory=CustomBankKnob)
-    knob_03: CustomBankKnob = Field(default_factory=CustomBankKnob)
-    knob_04: CustomBankKnob = Field(default_factory=CustomBankKnob)
-    knob_05: CustomBankKnob = Field(default_factory=CustomBankKnob)
-    knob_06: CustomBankKnob = Field(default_factory=CustomBankKnob)
-    knob_07: CustomBankKnob = Field(default_factory=CustomBankKnob)
-    knob_08: CustomBankKnob = Field(default_factory=CustomBankKnob)
+    names: tuple[str, ...] = ("",) * KNOB_COUNT
+    # KSEM custom bank selection index of each knob's target, or 0 for none
+    selections: tuple[int, ...] = (0,) * KNOB_COUNT
+
+    @model_validator(mode="before")
+    @classmethod
+    def _pack(cls, data: Any) -> Any:
+        if isinstance(data, CustomBank):
+            return data
+        bank = cast(dict[str, Any], _custom_bank_data_adapter.validate_python(data))
+        knobs = [cast(_CustomBankKnobData, bank.get(name, {})) for name in knob_names]
+        return {
+            "custom_bank_visible": bank.get("custom_bank_visible", True),
+            "names": tuple(knob.get("name", "") for knob in knobs),
+            "selections": tuple(
+                _target_to_selection(knob.get("control_target")) for knob in knobs
+            ),
+        }
+
+    @model_serializer(mode="plain")
+    def _unpack(self) -> dict[str, Any]:
+        out: dict[str, Any] = {"custom_bank_visible": self.custom_bank_visible}
+        for name, knob_name, selection in zip(knob_names, self.names, self.selections):
+            out[name] = {
+                "name": knob_name,
+                "control_target": _selection_to_target(selection),
+            }
+        return out
+
+    def knob(self, number: int) -> CustomBankKnob:
+        """
+        Gets a single knob, numbered from 1 like in KSEM.
+        """
+        return CustomBankKnob(
+            name=self.names[number - 1],
+            control_target=_selection_to_target(self.selections[number - 1]),
+        )
 
     @classmethod
     def from_ksem_config(cls, config: KsemConfig) -> CustomBank:
-        cfg = config["customBank"]
-        return CustomBank(
+        cfg = cast(dict[str, Any], config["customBank"])
+        return CustomBank.model_construct(
             custom_bank_visible=bool(cfg["showHideCustomBank"]),
-            **{
-                f"knob_{i:02d}": CustomBankKnob(
-                    name=cast(str, cfg["label"][f"ctrl{1}"]),
-                    control_target=cast(
-                        MidiControlTarget,
-                        midi_control_to_ksem_custom_bank_selection.inv[
-                            cfg[f"ctrl{i}_menu"]
-                        ],
-                    ),
-                )
-                for i in range(1, 9)
-            },
+            names=tuple(cast(str, cfg["label"][key]) for key in _label_keys),
+            selections=tuple(_read_selection(cfg, key) for key in _menu_keys),
         )
 
     def to_ksem_config(self) -> KsemCustomBank:
         """
         Converts the CustomBank instance to a KsemCustomBank configuration.
         """
-        out = cast(
-            KsemCustomBank,
-            {"showHideCustomBank": int(self.custom_bank_visible), "label": {}},
-        )
-        for field_name in self.model_fields:
-            if not field_name.startswith("knob"):
-                continue
-
-            field = getattr(self, field_name)
-            number = int(field_name.split("_")[1])
-            out[f"ctrl{number}_menu"] = (
-                midi_control_to_ksem_custom_bank_selection[field.control_target]
-                if field.control_target is not None
-                else "-"
-            )
-            out["label"][f"ctrl{number}"] = field.name
-
-        return out
+        out: dict[str, Any] = {
+            "showHideCustomBank": int(self.custom_bank_visible),
+            "label": dict(zip(_label_keys, self.names)),
+        }
+        for key, selection in zip(_menu_keys, self.selections):
+            out[key] = selection or _NO_TARGET
+        return cast(KsemCustomBank, out)
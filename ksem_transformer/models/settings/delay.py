@@ -1,16 +1,51 @@
 from __future__ import annotations
 
-from typing import Literal, get_args
+from typing import Literal, cast
 
-from pydantic import BaseModel
+from pydantic import ConfigDict
 
 from ksem_transformer.models.ksem_json_types import KsemConfig, KsemDelaySettings
+from ksem_transformer.models.settings.codecs import (
+    BoolCodec,
+    EnumCodec,
+    KsemFields,
+    PassthroughCodec,
+)
+from ksem_transformer.utils.counters import CountedModel
 
 type BufferSize = Literal[64, 128, 256, 512, 1024, 2048]
 type DelayMode = Literal["compensation", "track_delay"]
 
+_ksem_fields = KsemFields(
+    {
+        "using_rack": ("usageRack", BoolCodec(as_float=True)),
+        "chain_selector_filters_midi_control": (
+            "filterMIDICtrl",
+            BoolCodec(as_float=True),
+        ),
+        "buffer_size": (
+            "bufferSize",
+            EnumCodec.from_literal(BufferSize, as_float=True),
+        ),
+        "delay_mode": (
+            "delayCompensation",
+            EnumCodec.from_literal(DelayMode, as_float=True),
+        ),
+        "lock_midi_control_order": ("lock", BoolCodec(as_float=True)),
+        "delay_bank": ("delayBank", PassthroughCodec()),
+        "delay_sub": ("delaySub", PassthroughCodec()),
+        "delay_program": ("delayPgm", PassthroughCodec()),
+        "delay_cc": ("delayCC", PassthroughCodec()),
+        "delay_main_key": ("delayMainKey", PassthroughCodec()),
+        "delay_second_key": ("delayAdditionalKey", PassthroughCodec()),
+        "delay_passed_thru_midi_note": ("delayMIDINote", PassthroughCodec()),
+    }
+)
+
+
+class Delay(CountedModel):
+    model_config = ConfigDict(frozen=True)
 
-class Delay(BaseModel):
     using_rack: bool = False
     chain_selector_filters_midi_control: bool = False
     buffer_size: BufferSize = 512
@@ -29,36 +64,7 @@ class Delay(BaseModel):
 
     @classmethod
     def from_ksem_config(cls, config: KsemConfig) -> Delay:
-        cfg = config["delaySettings"]
-        return Delay(
-            using_rack=bool(cfg["usageRack"]),
-            chain_selector_filters_midi_control=bool(cfg["filterMIDICtrl"]),
-            buffer_size=get_args(BufferSize.__value__)[int(cfg["bufferSize"])],
-            delay_mode=get_args(DelayMode.__value__)[int(cfg["delayCompensation"])],
-            lock_midi_control_order=bool(cfg["lock"]),
-            delay_bank=cfg["delayBank"],
-            delay_sub=cfg["delaySub"],
-            delay_program=cfg["delayPgm"],
-            delay_cc=cfg["delayCC"],
-            delay_main_key=cfg["delayMainKey"],
-            delay_second_key=cfg["delayAdditionalKey"],
-            delay_passed_thru_midi_note=cfg["delayMIDINote"],
-        )
+        return Delay(**_ksem_fields.decode(config["delaySettings"]))
 
     def to_ksem_config(self) -> KsemDelaySettings:
-        return {
-            "usageRack": float(self.using_rack),
-            "filterMIDICtrl": float(self.chain_selector_filters_midi_control),
-            "bufferSize": float(get_args(BufferSize.__value__).index(self.buffer_size)),
-            "delayCompensation": float(
-                get_args(DelayMode.__value__).index(self.delay_mode)
-            ),
-            "lock": float(self.lock_midi_control_order),
-            "delayBank": self.delay_bank,
-            "delaySub": self.delay_sub,
-            "delayPgm": self.delay_program,
-            "delayCC": self.delay_cc,
-            "delayMainKey": self.delay_main_key,
-            "delayAdditionalKey": self.delay_second_key,
-            "delayMIDINote": self.delay_passed_thru_midi_note,
-        }
+        return cast(KsemDelaySettings, _ksem_fields.encode(self))
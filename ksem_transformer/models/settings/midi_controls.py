@@ -1,11 +1,19 @@
 from __future__ import annotations
 
 import typing
-from typing import Literal, cast
+from typing import Any, Literal, TypedDict, cast
 
-from pydantic import BaseModel, Field
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    TypeAdapter,
+    model_serializer,
+    model_validator,
+)
 
 from ksem_transformer.models.ksem_json_types import KsemConfig, KsemMidiControls
+from ksem_transformer.models.settings.codecs import EnumCodec
+from ksem_transformer.utils.counters import CountedModel
 
 # Mapping of internal MIDI control names to KSEM control names
 midi_control_to_ksem = {
@@ -145,8 +153,24 @@ type CustomOptions = Literal[
 
 custom_options = [None, *typing.get_args(CustomOptions.__value__)]
 
+# Every control, in the order they're packed in `MidiControls`. The custom controls
+# (which also have a MIDI CC) come last.
+midi_control_names: tuple[str, ...] = tuple(midi_control_to_ksem)
+CUSTOM_CONTROL_COUNT = 8
+_first_custom = len(midi_control_names) - CUSTOM_CONTROL_COUNT
 
-class MidiControl(BaseModel):
+# KSEM keys for each control, built once rather than on every render
+_button_keys = tuple(f"{ksem}_button" for ksem in midi_control_to_ksem.values())
+_dial_keys = tuple(f"{ksem}_dial" for ksem in midi_control_to_ksem.values())
+_num_keys = tuple(
+    f"{ksem}_num" for ksem in list(midi_control_to_ksem.values())[_first_custom:]
+)
+
+# KSEM stores MIDI CCs as their index in `custom_options`
+_midi_cc_codec = EnumCodec.from_options(custom_options)
+
+
+class MidiControl(CountedModel):
     """
     Represents a MIDI control with its enabled state, value, and optional MIDI CC number.
     """
@@ -159,151 +183,146 @@ class CustomMidiControl(MidiControl, BaseModel):
     midi_cc: CustomOptions | None = None
 
 
-class MidiControls(BaseModel):
+class _MidiControlData(TypedDict, total=False):
+    enabled: bool
+    value: int
+    midi_cc: CustomOptions | None
+
+
+# Controls as they're written in YAML, one field per name in `midi_control_names`
+class _MidiControlsData(TypedDict, total=False):
+    m01_modulation: _MidiControlData
+    m02_breath: _MidiControlData
+    m04_foot_pedal: _MidiControlData
+    m05_portamento_time: _MidiControlData
+    m07_volume: _MidiControlData
+    m10_pan: _MidiControlData
+    m11_expression: _MidiControlData
+    m64_hold_pedal: _MidiControlData
+    m65_portamento_on_off: _MidiControlData
+    m66_sostenuto_pedal: _MidiControlData
+    m67_soft_pedal: _MidiControlData
+    m68_legato_pedal: _MidiControlData
+    m71_resonance: _MidiControlData
+    m74_frequency_cutoff: _MidiControlData
+    m91_reverb_level: _MidiControlData
+    m93_chorus_level: _MidiControlData
+    custom_01: _MidiControlData
+    custom_02: _MidiControlData
+    custom_03: _MidiControlData
+    custom_04: _MidiControlData
+    custom_05: _MidiControlData
+    custom_06: _MidiControlData
+    custom_07: _MidiControlData
+    custom_08: _MidiControlData
+
+
+# Validates controls as they're written in YAML. Unknown controls are ignored.
+_midi_controls_data_adapter = TypeAdapter(_MidiControlsData)
+
+
+class MidiControls(CountedModel):
     """
     Represents a collection of MIDI controls.
+
+    The controls are packed into fixed-size arrays (indexed like
+    `midi_control_names`) rather than held as a model each, but they're read from
+    and written to YAML as a mapping of control names to their settings.
     """
 
-    m01_modulation: MidiControl = Field(default_factory=MidiControl)
-    m02_breath: MidiControl = Field(default_factory=MidiControl)
-    m04_foot_pedal: MidiControl = Field(default_factory=MidiControl)
-    m05_portamento_time: MidiControl = Field(default_factory=MidiControl)
-    m07_volume: MidiControl = Field(default_factory=MidiControl)
-    m10_pan: MidiControl = Field(default_factory=MidiControl)
-    m11_expression: MidiControl = Field(default_factory=MidiControl)
-    m64_hold_pedal: MidiControl = Field(default_factory=MidiControl)
-    m65_portamento_on_off: MidiControl = Field(default_factory=MidiControl)
-    m66_sostenuto_pedal: MidiControl = Field(default_factory=MidiControl)
-    m67_soft_pedal: MidiControl = Field(default_factory=MidiControl)
-    m68_legato_pedal: MidiControl = Field(default_factory=MidiControl)
-    m71_resonance: MidiControl = Field(default_factory=MidiControl)
-    m74_frequency_cutoff: MidiControl = Field(default_factory=MidiControl)
-    m91_reverb_level: MidiControl = Field(default_factory=MidiControl)
-    m93_chorus_level: MidiControl = Field(default_factory=MidiControl)
+    model_config = ConfigDict(frozen=True)
+
+    # Bit `i` is set if control `i` is enabled
+    enabled_bits: int = 0
+    values: tuple[int, ...] = (0,) * len(midi_control_names)
+    # Index in `custom_options` of each custom control's MIDI CC
+    midi_cc_indexes: tuple[int, ...] = (0,) * CUSTOM_CONTROL_COUNT
 
-    custom_01: CustomMidiControl = Field(default_factory=CustomMidiControl)
-    custom_02: CustomMidiControl = Field(default_factory=CustomMidiControl)
-    custom_03: CustomMidiControl = Field(default_factory=CustomMidiControl)
-    custom_04: CustomMidiControl = Field(default_factory=CustomMidiControl)
-    custom_05: CustomMidiControl = Field(default_factory=CustomMidiControl)
-    custom_06: CustomMidiControl = Field(default_factory=CustomMidiControl)
-    custom_07: CustomMidiControl = Field(default_factory=CustomMidiControl)
-    custom_08: CustomMidiControl = Field(default_factory=CustomMidiControl)
+    @model_validator(mode="before")
+    @classmethod
+    def _pack(cls, data: Any) -> Any:
+        if isinstance(data, MidiControls):
+            return data
+        controls = cast(
+            dict[str, _MidiControlData],
+            _midi_controls_data_adapter.validate_python(data),
+        )
+        enabled_bits = 0
+        values = [0] * len(midi_control_names)
+        midi_cc_indexes = [0] * CUSTOM_CONTROL_COUNT
+        for i, name in enumerate(midi_control_names):
+            if (control := controls.get(name)) is None:
+                continue
+            if control.get("enabled", False):
+                enabled_bits |= 1 << i
+            values[i] = control.get("value", 0)
+            if i >= _first_custom:
+                midi_cc_indexes[i - _first_custom] = int(
+                    _midi_cc_codec.encode(control.get("midi_cc"))
+                )
+        return {
+            "enabled_bits": enabled_bits,
+            "values": tuple(values),
+            "midi_cc_indexes": tuple(midi_cc_indexes),
+        }
+
+    @model_serializer(mode="plain")
+    def _unpack(self) -> dict[str, dict[str, Any]]:
+        out: dict[str, dict[str, Any]] = {}
+        for i, name in enumerate(midi_control_names):
+            control: dict[str, Any] = {
+                "enabled": bool(self.enabled_bits >> i & 1),
+                "value": self.values[i],
+            }
+            if i >= _first_custom:
+                control["midi_cc"] = _midi_cc_codec.decode(
+                    self.midi_cc_indexes[i - _first_custom]
+                )
+            out[name] = control
+        return out
+
+    def control(self, name: str) -> MidiControl:
+        """
+        Gets the settings of a single control.
+        """
+        i = midi_control_names.index(name)
+        if i >= _first_custom:
+            return CustomMidiControl(
+                enabled=bool(self.enabled_bits >> i & 1),
+                value=self.values[i],
+                midi_cc=_midi_cc_codec.decode(self.midi_cc_indexes[i - _first_custom]),
+            )
+        return MidiControl(
+            enabled=bool(self.enabled_bits >> i & 1), value=self.values[i]
+        )
 
     @classmethod
     def from_ksem_config(cls, config: KsemConfig) -> MidiControls:
-        cfg = config["midiControls"]
-        return MidiControls(
-            m01_modulation=MidiControl(
-                enabled=bool(cfg["01Modulation_button"]), value=cfg["01Modulation_dial"]
-            ),
-            m02_breath=MidiControl(
-                enabled=bool(cfg["02Breath_button"]), value=cfg["02Breath_dial"]
-            ),
-            m04_foot_pedal=MidiControl(
-                enabled=bool(cfg["04FootPedal_button"]), value=cfg["04FootPedal_dial"]
-            ),
-            m05_portamento_time=MidiControl(
-                enabled=bool(cfg["05PortamentoTime_button"]),
-                value=cfg["05PortamentoTime_dial"],
-            ),
-            m07_volume=MidiControl(
-                enabled=bool(cfg["07Volume_button"]), value=cfg["07Volume_dial"]
-            ),
-            m10_pan=MidiControl(
-                enabled=bool(cfg["10Pan_button"]), value=cfg["10Pan_dial"]
-            ),
-            m11_expression=MidiControl(
-                enabled=bool(cfg["11Expression_button"]), value=cfg["11Expression_dial"]
-            ),
-            m64_hold_pedal=MidiControl(
-                enabled=bool(cfg["64HoldPedal_button"]), value=cfg["64HoldPedal_dial"]
-            ),
-            m65_portamento_on_off=MidiControl(
-                enabled=bool(cfg["65PortamentoOnOff_button"]),
-                value=cfg["65PortamentoOnOff_dial"],
-            ),
-            m66_sostenuto_pedal=MidiControl(
-                enabled=bool(cfg["66SostenutoPedal_button"]),
-                value=cfg["66SostenutoPedal_dial"],
-            ),
-            m67_soft_pedal=MidiControl(
-                enabled=bool(cfg["67SoftPedal_button"]), value=cfg["67SoftPedal_dial"]
-            ),
-            m68_legato_pedal=MidiControl(
-                enabled=bool(cfg["68LegatoPedal_button"]),
-                value=cfg["68LegatoPedal_dial"],
-            ),
-            m71_resonance=MidiControl(
-                enabled=bool(cfg["71Resonance_button"]), value=cfg["71Resonance_dial"]
-            ),
-            m74_frequency_cutoff=MidiControl(
-                enabled=bool(cfg["74FrequencyCutoff_button"]),
-                value=cfg["74FrequencyCutoff_dial"],
-            ),
-            m91_reverb_level=MidiControl(
-                enabled=bool(cfg["91ReverbLevel_button"]),
-                value=cfg["91ReverbLevel_dial"],
-            ),
-            m93_chorus_level=MidiControl(
-                enabled=bool(cfg["93ChorusLevel_button"]),
-                value=cfg["93ChorusLevel_dial"],
-            ),
-            custom_01=CustomMidiControl(
-                enabled=bool(cfg["CcCustom01_button"]),
-                value=cfg["CcCustom01_dial"],
-                midi_cc=cast(CustomOptions, cfg["CcCustom01_num"]),
-            ),
-            custom_02=CustomMidiControl(
-                enabled=bool(cfg["CcCustom02_button"]),
-                value=cfg["CcCustom02_dial"],
-                midi_cc=cast(CustomOptions, cfg["CcCustom02_num"]),
-            ),
-            custom_03=CustomMidiControl(
-                enabled=bool(cfg["CcCustom03_button"]),
-                value=cfg["CcCustom03_dial"],
-                midi_cc=cast(CustomOptions, cfg["CcCustom03_num"]),
-            ),
-            custom_04=CustomMidiControl(
-                enabled=bool(cfg["CcCustom04_button"]),
-                value=cfg["CcCustom04_dial"],
-                midi_cc=cast(CustomOptions, cfg["CcCustom04_num"]),
-            ),
-            custom_05=CustomMidiControl(
-                enabled=bool(cfg["CcCustom05_button"]),
-                value=cfg["CcCustom05_dial"],
-                midi_cc=cast(CustomOptions, cfg["CcCustom05_num"]),
-            ),
-            custom_06=CustomMidiControl(
-                enabled=bool(cfg["CcCustom06_button"]),
-                value=cfg["CcCustom06_dial"],
-                midi_cc=cast(CustomOptions, cfg["CcCustom06_num"]),
-            ),
-            custom_07=CustomMidiControl(
-                enabled=bool(cfg["CcCustom07_button"]),
-                value=cfg["CcCustom07_dial"],
-                midi_cc=cast(CustomOptions, cfg["CcCustom07_num"]),
-            ),
-            custom_08=CustomMidiControl(
-                enabled=bool(cfg["CcCustom08_button"]),
-                value=cfg["CcCustom08_dial"],
-                midi_cc=cast(CustomOptions, cfg["CcCustom08_num"]),
-            ),
+        cfg = cast(dict[str, int], config["midiControls"])
+        # Built without validation, so the MIDI CC indexes are checked here rather
+        # than failing once they're decoded
+        for key in _num_keys:
+            if cfg[key] not in range(len(custom_options)):
+                raise ValueError(
+                    f"`midiControls.{key}` is {cfg[key]!r}, which isn't a MIDI CC "
+                    f"option (0 to {len(custom_options) - 1})"
+                )
+        return MidiControls.model_construct(
+            enabled_bits=sum(1 << i for i, key in enumerate(_button_keys) if cfg[key]),
+            values=tuple(cfg[key] for key in _dial_keys),
+            midi_cc_indexes=tuple(int(cfg[key]) for key in _num_keys),
         )
 
     def to_ksem_config(self) -> KsemMidiControls:
         """
         Converts the MidiControls instance to a KsemMidiControls configuration.
         """
-        out = cast(KsemMidiControls, {})
-        for field_name in self.model_fields:
-            ksem_key = midi_control_to_ksem[field_name]
-            field = cast(MidiControl, getattr(self, field_name))
-
-            out[f"{ksem_key}_button"] = int(field.enabled)
-            out[f"{ksem_key}_dial"] = field.value
-            if isinstance(field, CustomMidiControl):
-                # Get the MIDI CC's option index (magic values in KSEM)
-                out[f"{ksem_key}_num"] = custom_options.index(field.midi_cc)
-
-        return out
+        out: dict[str, int] = {}
+        for i, (button_key, dial_key) in enumerate(zip(_button_keys, _dial_keys)):
+            out[button_key] = self.enabled_bits >> i & 1
+            out[dial_key] = self.values[i]
+            if i >= _first_custom:
+                out[_num_keys[i - _first_custom]] = self.midi_cc_indexes[
+                    i - _first_custom
+                ]
+        return cast(KsemMidiControls, out)
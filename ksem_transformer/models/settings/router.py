@@ -1,30 +1,34 @@
 from __future__ import annotations
 
-from typing import TypedDict
+from typing import TypedDict, cast
 
-from pydantic import BaseModel
+from pydantic import ConfigDict
 
 from ksem_transformer.models.ksem_json_types import KsemConfig
+from ksem_transformer.models.settings.codecs import BoolCodec, KsemFields
+from ksem_transformer.utils.counters import CountedModel
 
 PartialRouterConfig = TypedDict(
     "PartialRouterConfig", {"routerTrack": int, "routerFilter": int}
 )
 
+_ksem_fields = KsemFields(
+    {
+        "track_must_be_armed": ("routerTrack", BoolCodec()),
+        "router_exclusive": ("routerFilter", BoolCodec()),
+    }
+)
+
+
+class Router(CountedModel):
+    model_config = ConfigDict(frozen=True)
 
-class Router(BaseModel):
     track_must_be_armed: bool = True
     router_exclusive: bool = False
 
     @classmethod
     def from_ksem_config(cls, config: KsemConfig) -> Router:
-        cfg = config["keySwitchManager"]
-        return Router(
-            track_must_be_armed=bool(cfg["routerTrack"]),
-            router_exclusive=bool(cfg["routerFilter"]),
-        )
+        return Router(**_ksem_fields.decode(config["keySwitchManager"]))
 
     def to_ksem_config(self) -> PartialRouterConfig:
-        return {
-            "routerTrack": int(self.track_must_be_armed),
-            "routerFilter": int(self.router_exclusive),
-        }
+        return cast(PartialRouterConfig, _ksem_fields.encode(self))
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+from collections.abc import Mapping
 from copy import copy
 from typing import Any, ClassVar
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, field_serializer, field_validator
 
 from ksem_transformer.models.ksem_json_types import KsemConfig
 from ksem_transformer.models.note_field import NoteField
@@ -15,10 +16,11 @@ from ksem_transformer.models.settings.midi_controls import MidiControls
 from ksem_transformer.models.settings.router import Router
 from ksem_transformer.models.settings.xy_pad import XYPad
 from ksem_transformer.note import MiddleCLiteral, Note
+from ksem_transformer.utils import counters, interning
 
 
-class PitchRange(BaseModel):
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+class PitchRange(counters.CountedModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True, frozen=True)
 
     low: NoteField
     high: NoteField
@@ -33,7 +35,20 @@ class PitchRange(BaseModel):
         )
 
 
-class Settings(BaseModel):
+# Frozen sub-models `interning` can share between `Settings`
+_SHARED_FIELDS = (
+    "pitch_range",
+    "midi_controls",
+    "custom_bank",
+    "xy_pad",
+    "delay",
+    "automation",
+    "router",
+    "control_pad",
+)
+
+
+class Settings(counters.CountedModel):
     """
     Represents settings for an instrument or product configuration.
     """
@@ -46,19 +61,23 @@ class Settings(BaseModel):
     )
 
     comment_template: str = ""
-    colors: dict[str, str] = Field(default_factory=dict)
+    # Read-only when it's shared with other settings (see `interning`), so it's
+    # replaced rather than updated
+    colors: Mapping[str, str] = Field(default_factory=dict)
     middle_c: MiddleCLiteral = default_middle_c
     pitch_range: PitchRange = copy(_default_pitch_range)
     mpe_support: bool = False
     send_main_key: bool = True
 
-    midi_controls: MidiControls = Field(default_factory=MidiControls)
-    custom_bank: CustomBank = Field(default_factory=CustomBank)
-    xy_pad: XYPad = Field(default_factory=XYPad)
-    delay: Delay = Field(default_factory=Delay)
-    automation: Automation = Field(default_factory=Automation)
-    router: Router = Field(default_factory=Router)
-    control_pad: ControlPad = Field(default_factory=ControlPad)
+    # The sub-models are frozen, so every `Settings` can share the same defaults (and
+    # `interning` can share equal values)
+    midi_controls: MidiControls = MidiControls()
+    custom_bank: CustomBank = CustomBank()
+    xy_pad: XYPad = XYPad()
+    delay: Delay = Delay()
+    automation: Automation = Automation()
+    router: Router = Router()
+    control_pad: ControlPad = ControlPad()
 
     @classmethod
     def default_pitch_range(cls) -> PitchRange:
@@ -82,12 +101,35 @@ class Settings(BaseModel):
             control_pad=ControlPad.from_ksem_config(config),
         )
 
+    @field_validator(*_SHARED_FIELDS, mode="after")
+    @classmethod
+    def _share_sub_model[T: BaseModel](cls, value: T) -> T:
+        return interning.intern_model(value)
+
+    @field_validator("colors", mode="after")
+    @classmethod
+    def _share_colors(cls, value: Mapping[str, str]) -> Mapping[str, str]:
+        return interning.intern_dict(value)
+
+    @field_validator("comment_template", mode="after")
+    @classmethod
+    def _share_comment_template(cls, value: str) -> str:
+        return interning.intern_str(value)
+
+    @field_serializer("colors")
+    def _serialize_colors(self, colors: Mapping[str, str]) -> dict[str, str]:
+        # Shared colors are `FrozenDict`s, which are dumped as plain dicts
+        return dict(colors)
+
     @classmethod
     def combine(cls, *others: Settings) -> Settings:
+        counters.count("settings.merge")
         default = Settings().model_dump()
+        counters.count("dump.Settings")
         out: dict[str, Any] = {}
         for other in others:
             other_dumped = other.model_dump()
+            counters.count("dump.Settings")
             for k, v in dict(other_dumped).items():
                 # Remove all fields that are default values so they don't overwrite previous things
                 if v == default[k]:
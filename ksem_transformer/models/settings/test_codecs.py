@@ -0,0 +1,47 @@
+from typing import cast, get_args
+
+from ksem_transformer.models.ksem_json_types import KsemConfig
+from ksem_transformer.models.settings.automation import Automation
+from ksem_transformer.models.settings.codecs import BoolCodec, EnumCodec
+from ksem_transformer.models.settings.control_pad import ControlPad
+from ksem_transformer.models.settings.delay import Delay
+from ksem_transformer.models.settings.xy_pad import AxisTarget, XYPad
+from ksem_transformer.note import Note
+
+
+def test_enum_codec_round_trips_every_option():
+    codec = EnumCodec.from_literal(AxisTarget)
+    for index, option in enumerate(get_args(AxisTarget.__value__)):
+        assert codec.encode(option) == index
+        assert codec.decode(index) == option
+    assert EnumCodec.from_literal(AxisTarget, as_float=True).encode("velocity") == 1.0
+
+
+def test_inverted_bool_codec():
+    assert BoolCodec(inverted=True).encode(True) == 0
+    assert BoolCodec(inverted=True).decode(0) is True
+
+
+def test_settings_round_trip_through_ksem():
+    xy_pad = XYPad(x_axis_target=119, y_axis_target="velocity", pad_shape="line")
+    delay = Delay(buffer_size=2048, delay_mode="track_delay", delay_cc=0.7)
+    control_pad = ControlPad(font_size=4, justification="left", show_ks_note=True)
+    automation = Automation(
+        automation_key=Note("D", 6, "C3"), pressing_keyswitches_affects_automation=True
+    )
+    config = cast(
+        KsemConfig,
+        {
+            "xyFade": xy_pad.to_ksem_config(),
+            "delaySettings": delay.to_ksem_config(),
+            "pad": control_pad.to_ksem_config(),
+            "automationSettings": automation.to_ksem_config(),
+            "piano": {"automationKey": automation.automation_key.to_midi()},
+        },
+    )
+
+    assert config["pad"]["fontSize"] == [0, 0, 3]
+    assert XYPad.from_ksem_config(config) == xy_pad
+    assert Delay.from_ksem_config(config) == delay
+    assert ControlPad.from_ksem_config(config) == control_pad
+    assert Automation.from_ksem_config(config, "C3") == automation
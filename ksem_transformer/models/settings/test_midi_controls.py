@@ -0,0 +1,72 @@
+from typing import cast
+
+import pytest
+
+from ksem_transformer.models.ksem_json_types import KsemConfig
+from ksem_transformer.models.settings.custom_bank import CustomBank
+from ksem_transformer.models.settings.midi_controls import (
+    MidiControls,
+    _MidiControlsData,  # pyright: ignore[reportPrivateUsage]
+    midi_control_names,
+)
+
+
+def test_every_control_is_validated():
+    assert tuple(_MidiControlsData.__annotations__) == midi_control_names
+
+
+def test_midi_controls_keep_their_yaml_shape():
+    midi_controls = MidiControls.model_validate(
+        {
+            "m07_volume": {"enabled": True, "value": 100},
+            "custom_03": {"value": 5, "midi_cc": 22},
+        }
+    )
+    dumped = midi_controls.model_dump()
+    assert dumped["m07_volume"] == {"enabled": True, "value": 100}
+    assert dumped["custom_03"] == {"enabled": False, "value": 5, "midi_cc": 22}
+    assert dumped["m01_modulation"] == {"enabled": False, "value": 0}
+    assert MidiControls.model_validate(dumped) == midi_controls
+    assert midi_controls.control("custom_03").value == 5
+
+
+def test_midi_controls_round_trip_through_ksem():
+    midi_controls = MidiControls.model_validate(
+        {"m64_hold_pedal": {"enabled": True}, "custom_08": {"midi_cc": 119}}
+    )
+    ksem = midi_controls.to_ksem_config()
+    assert ksem["64HoldPedal_button"] == 1
+    config = cast(KsemConfig, {"midiControls": ksem})
+    assert MidiControls.from_ksem_config(config) == midi_controls
+
+
+def test_custom_bank_round_trips_through_ksem():
+    custom_bank = CustomBank.model_validate(
+        {
+            "knob_01": {"name": "Dynamics", "control_target": "m01_modulation"},
+            "knob_04": {"name": "Vibrato"},
+        }
+    )
+    ksem = custom_bank.to_ksem_config()
+    assert ksem["ctrl1_menu"] == 1
+    assert ksem["ctrl4_menu"] == "-"
+    assert ksem["label"]["ctrl4"] == "Vibrato"
+
+    config = cast(KsemConfig, {"customBank": ksem})
+    assert CustomBank.from_ksem_config(config) == custom_bank
+    assert custom_bank.model_dump()["knob_04"] == {
+        "name": "Vibrato",
+        "control_target": None,
+    }
+
+
+def test_out_of_range_ksem_indexes_are_rejected():
+    ksem = MidiControls().to_ksem_config()
+    config = cast(KsemConfig, {"midiControls": {**ksem, "CcCustom03_num": 500}})
+    with pytest.raises(ValueError, match="CcCustom03_num"):
+        MidiControls.from_ksem_config(config)
+
+    ksem = CustomBank().to_ksem_config()
+    config = cast(KsemConfig, {"customBank": {**ksem, "ctrl2_menu": 99}})
+    with pytest.raises(ValueError, match="ctrl2_menu"):
+        CustomBank.from_ksem_config(config)
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-import typing
-from typing import Literal, cast, get_args
+from typing import Literal, cast
 
-from pydantic import BaseModel
+from pydantic import ConfigDict
 
 from ksem_transformer.models.ksem_json_types import KsemConfig, KsemXYFade
+from ksem_transformer.models.settings.codecs import EnumCodec, KsemFields
+from ksem_transformer.utils.counters import CountedModel
 
 type AxisTarget = Literal[
     None,
@@ -134,30 +135,26 @@ type AxisTarget = Literal[
 type PadShape = Literal["filled_rectangle", "line"]
 
 
-class XYPad(BaseModel):
+_ksem_fields = KsemFields(
+    {
+        "x_axis_target": ("chooseXFade", EnumCodec.from_literal(AxisTarget)),
+        "y_axis_target": ("chooseYFade", EnumCodec.from_literal(AxisTarget)),
+        "pad_shape": ("xyFadeShape", EnumCodec.from_literal(PadShape)),
+    },
+    constants={"yOrientation": 0},
+)
+
+
+class XYPad(CountedModel):
+    model_config = ConfigDict(frozen=True)
+
     x_axis_target: AxisTarget = None
     y_axis_target: AxisTarget = None
     pad_shape: PadShape = "filled_rectangle"
 
     @classmethod
     def from_ksem_config(cls, config: KsemConfig) -> XYPad:
-        cfg = config["xyFade"]
-        return XYPad(
-            x_axis_target=cast(
-                AxisTarget, get_args(AxisTarget.__value__)[cfg["chooseXFade"]]
-            ),
-            y_axis_target=cast(
-                AxisTarget, get_args(AxisTarget.__value__)[cfg["chooseYFade"]]
-            ),
-            pad_shape=cast(PadShape, get_args(PadShape.__value__)[cfg["xyFadeShape"]]),
-        )
+        return XYPad(**_ksem_fields.decode(config["xyFade"]))
 
     def to_ksem_config(self) -> KsemXYFade:
-        axis_target_options = typing.get_args(AxisTarget.__value__)
-        pad_shape_options = typing.get_args(PadShape.__value__)
-        return {
-            "chooseXFade": axis_target_options.index(self.x_axis_target),
-            "chooseYFade": axis_target_options.index(self.y_axis_target),
-            "xyFadeShape": pad_shape_options.index(self.pad_shape),
-            "yOrientation": 0,
-        }
+        return cast(KsemXYFade, _ksem_fields.encode(self))
@@ -0,0 +1,60 @@
+import pytest
+
+from ksem_transformer.models.bench import (
+    BenchmarkResult,
+    compare_results,
+    measure_memory,
+    missing_from_baseline,
+    results_from_baseline,
+    results_to_baseline,
+    run_benchmarks,
+)
+
+
+def test_slowdowns_past_the_threshold_regress():
+    baseline = {"a": BenchmarkResult("a", (1.0, 1.01, 0.99, 1.0))}
+    [comparison] = compare_results(
+        baseline, [BenchmarkResult("a", (1.2, 1.21, 1.19, 1.2))], threshold=0.1
+    )
+    assert round(comparison.change, 2) == 0.2
+    assert comparison.regressed
+
+
+def test_noisy_slowdowns_dont_regress():
+    baseline = {"a": BenchmarkResult("a", (1.0, 1.5, 0.6, 1.0, 1.4))}
+    [comparison] = compare_results(
+        baseline, [BenchmarkResult("a", (1.2, 0.7, 1.7, 1.2, 1.6))], threshold=0.1
+    )
+    assert comparison.change > 0.1
+    assert not comparison.regressed
+
+
+def test_baseline_round_trip():
+    results = run_benchmarks(["combine", "note_from_midi"], instruments=20, repeat=2)
+    assert [len(result.samples) for result in results] == [2, 2]
+
+    baseline = results_from_baseline(results_to_baseline(results, instruments=20))
+    assert all(
+        not comparison.regressed
+        for comparison in compare_results(baseline, results, threshold=0)
+    )
+
+
+def test_benchmarks_missing_from_the_baseline_are_reported():
+    baseline = {"a": BenchmarkResult("a", (1.0,))}
+    current = [BenchmarkResult("a", (1.0,)), BenchmarkResult("b", (1.0,))]
+    assert [c.current.name for c in compare_results(baseline, current)] == ["a"]
+    assert missing_from_baseline(baseline, current) == ["b"]
+
+
+def test_malformed_baselines_are_rejected():
+    baseline = results_to_baseline([BenchmarkResult("a", (1.0,))], instruments=20)
+    del baseline["results"]
+    with pytest.raises(ValueError, match="Malformed baseline"):
+        results_from_baseline(baseline)
+
+
+def test_memory_stays_under_the_ceilings():
+    results = measure_memory(["from_file", "note_from_str", "to_yaml"], instruments=200)
+    assert [result.name for result in results] == ["from_file", "to_yaml"]
+    assert not any(result.exceeded for result in results)
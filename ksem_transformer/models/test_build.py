@@ -0,0 +1,25 @@
+import shutil
+from pathlib import Path
+
+from ksem_transformer.models.build import BuildManifest, run_build
+
+example = Path(__file__).parent.parent / "example.yaml"
+
+
+def test_builds_every_target_and_reports_failures(tmp_path: Path):
+    shutil.copy(example, tmp_path / "example.yaml")
+    manifest_file = tmp_path / "manifest.yaml"
+    manifest_file.write_text(
+        "targets:\n"
+        "  - {input: example.yaml, output: out/all}\n"
+        "  - {input: example.yaml, output: out/strings, only: ['*/01 Solo Strings']}\n"
+        "  - {input: missing.yaml, output: out/missing}\n"
+    )
+
+    targets = BuildManifest.from_file(manifest_file).targets
+    all_, strings, missing = run_build(targets, jobs=1)
+
+    assert all_.error is None and all_.files_written == 3
+    assert strings.error is None and strings.files_written == 2
+    assert len(list((tmp_path / "out/strings").rglob("*.json"))) == 2
+    assert missing.error is not None and missing.error.startswith("FileNotFoundError")
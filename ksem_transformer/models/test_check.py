@@ -0,0 +1,68 @@
+from typing import Any
+
+from ksem_transformer.models.check import Problem, check_library
+
+
+def make_library(**instrument_overrides: Any) -> dict[str, Any]:
+    return {
+        "settings": {"colors": {"Legato": "#334b54"}},
+        "products": {
+            "VSL": {
+                "instrument_groups": {
+                    "Strings": {
+                        "instruments": {
+                            "Violin": {
+                                "keyswitches": {
+                                    "root_octaves": {"key": 0},
+                                    "mapping": ["name", "key", "color"],
+                                    "values": [["Legato", "C", "Legato"]],
+                                    **instrument_overrides,
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        },
+    }
+
+
+def test_valid_library_has_no_problems():
+    assert check_library(make_library()) == []
+
+
+def test_reports_every_problem_with_its_path():
+    problems = check_library(
+        make_library(root_octaves={}, values=[["Legato", "C", "Nope"]] * 65)
+    )
+    path = ("VSL", "Strings", "Violin")
+
+    assert Problem(path, "Instrument Violin has more than 64 keyswitches (65)") in (
+        problems
+    )
+    assert (
+        Problem(path, "`root_octaves.key` must be defined since you're mapping `key`")
+        in problems
+    )
+    assert (
+        Problem(
+            path,
+            "Keyswitch 1 (`color`): color `Nope` isn't defined in `settings.colors`",
+        )
+        in problems
+    )
+
+
+def test_reports_invalid_settings_on_their_container():
+    library = make_library()
+    library["products"]["VSL"]["settings"] = {"middle_c": "C9"}
+
+    [problem] = check_library(library)
+    assert problem.path == ("VSL",)
+    assert problem.message.startswith("settings.middle_c:")
+
+
+def test_reports_invalid_structure():
+    assert check_library({"products": {"VSL": {}}}) == [
+        Problem(("VSL",), "`instrument_groups` must be a mapping")
+    ]
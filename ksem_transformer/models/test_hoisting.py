@@ -0,0 +1,137 @@
+from typing import Any
+
+from ksem_transformer.models.hoisting import hoist_settings
+from ksem_transformer.models.root import Root
+
+
+def make_root(*instrument_settings: dict[str, Any]) -> Root:
+    return Root.model_validate(
+        {
+            "products": {
+                "VSL": {
+                    "instrument_groups": {
+                        "Strings": {
+                            "instruments": {
+                                f"Violin {i}": {
+                                    "settings": settings,
+                                    "keyswitches": {"mapping": [], "values": []},
+                                }
+                                for i, settings in enumerate(instrument_settings)
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    )
+
+
+def merged_settings(root: Root) -> list[Any]:
+    return [
+        instrument.get_merged_settings()
+        for product in root.products.values()
+        for group in product.instrument_groups.values()
+        for instrument in group.instruments.values()
+    ]
+
+
+def test_shared_settings_are_hoisted_to_the_product():
+    root = make_root(
+        {"mpe_support": True, "middle_c": "C4"}, {"mpe_support": True, "middle_c": "C5"}
+    )
+    before = merged_settings(root)
+    hoist_settings(root)
+
+    product = root.products["VSL"]
+    group = product.instrument_groups["Strings"]
+    assert merged_settings(root) == before
+    assert product.settings.mpe_support
+    assert not group.settings.mpe_support
+    assert not group.instruments["Violin 0"].settings.mpe_support
+    assert group.instruments["Violin 0"].settings.middle_c == "C4"
+    assert group.instruments["Violin 1"].settings.middle_c == "C5"
+
+
+def test_settings_some_instruments_leave_at_default_stay_put():
+    root = make_root({"mpe_support": True}, {})
+    hoist_settings(root)
+
+    group = root.products["VSL"].instrument_groups["Strings"]
+    assert not group.settings.mpe_support
+    assert group.instruments["Violin 0"].settings.mpe_support
+
+
+def test_colors_are_only_hoisted_when_every_palette_is_the_same():
+    root = make_root(
+        {"colors": {"Legato": "#334b54"}},
+        {"colors": {"Legato": "#334b54"}},
+        {"colors": {"Pizz": "#373354"}},
+    )
+    before = merged_settings(root)
+    hoist_settings(root)
+
+    assert merged_settings(root) == before
+    assert not root.products["VSL"].settings.colors
+
+    root = make_root(
+        {"colors": {"Legato": "#334b54"}}, {"colors": {"Legato": "#334b54"}}
+    )
+    hoist_settings(root)
+
+    assert root.products["VSL"].settings.colors == {"Legato": "#334b54"}
+    assert all(
+        not instrument.settings.colors
+        for instrument in root.products["VSL"]
+        .instrument_groups["Strings"]
+        .instruments.values()
+    )
+
+
+def test_merged_settings_are_the_same_after_hoisting():
+    instrument = {"keyswitches": {"mapping": [], "values": []}}
+    root = Root.model_validate(
+        {
+            "settings": {"colors": {"Legato": "#000000"}, "mpe_support": True},
+            "products": {
+                "VSL": {
+                    "settings": {"middle_c": "C4"},
+                    "instrument_groups": {
+                        "Strings": {
+                            "instruments": {
+                                "Violin": {
+                                    **instrument,
+                                    "settings": {"colors": {"Legato": "#334b54"}},
+                                },
+                                "Viola": {
+                                    **instrument,
+                                    "settings": {"colors": {"Legato": "#334b54"}},
+                                },
+                            }
+                        },
+                        "Brass": {
+                            "settings": {"colors": {"Pizz": "#373354"}},
+                            "instruments": {
+                                "Horn": {**instrument, "settings": {"middle_c": "C5"}},
+                                "Tuba": instrument,
+                            },
+                        },
+                    },
+                }
+            },
+        }
+    )
+    before = merged_settings(root)
+    hoist_settings(root)
+
+    assert merged_settings(root) == before
+
+
+def test_conflicting_colors_are_not_hoisted():
+    root = make_root(
+        {"colors": {"Legato": "#334b54"}}, {"colors": {"Legato": "#000000"}}
+    )
+    before = merged_settings(root)
+    hoist_settings(root)
+
+    assert merged_settings(root) == before
+    assert not root.products["VSL"].settings.colors
@@ -0,0 +1,42 @@
+import re
+
+import pytest
+from pydantic import ValidationError
+
+from ksem_transformer.models.keyswitches import Keyswitches
+from ksem_transformer.models.settings.settings import Settings
+
+
+def make_keyswitches(*values: list[object]) -> Keyswitches:
+    return Keyswitches.model_validate(
+        {
+            "root_octaves": {"key": 0},
+            "mapping": ["name", "key", "cc_n", "cc_v"],
+            "values": list(values),
+        }
+    )
+
+
+def test_cells_are_validated_by_their_column():
+    keyswitches = make_keyswitches(["Legato", "C#", 1, 127], ["Staccato", "-", 1, "-"])
+
+    assert keyswitches.values == (("Legato", "C#", 1, 127), ("Staccato", "-", 1, "-"))
+    ksem = keyswitches.to_ksem_config(Settings())
+    assert (ksem["1"]["key"], ksem["1"]["ccn"]) == (25, 1)
+    assert (ksem["2"]["key"], ksem["2"]["ccv"]) == ("-", "-")
+
+
+@pytest.mark.parametrize(
+    ("row", "message"),
+    [
+        (["Legato", "C4", 1, 127], "Keyswitch 1 (`key`): `C4` isn't a note name"),
+        (
+            ["Legato", "C", "1", 127],
+            "Keyswitch 1 (`cc_n`): expected a whole number, got '1'",
+        ),
+        (["Legato", "C", 1], "Keyswitch 1 must be a list of 4 values"),
+    ],
+)
+def test_errors_name_the_column(row: list[object], message: str):
+    with pytest.raises(ValidationError, match=re.escape(message)):
+        make_keyswitches(row)
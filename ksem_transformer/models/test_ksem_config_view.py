@@ -0,0 +1,31 @@
+import json
+from pathlib import Path
+
+from ksem_transformer.models.ksem_config_view import (
+    KsemConfigView,
+    iter_ksem_config_views,
+)
+from ksem_transformer.models.settings.settings import Settings
+
+BASE_CONFIG = Path(__file__).parent.parent / "base.json"
+
+
+def test_view_decodes_on_first_access():
+    view = KsemConfigView.from_file(BASE_CONFIG)
+    assert not view.decoded
+    assert Settings.from_ksem_config(view.as_config()) == Settings.from_ksem_config(
+        json.loads(BASE_CONFIG.read_text())
+    )
+    assert view.decoded
+
+
+def test_views_read_through_a_shared_buffer(tmp_path: Path):
+    files: list[Path] = []
+    # Bigger than the initial buffer, so it has to grow partway through
+    for i, size in enumerate((10, 200_000, 3)):
+        file = tmp_path / f"{i}.json"
+        file.write_text(json.dumps({"comments": "x" * size}))
+        files.append(file)
+
+    views = list(iter_ksem_config_views(files))
+    assert [len(view["comments"]) for view in views] == [10, 200_000, 3]
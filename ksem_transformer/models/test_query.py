@@ -0,0 +1,89 @@
+from ksem_transformer.models.query import LibraryIndex
+from ksem_transformer.models.root import Root
+
+root = Root.model_validate(
+    {
+        "settings": {"colors": {"Legato": "#334b54", "Short": "#543338"}},
+        "products": {
+            "VSL": {
+                "settings": {"middle_c": "C4"},
+                "instrument_groups": {
+                    "Strings": {
+                        "instruments": {
+                            "Violin": {
+                                "keyswitches": {
+                                    "root_octaves": {"key": 0},
+                                    "mapping": ["name", "key", "color"],
+                                    "values": [
+                                        ["Legato", "C#", "Legato"],
+                                        ["Staccato", "D", "Short"],
+                                    ],
+                                }
+                            },
+                            "Cello": {
+                                "settings": {"mpe_support": True},
+                                "keyswitches": {
+                                    "mapping": ["name", "color"],
+                                    "values": [["Legato", "Legato"]],
+                                },
+                            },
+                        }
+                    }
+                },
+            },
+            "BBC": {
+                "instrument_groups": {
+                    "Brass": {
+                        "instruments": {
+                            "Horn": {
+                                "keyswitches": {
+                                    "mapping": ["name"],
+                                    "values": [["Staccato"]],
+                                }
+                            }
+                        }
+                    }
+                }
+            },
+        },
+    }
+)
+index = LibraryIndex.build(root)
+
+
+class TestFind:
+    def test_keyswitch_fields(self):
+        assert index.find({"name": "Staccato"}) == [
+            ("VSL", "Strings", "Violin"),
+            ("BBC", "Brass", "Horn"),
+        ]
+        assert index.find({"color": "Legato"}) == [
+            ("VSL", "Strings", "Violin"),
+            ("VSL", "Strings", "Cello"),
+        ]
+
+    def test_notes_are_found_by_any_spelling(self):
+        assert index.find({"key": "C#0"}) == index.find({"key": "Db0"})
+        assert index.find({"key": "Db0"}) == [("VSL", "Strings", "Violin")]
+
+    def test_resolved_settings(self):
+        assert index.find({"settings.middle_c": "C4"}) == [
+            ("VSL", "Strings", "Violin"),
+            ("VSL", "Strings", "Cello"),
+        ]
+        assert index.find({"settings.mpe_support": "true"}) == [
+            ("VSL", "Strings", "Cello")
+        ]
+        assert index.find({"settings.colors.Short": "#543338"}) == index.instruments
+
+    def test_filters_are_combined(self):
+        assert index.find({"name": "Staccato", "product": "VSL", "color": "S*"}) == [
+            ("VSL", "Strings", "Violin")
+        ]
+        assert index.find({"name": "Legato", "product": "BBC"}) == []
+
+
+def test_count_by():
+    assert index.count_by("product") == {"VSL": 2, "BBC": 1}
+    assert index.count_by("product", {"name": "Staccato"}) == {"VSL": 1, "BBC": 1}
+    assert index.keyswitch_count({"product": "VSL"}) == 3
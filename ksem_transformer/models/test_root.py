@@ -0,0 +1,216 @@
+import gc
+import json
+import pickle
+import sys
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+from ksem_transformer.models.root import Root, bulk_loading
+
+example = Path(__file__).parent.parent / "example.yaml"
+
+
+def test_ksem_configs_are_rendered_lazily(tmp_path: Path):
+    root = Root.from_file(example)
+    configs = root.iter_ksem_configs()
+    first = next(configs)
+
+    assert first == root.to_ksem_configs()[0]
+
+    root.write_ksem_config_files(tmp_path)
+    written = sorted(p.relative_to(tmp_path) for p in tmp_path.rglob("*.json"))
+    assert written == sorted(config.file for config in root.to_ksem_configs())
+    assert json.loads((tmp_path / first.file).read_text()) == first.data
+
+
+def test_yaml_written_in_parallel_matches_to_yaml():
+    instrument = {
+        "settings": {"midi_controls": {"ctrl1": {"enabled": True}}},
+        "keyswitches": {
+            "root_octaves": {"key": 0},
+            "mapping": ["name", "key"],
+            "values": [["Legato", "C"], ["Staccato", "D"]],
+        },
+    }
+    root = Root.model_validate(
+        {
+            "settings": {"middle_c": "C4"},
+            "products": {
+                product_name: {
+                    "instrument_groups": {
+                        "Strings": {
+                            "instruments": {
+                                f"Violin {i}": instrument for i in range(40)
+                            }
+                        }
+                    }
+                }
+                for product_name in ("VSL", "Spitfire")
+            },
+        }
+    )
+
+    stream = StringIO()
+    root.write_yaml(stream, jobs=2)
+    assert stream.getvalue() == root.to_yaml()
+
+
+def _insert_instrument(file: Path, name: str) -> None:
+    Root.model_validate(
+        {
+            "products": {
+                "Product": {
+                    "instrument_groups": {
+                        "Group": {
+                            "instruments": {
+                                name: {
+                                    "keyswitches": {
+                                        "root_octaves": {"key": 0},
+                                        "mapping": ["name", "key"],
+                                        "values": [[name, "C"]],
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    ).insert_into_file(file)
+
+
+def test_concurrent_inserts_are_all_kept(tmp_path: Path):
+    file = tmp_path / "library.yaml"
+    names = [f"Instrument {i}" for i in range(8)]
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        list(executor.map(_insert_instrument, [file] * len(names), names))
+
+    instruments = Root.from_file(file).products["Product"].instrument_groups["Group"]
+    assert sorted(instruments.instruments) == names
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def _violin(settings: dict[str, object]) -> Root:
+    return Root.model_validate(
+        {
+            "products": {
+                "Product": {
+                    "instrument_groups": {
+                        "Group": {
+                            "instruments": {
+                                "Violin": {
+                                    "settings": settings,
+                                    "keyswitches": {
+                                        "root_octaves": {"key": 0},
+                                        "mapping": ["name", "key"],
+                                        "values": [["Legato", "C"]],
+                                    },
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    )
+
+
+@pytest.mark.parametrize("suffix", [".yaml", ".json", ".jsonl", ".sqlite"])
+def test_inserting_resets_settings_left_at_their_defaults(tmp_path: Path, suffix: str):
+    file = tmp_path / f"library{suffix}"
+    _violin({"mpe_support": True, "middle_c": "C4"}).insert_into_file(file)
+    _violin({"middle_c": "C4"}).insert_into_file(file)
+
+    _, _, _, instrument = next(Root.from_file(file).iter_instruments())
+    assert not instrument.settings.mpe_support
+    assert instrument.settings.middle_c == "C4"
+
+
+def test_trees_are_freed_without_the_cyclic_gc():
+    gc.disable()
+    try:
+        root = Root.from_file(example)
+        _, _, _, instrument = next(root.iter_instruments())
+        assert instrument.parent is not None
+        assert instrument.parent.parent is not None
+        assert instrument.parent.parent.parent is root
+
+        root_ref = weakref.ref(root)
+        del root
+        assert root_ref() is None
+        with pytest.raises(ReferenceError):
+            instrument.get_merged_settings()
+    finally:
+        gc.enable()
+
+
+def test_containers_need_their_root_kept_alive():
+    # Parents are held weakly, so containers taken from a temporary root can't get
+    # at its settings once it's gone
+    product = next(iter(Root.from_file(example).products.values()))
+    group = next(iter(product.instrument_groups.values()))
+    instrument = next(iter(group.instruments.values()))
+    assert instrument.parent is group
+    with pytest.raises(ReferenceError, match="Keep a reference to the Root"):
+        instrument.get_merged_settings()
+
+    root = Root.from_file(example)
+    _, _, _, instrument = next(root.iter_instruments())
+    assert instrument.get_merged_settings() is not None
+
+
+def test_bulk_loading_links_parents_at_the_end():
+    data = Root.from_file(example).model_dump()
+    with bulk_loading():
+        assert not gc.isenabled()
+        root = Root.model_validate(data)
+        [product, *_] = root.products.values()
+        assert product.parent is None
+    assert gc.isenabled()
+    assert product.parent is root
+
+
+def test_pickled_trees_keep_their_parent_links():
+    root = Root.from_file(example)
+    unpickled = pickle.loads(pickle.dumps(root))
+
+    assert unpickled.model_dump() == root.model_dump()
+    assert unpickled.to_ksem_configs() == root.to_ksem_configs()
+    for product in unpickled.products.values():
+        assert product.parent is unpickled
+        for group in product.instrument_groups.values():
+            assert group.parent is product
+            for instrument in group.instruments.values():
+                assert instrument.parent is group
+    # Children added later are linked too
+    [product, *_] = unpickled.products.values()
+    [group, *_] = product.instrument_groups.values()
+    group.instruments["New"] = next(iter(group.instruments.values())).model_copy()
+    assert group.instruments["New"].parent is group
+
+
+def test_roots_render_concurrently_in_threads():
+    data = Root.from_file(example).model_dump()
+    roots = [
+        Root.model_validate({**data, "settings": {**data["settings"], "middle_c": c}})
+        for c in ("C3", "C4", "C5")
+    ]
+    expected = [(root.to_ksem_configs(), root.model_dump()) for root in roots]
+
+    # Switch threads as often as possible, so they interleave mid-render
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(8) as executor:
+            results = list(
+                executor.map(
+                    lambda root: (root.to_ksem_configs(), root.model_dump()), roots * 20
+                )
+            )
+    finally:
+        sys.setswitchinterval(switch_interval)
+    assert results == expected * 20
@@ -0,0 +1,104 @@
+from typing import Any
+
+import pytest
+
+from ksem_transformer.models.selection import (
+    InstrumentFilter,
+    InstrumentPath,
+    Shard,
+    filter_library,
+    instrument_costs,
+)
+
+library: dict[str, Any] = {
+    "settings": {"middle_c": "C4"},
+    "products": {
+        "VSL": {
+            "settings": {"mpe_support": True},
+            "instrument_groups": {
+                "Strings": {"instruments": {"Violin": 1, "Cello": 2}},
+                "Brass": {"instruments": {"Horn": 3}},
+            },
+        },
+        "BBC": {"instrument_groups": {"Strings": {"instruments": {"Violin": 4}}}},
+    },
+}
+
+
+class TestInstrumentFilter:
+    def test_full_pattern(self):
+        only = InstrumentFilter.from_patterns(["VSL/Strings/V*"])
+        assert only.matches(("VSL", "Strings", "Violin"))
+        assert not only.matches(("VSL", "Strings", "Cello"))
+        assert not only.matches(("BBC", "Strings", "Violin"))
+
+    def test_short_pattern_selects_everything_below(self):
+        only = InstrumentFilter.from_patterns(["VSL"])
+        assert only.matches(("VSL", "Strings", "Cello"))
+        assert only.matches(("VSL", "Brass", "Horn"))
+        assert not only.matches(("BBC", "Strings", "Violin"))
+
+    def test_any_pattern_matches(self):
+        only = InstrumentFilter.from_patterns(["VSL/Brass", "*/*/Violin"])
+        assert only.matches(("VSL", "Brass", "Horn"))
+        assert only.matches(("BBC", "Strings", "Violin"))
+        assert not only.matches(("VSL", "Strings", "Cello"))
+
+
+def test_filter_library_keeps_ancestor_settings():
+    only = InstrumentFilter.from_patterns(["VSL/Strings/Cello"])
+    assert filter_library(library, only.matches) == {
+        "settings": {"middle_c": "C4"},
+        "products": {
+            "VSL": {
+                "settings": {"mpe_support": True},
+                "instrument_groups": {"Strings": {"instruments": {"Cello": 2}}},
+            }
+        },
+    }
+
+
+class TestShard:
+    costs: dict[InstrumentPath, int] = {
+        ("P", "G", f"Instrument {i:02d}"): cost
+        for i, cost in enumerate([40, 3, 17, 17, 1, 8, 25, 2, 9, 30, 5, 12])
+    }
+
+    def test_shards_cover_every_instrument_once(self):
+        shards = [Shard(i, 3).select(self.costs) for i in range(1, 4)]
+        assert sorted(path for shard in shards for path in shard) == sorted(self.costs)
+
+    def test_shards_are_balanced_by_cost(self):
+        loads = [
+            sum(self.costs[path] for path in Shard(i, 3).select(self.costs))
+            for i in range(1, 4)
+        ]
+        assert max(loads) - min(loads) <= 2
+
+    def test_shards_dont_depend_on_instrument_order(self):
+        reordered = dict(reversed(self.costs.items()))
+        assert Shard(2, 3).select(reordered) == Shard(2, 3).select(self.costs)
+
+    @pytest.mark.parametrize("spec", ["0/3", "4/3", "2", "a/b", "1/0"])
+    def test_invalid_specs(self, spec: str):
+        with pytest.raises(ValueError):
+            Shard.parse(spec)
+
+    def test_costs_come_from_keyswitch_counts(self):
+        costs = instrument_costs(
+            {
+                "products": {
+                    "P": {
+                        "instrument_groups": {
+                            "G": {
+                                "instruments": {
+                                    "A": {"keyswitches": {"values": [[], [], []]}},
+                                    "B": {},
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        )
+        assert costs == {("P", "G", "A"): 4, ("P", "G", "B"): 1}
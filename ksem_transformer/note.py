@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 import re
+from collections.abc import Generator
 from contextlib import contextmanager
-from typing import ClassVar, Literal, cast
+from contextvars import ContextVar
+from typing import Literal, cast
 
 import attrs
 from attr import Attribute
 from attrs import field
 
+from ksem_transformer.utils import counters
+
 type NoteLiteral = Literal[
     "C",
     "C#",
@@ -102,14 +106,22 @@ def _validate_octave_raw(value: int, middle_c: MiddleCLiteral) -> None:
         )
 
 
+# The middle C naive notes are converted with, set by `Note.with_middle_c`. Being
+# context-local, threads and asyncio tasks can each use their own
+_context_middle_c: ContextVar[MiddleCLiteral | None] = ContextVar(
+    "middle_c", default=None
+)
+
+
 @attrs.define(hash=True)
 class Note:
-    _cls_middle_c: ClassVar[MiddleCLiteral | None] = None
-
     note: NoteLiteral = field(validator=_validate_note)
     octave: int = field(validator=_validate_octave)
     middle_c: MiddleCLiteral | None = None
 
+    def __attrs_post_init__(self) -> None:
+        counters.count("note.create")
+
     def __eq__(self, other: object) -> bool:
         if isinstance(other, Note):
             return self.to_midi() == other.to_midi()
@@ -135,14 +147,16 @@ class Note:
 
     @classmethod
     @contextmanager
-    def with_middle_c(cls, middle_c: MiddleCLiteral):
-        prev_middle_c = cls._cls_middle_c
-        cls._cls_middle_c = middle_c
-        yield
-        cls._cls_middle_c = prev_middle_c
+    def with_middle_c(cls, middle_c: MiddleCLiteral) -> Generator[None, None, None]:
+        token = _context_middle_c.set(middle_c)
+        try:
+            yield
+        finally:
+            _context_middle_c.reset(token)
 
     @classmethod
     def from_str(cls, value: str, middle_c: MiddleCLiteral | None = None) -> Note:
+        counters.count("note.from_str")
         if not (
             match_ := re.match(
                 r"^(?P<note>[CDFGA]#?|[DEGAB]b?)(?P<octave>-[21]|\d|10)$", value
@@ -156,6 +170,7 @@ class Note:
 
     @classmethod
     def from_midi(cls, midi: int, middle_c: MiddleCLiteral) -> Note:
+        counters.count("note.from_midi")
         note = offset_to_key[midi % 12]
         octave = midi // 12 + lowest_octave_number[middle_c]
         return Note(note=note, octave=octave, middle_c=middle_c)
@@ -163,8 +178,8 @@ class Note:
     def to_midi(self) -> int:
         if self.middle_c is not None:
             middle_c = self.middle_c
-        elif Note._cls_middle_c is not None:
-            middle_c = Note._cls_middle_c
+        elif (context_middle_c := _context_middle_c.get()) is not None:
+            middle_c = context_middle_c
         else:
             raise TypeError(
                 "A naive Note cannot be converted to a MIDI value. Set `middle_c` on "
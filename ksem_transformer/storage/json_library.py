@@ -0,0 +1,156 @@
+"""
+Libraries stored as JSON, either as a single document with the same shape as the
+YAML config, or as JSON Lines with one record per line.
+
+Each JSON Lines record holds the settings of the root, a product or a group, or a
+whole instrument, along with the names of the containers it belongs to:
+
+    {"settings": {...}}
+    {"product": "VSL", "settings": {...}}
+    {"product": "VSL", "instrument_group": "Strings", "settings": {...}}
+    {"product": "VSL", "instrument_group": "Strings", "instrument": "Violin",
+     "settings": {...}, "keyswitches": {...}}
+
+Records are merged into the library in order, so a later record for the same
+container is merged into (and wins over) an earlier one.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from pathlib import Path
+from typing import Any, Literal
+
+from ksem_transformer.models.selection import InstrumentPath, filter_library
+from ksem_transformer.utils.files import atomic_write_text
+from ksem_transformer.utils.tree import Tree, deep_update_tree
+
+_PATH_KEYS = ("product", "instrument_group", "instrument")
+
+
+def load_json_library(
+    file: Path, keep: Callable[[InstrumentPath], bool] | None = None
+) -> Any:
+    with file.open("rb") as f:
+        data = json.load(f)
+    if keep is not None:
+        data = filter_library(data, keep)
+    return data
+
+
+def write_json_library(file: Path, data: Mapping[str, Any]) -> None:
+    atomic_write_text(file, json.dumps(data, indent=2))
+
+
+def merge_into_json_library(file: Path, data: Mapping[str, Any]) -> None:
+    library: Tree[str, Any] = load_json_library(file) if file.exists() else {}
+    deep_update_tree(library, dict(data))
+    write_json_library(file, library)
+
+
+def iter_jsonl_records(file: Path) -> Iterator[dict[str, Any]]:
+    """
+    Reads the records of a JSON Lines library one at a time.
+    """
+    with file.open("rb") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def library_to_jsonl_records(data: Mapping[str, Any]) -> Iterator[dict[str, Any]]:
+    """
+    Splits a library into JSON Lines records, parents first.
+    """
+    if "settings" in data:
+        yield {"settings": data["settings"]}
+    for product_name, product in data.get("products", {}).items():
+        if "settings" in product:
+            yield {"product": product_name, "settings": product["settings"]}
+        for group_name, group in product.get("instrument_groups", {}).items():
+            if "settings" in group:
+                yield {
+                    "product": product_name,
+                    "instrument_group": group_name,
+                    "settings": group["settings"],
+                }
+            for instrument_name, instrument in group.get("instruments", {}).items():
+                yield {
+                    "product": product_name,
+                    "instrument_group": group_name,
+                    "instrument": instrument_name,
+                    **instrument,
+                }
+
+
+def load_jsonl_library(
+    file: Path, keep: Callable[[InstrumentPath], bool] | None = None
+) -> Tree[str, Any]:
+    """
+    Loads a JSON Lines library. Records are read one at a time, and instrument
+    records that `keep` rejects are dropped as soon as they're read.
+    """
+    return jsonl_records_to_library(iter_jsonl_records(file), keep)
+
+
+def jsonl_records_to_library(
+    records: Iterable[Mapping[str, Any]],
+    keep: Callable[[InstrumentPath], bool] | None = None,
+) -> Tree[str, Any]:
+    library: Tree[str, Any] = {"products": {}}
+    container_settings: dict[tuple[str, ...], Any] = {}
+
+    for record in records:
+        path = tuple(record[k] for k in _PATH_KEYS if k in record)
+        data = {k: v for k, v in record.items() if k not in _PATH_KEYS}
+
+        if len(path) < 3:
+            # Container settings are added at the end, so that containers whose
+            # instruments were all filtered out don't show up empty
+            deep_update_tree(container_settings.setdefault(path, {}), data)
+            continue
+        if keep is not None and not keep((path[0], path[1], path[2])):
+            continue
+
+        product = library["products"].setdefault(path[0], {"instrument_groups": {}})
+        group = product["instrument_groups"].setdefault(path[1], {"instruments": {}})
+        instrument = group["instruments"].setdefault(path[2], {})
+        deep_update_tree(instrument, data)
+
+    for path, data in container_settings.items():
+        container = library
+        for key, children_key, name in zip(
+            ("products", "instrument_groups"),
+            ("instrument_groups", "instruments"),
+            path,
+        ):
+            if keep is None:
+                container = container[key].setdefault(name, {children_key: {}})
+            elif (container := container[key].get(name)) is None:
+                break
+        else:
+            deep_update_tree(container, data)
+
+    return library
+
+
+def write_jsonl_library(file: Path, data: Mapping[str, Any]) -> None:
+    _write_jsonl_records(file, data, "w")
+
+
+def append_to_jsonl_library(file: Path, data: Mapping[str, Any]) -> None:
+    """
+    Merges a library into a JSON Lines library by appending its records, without
+    reading what's already there.
+    """
+    _write_jsonl_records(file, data, "a")
+
+
+def _write_jsonl_records(
+    file: Path, data: Mapping[str, Any], mode: Literal["w", "a"]
+) -> None:
+    with file.open(mode) as f:
+        for record in library_to_jsonl_records(data):
+            f.write(json.dumps(record))
+            f.write("\n")
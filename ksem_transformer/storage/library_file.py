@@ -0,0 +1,50 @@
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Literal
+
+from ksem_transformer.models.selection import InstrumentPath, filter_library
+from ksem_transformer.storage.json_library import load_json_library, load_jsonl_library
+from ksem_transformer.storage.sqlite_library import SqliteLibrary
+from ksem_transformer.utils.yaml_utils import yaml_load_file
+
+type LibraryFormat = Literal["yaml", "json", "jsonl", "sqlite"]
+
+suffix_to_library_format: dict[str, LibraryFormat] = {
+    ".json": "json",
+    ".jsonl": "jsonl",
+    ".db": "sqlite",
+    ".sqlite": "sqlite",
+    ".sqlite3": "sqlite",
+}
+
+
+def get_library_format(file: Path) -> LibraryFormat:
+    """
+    Works out the format of a library file from its extension. Anything that isn't
+    recognised is assumed to be YAML.
+    """
+    return suffix_to_library_format.get(file.suffix.lower(), "yaml")
+
+
+def load_library_data(
+    file: Path, keep: Callable[[InstrumentPath], bool] | None = None
+) -> Any:
+    """
+    Loads a library file in any supported format as plain data, before validation.
+
+    If `keep` is given, only the instruments it returns `True` for (and their
+    ancestors' settings) are loaded.
+    """
+    match get_library_format(file):
+        case "sqlite":
+            with SqliteLibrary.open(file) as library:
+                return library.load(keep)
+        case "json":
+            return load_json_library(file, keep)
+        case "jsonl":
+            return load_jsonl_library(file, keep)
+        case "yaml":
+            data = yaml_load_file(file)
+            if keep is not None:
+                data = filter_library(data, keep)
+            return data
@@ -0,0 +1,167 @@
+"""
+A cache of rendered KSEM configs that can be shared between runs, checkouts and
+branches of a library.
+
+Rendered configs are stored once per distinct content, under the hash of that
+content (`objects/`). Each render key (a hash of everything an instrument's config
+is rendered from) points to the content it rendered to (`keys/`), so instruments
+that render to the same config share a single stored copy.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+from importlib import metadata
+from pathlib import Path
+
+import attrs
+
+from ksem_transformer.utils.files import atomic_copy, atomic_write_text
+
+CACHE_DIR_ENV_VAR = "KSEM_TRANSFORMER_CACHE_DIR"
+CACHE_MAX_SIZE_ENV_VAR = "KSEM_TRANSFORMER_CACHE_MAX_SIZE"
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+
+
+def _tool_version() -> str:
+    try:
+        return metadata.version("ksem-transformer")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+# Part of every render key, so nothing rendered by another version is reused
+TOOL_VERSION = _tool_version()
+
+
+@attrs.define()
+class RenderCacheStats:
+    hits: int = 0
+    misses: int = 0
+    # Configs added to the cache, not counting ones it already had the content of
+    stored: int = 0
+    evicted: int = 0
+
+    def __add__(self, other: RenderCacheStats) -> RenderCacheStats:
+        return RenderCacheStats(
+            self.hits + other.hits,
+            self.misses + other.misses,
+            self.stored + other.stored,
+            self.evicted + other.evicted,
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"{self.hits} hit(s), {self.misses} miss(es), {self.stored} stored, "
+            f"{self.evicted} evicted"
+        )
+
+
+@attrs.define()
+class RenderCache:
+    """
+    A render cache in `directory`, holding up to about `max_size` bytes of configs.
+
+    Configs are copied out of the cache, or hard linked if `hard_link` (which is
+    faster and saves space, but means editing an output file would edit the cached
+    copy too).
+    """
+
+    directory: Path
+    max_size: int = DEFAULT_MAX_SIZE
+    hard_link: bool = False
+    stats: RenderCacheStats = attrs.field(factory=RenderCacheStats)
+
+    def _key_file(self, key: str) -> Path:
+        return self.directory / "keys" / key[:2] / key
+
+    def _object_file(self, digest: str) -> Path:
+        return self.directory / "objects" / digest[:2] / f"{digest}.json"
+
+    def restore(self, key: str, file: Path) -> bool:
+        """
+        Writes the config cached for `key` to `file`. Returns `False` (and leaves
+        `file` alone) if there isn't one.
+        """
+        try:
+            object_file = self._object_file(self._key_file(key).read_text())
+            atomic_copy(object_file, file, self.hard_link)
+        except FileNotFoundError:
+            # Never cached, or evicted since
+            self.stats.misses += 1
+            return False
+        # Eviction goes by modification time, so this marks it as recently used
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(object_file)
+        self.stats.hits += 1
+        return True
+
+    def store(self, key: str, file: Path, text: str) -> None:
+        """
+        Caches a config rendered for `key`, and writes it to `file`.
+        """
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        object_file = self._object_file(digest)
+        if not object_file.exists():
+            object_file.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(object_file, text)
+            self.stats.stored += 1
+        key_file = self._key_file(key)
+        key_file.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(key_file, digest)
+
+        if self.hard_link:
+            atomic_copy(object_file, file, hard_link=True)
+        else:
+            atomic_write_text(file, text)
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used configs, along with the keys pointing to
+        them, until the cache (keys included) fits in `max_size`. Keys whose config
+        is already gone are removed too.
+        """
+        keys: dict[str, list[tuple[int, Path]]] = {}
+        total_size = 0
+        for key_file in self.directory.glob("keys/*/*"):
+            try:
+                size = key_file.stat().st_size
+                digest = key_file.read_text()
+            except FileNotFoundError:
+                # Removed by another process in the meantime
+                continue
+            keys.setdefault(digest, []).append((size, key_file))
+            total_size += size
+
+        objects: list[tuple[float, int, str, Path]] = []
+        for object_file in self.directory.glob("objects/*/*.json"):
+            try:
+                stat = object_file.stat()
+            except FileNotFoundError:
+                continue
+            digest = object_file.stem
+            objects.append((stat.st_mtime, stat.st_size, digest, object_file))
+            total_size += stat.st_size
+
+        # Keys pointing to a config that was evicted by another process
+        stored = {digest for _, _, digest, _ in objects}
+        for digest in keys.keys() - stored:
+            total_size -= self._remove_keys(keys.pop(digest))
+
+        for _, size, digest, object_file in sorted(objects):
+            if total_size <= self.max_size:
+                break
+            object_file.unlink(missing_ok=True)
+            total_size -= size + self._remove_keys(keys.pop(digest, []))
+            self.stats.evicted += 1
+
+    @staticmethod
+    def _remove_keys(key_files: list[tuple[int, Path]]) -> int:
+        """
+        Removes key files, returning how many bytes they took.
+        """
+        for _, key_file in key_files:
+            key_file.unlink(missing_ok=True)
+        return sum(size for size, _ in key_files)
@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from collections.abc import Callable, Generator, Iterable, Mapping
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, cast, get_args
+
+import attrs
+
+from ksem_transformer.models.keyswitches import KeyswitchField
+from ksem_transformer.models.selection import InstrumentPath
+from ksem_transformer.utils.tree import Tree, deep_update_tree
+
+KEYSWITCH_FIELDS: tuple[KeyswitchField, ...] = get_args(KeyswitchField.__value__)
+
+# SQLite limits how many parameters a single statement can have
+_MAX_PARAMS = 500
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS instrument_groups (
+    id INTEGER PRIMARY KEY,
+    product_id INTEGER NOT NULL REFERENCES products (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    UNIQUE (product_id, name)
+);
+CREATE TABLE IF NOT EXISTS instruments (
+    id INTEGER PRIMARY KEY,
+    group_id INTEGER NOT NULL REFERENCES instrument_groups (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    root_octaves TEXT NOT NULL DEFAULT '{{}}',
+    mapping TEXT NOT NULL DEFAULT '[]',
+    UNIQUE (group_id, name)
+);
+-- Settings are stored as they're written in YAML: only what each level overrides
+CREATE TABLE IF NOT EXISTS settings (
+    level TEXT NOT NULL
+        CHECK (level IN ('root', 'product', 'instrument_group', 'instrument')),
+    -- 0 for the root, otherwise the id of the product, group or instrument
+    owner_id INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (level, owner_id)
+);
+CREATE TABLE IF NOT EXISTS keyswitches (
+    instrument_id INTEGER NOT NULL REFERENCES instruments (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    -- These have no declared type, so values keep the type they're inserted with
+    {", ".join(f'"{field}"' for field in KEYSWITCH_FIELDS)},
+    PRIMARY KEY (instrument_id, position)
+);
+"""
+
+
+def _columns(fields: Iterable[str]) -> str:
+    return ", ".join(f'"{field}"' for field in fields)
+
+
+def _chunks[T](items: list[T], size: int = _MAX_PARAMS) -> Iterable[list[T]]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+@attrs.define()
+class SqliteLibrary:
+    """
+    A library stored in an SQLite database, with a table for each level of the
+    library, one for the settings each level overrides and one for keyswitch rows.
+
+    Data goes in and comes out in the same shape as the YAML config, so it can be
+    validated with `Root.model_validate` and written with `Root.model_dump`.
+    """
+
+    connection: sqlite3.Connection
+
+    @classmethod
+    @contextmanager
+    def open(cls, file: Path) -> Generator[SqliteLibrary, None, None]:
+        connection = sqlite3.connect(file)
+        try:
+            connection.execute("PRAGMA foreign_keys = ON")
+            connection.executescript(_SCHEMA)
+            yield SqliteLibrary(connection)
+        finally:
+            connection.close()
+
+    def instrument_paths(self) -> list[InstrumentPath]:
+        """
+        Lists the path of every instrument, without loading any of them.
+        """
+        return [path for *_, path in self._instrument_rows()]
+
+    def _instrument_rows(self) -> list[tuple[int, int, int, InstrumentPath]]:
+        return [
+            (product_id, group_id, instrument_id, (product, group, instrument))
+            for product_id, group_id, instrument_id, product, group, instrument in (
+                self.connection.execute(
+                    """
+                    SELECT products.id, instrument_groups.id, instruments.id,
+                        products.name, instrument_groups.name, instruments.name
+                    FROM instruments
+                    JOIN instrument_groups ON instrument_groups.id = instruments.group_id
+                    JOIN products ON products.id = instrument_groups.product_id
+                    ORDER BY products.id, instrument_groups.id, instruments.id
+                    """
+                )
+            )
+        ]
+
+    def load(
+        self, keep: Callable[[InstrumentPath], bool] | None = None
+    ) -> Tree[str, Any]:
+        """
+        Loads the library. If `keep` is given, only the instruments it returns `True`
+        for (and their ancestors' settings) are read from the database. Otherwise
+        products and groups without any instruments are loaded too.
+        """
+        selected = [
+            row for row in self._instrument_rows() if keep is None or keep(row[3])
+        ]
+        products: list[tuple[int, str]] = self.connection.execute(
+            "SELECT id, name FROM products ORDER BY id"
+        ).fetchall()
+        groups: list[tuple[int, int, str]] = self.connection.execute(
+            "SELECT id, product_id, name FROM instrument_groups ORDER BY id"
+        ).fetchall()
+        if keep is not None:
+            product_ids = {row[0] for row in selected}
+            group_ids = {row[1] for row in selected}
+            products = [row for row in products if row[0] in product_ids]
+            groups = [row for row in groups if row[0] in group_ids]
+
+        settings = {
+            "root": self._load_settings("root", [0]),
+            "product": self._load_settings("product", [row[0] for row in products]),
+            "instrument_group": self._load_settings(
+                "instrument_group", [row[0] for row in groups]
+            ),
+            "instrument": self._load_settings(
+                "instrument", [row[2] for row in selected]
+            ),
+        }
+        instruments = self._load_instruments([row[2] for row in selected])
+
+        def _with_settings(
+            container: dict[str, Any], level: str, owner_id: int
+        ) -> dict[str, Any]:
+            if (level_settings := settings[level].get(owner_id)) is not None:
+                container["settings"] = level_settings
+            return container
+
+        data = _with_settings({"products": {}}, "root", 0)
+        # The groups of each product, and the instruments of each group, by id
+        product_groups: dict[int, dict[str, Any]] = {}
+        for product_id, product_name in products:
+            product = _with_settings({"instrument_groups": {}}, "product", product_id)
+            data["products"][product_name] = product
+            product_groups[product_id] = product["instrument_groups"]
+        group_instruments: dict[int, dict[str, Any]] = {}
+        for group_id, product_id, group_name in groups:
+            group = _with_settings({"instruments": {}}, "instrument_group", group_id)
+            product_groups[product_id][group_name] = group
+            group_instruments[group_id] = group["instruments"]
+        for _, group_id, instrument_id, path in selected:
+            group_instruments[group_id][path[2]] = _with_settings(
+                instruments[instrument_id], "instrument", instrument_id
+            )
+
+        return data
+
+    def _load_settings(self, level: str, owner_ids: list[int]) -> dict[int, Any]:
+        return {
+            owner_id: json.loads(settings)
+            for chunk in _chunks(owner_ids)
+            for owner_id, settings in self.connection.execute(
+                "SELECT owner_id, data FROM settings WHERE level = ? AND owner_id IN "
+                f"({', '.join('?' * len(chunk))})",
+                [level, *chunk],
+            )
+        }
+
+    def _load_instruments(self, instrument_ids: list[int]) -> dict[int, dict[str, Any]]:
+        instruments: dict[int, dict[str, Any]] = {}
+        for chunk in _chunks(instrument_ids):
+            placeholders = ", ".join("?" * len(chunk))
+            for instrument_id, root_octaves, mapping in self.connection.execute(
+                "SELECT id, root_octaves, mapping FROM instruments WHERE id IN "
+                f"({placeholders})",
+                chunk,
+            ):
+                instruments[instrument_id] = {
+                    "keyswitches": {
+                        "root_octaves": json.loads(root_octaves),
+                        "mapping": json.loads(mapping),
+                        "values": [],
+                    }
+                }
+
+            for instrument_id, *row in self.connection.execute(
+                f"SELECT instrument_id, {_columns(KEYSWITCH_FIELDS)} FROM keyswitches "
+                f"WHERE instrument_id IN ({placeholders}) "
+                "ORDER BY instrument_id, position",
+                chunk,
+            ):
+                keyswitches = instruments[instrument_id]["keyswitches"]
+                values = dict(zip(KEYSWITCH_FIELDS, row))
+                keyswitches["values"].append(
+                    [values[field] for field in keyswitches["mapping"]]
+                )
+        return instruments
+
+    def merge(self, data: Mapping[str, Any]) -> None:
+        """
+        Merges a library (e.g. from `Root.model_dump`) into the database in a single
+        transaction, following the same rules as `Root.combine`. Only the products,
+        groups and instruments in `data` are touched.
+        """
+        with self.connection:
+            self._merge_settings("root", 0, data)
+            for product_name, product in data.get("products", {}).items():
+                product_id = self._get_or_create("products", {"name": product_name})
+                self._merge_settings("product", product_id, product)
+
+                for group_name, group in product.get("instrument_groups", {}).items():
+                    group_id = self._get_or_create(
+                        "instrument_groups",
+                        {"product_id": product_id, "name": group_name},
+                    )
+                    self._merge_settings("instrument_group", group_id, group)
+
+                    for instrument_name, instrument in group.get(
+                        "instruments", {}
+                    ).items():
+                        instrument_id = self._get_or_create(
+                            "instruments",
+                            {"group_id": group_id, "name": instrument_name},
+                        )
+                        self._merge_settings("instrument", instrument_id, instrument)
+                        if "keyswitches" in instrument:
+                            self._merge_keyswitches(
+                                instrument_id, instrument["keyswitches"]
+                            )
+
+    def _get_or_create(self, table: str, keys: dict[str, Any]) -> int:
+        where = " AND ".join(f"{k} = ?" for k in keys)
+        if row := self.connection.execute(
+            f"SELECT id FROM {table} WHERE {where}", list(keys.values())
+        ).fetchone():
+            return row[0]
+        cursor = self.connection.execute(
+            f"INSERT INTO {table} ({', '.join(keys)}) "
+            f"VALUES ({', '.join('?' * len(keys))})",
+            list(keys.values()),
+        )
+        return cast(int, cursor.lastrowid)
+
+    def _merge_settings(
+        self, level: str, owner_id: int, container: Mapping[str, Any]
+    ) -> None:
+        if "settings" not in container:
+            return
+        settings: Tree[str, Any] = {}
+        if row := self.connection.execute(
+            "SELECT data FROM settings WHERE level = ? AND owner_id = ?",
+            (level, owner_id),
+        ).fetchone():
+            settings = json.loads(row[0])
+        deep_update_tree(settings, container["settings"])
+        self.connection.execute(
+            "INSERT OR REPLACE INTO settings (level, owner_id, data) VALUES (?, ?, ?)",
+            (level, owner_id, json.dumps(settings)),
+        )
+
+    def _merge_keyswitches(
+        self, instrument_id: int, keyswitches: Mapping[str, Any]
+    ) -> None:
+        root_octaves, mapping = self.connection.execute(
+            "SELECT root_octaves, mapping FROM instruments WHERE id = ?",
+            (instrument_id,),
+        ).fetchone()
+        root_octaves = json.loads(root_octaves)
+        root_octaves.update(keyswitches.get("root_octaves", {}))
+        mapping = keyswitches.get("mapping", json.loads(mapping))
+        self.connection.execute(
+            "UPDATE instruments SET root_octaves = ?, mapping = ? WHERE id = ?",
+            (json.dumps(root_octaves), json.dumps(mapping), instrument_id),
+        )
+
+        if "values" not in keyswitches:
+            return
+        self.connection.execute(
+            "DELETE FROM keyswitches WHERE instrument_id = ?", (instrument_id,)
+        )
+        self.connection.executemany(
+            f"INSERT INTO keyswitches (instrument_id, position, {_columns(mapping)}) "
+            f"VALUES ({', '.join('?' * (len(mapping) + 2))})",
+            (
+                (instrument_id, position, *row)
+                for position, row in enumerate(keyswitches["values"])
+            ),
+        )
@@ -0,0 +1,87 @@
+from pathlib import Path
+from typing import Any
+
+from ksem_transformer.storage.json_library import (
+    append_to_jsonl_library,
+    iter_jsonl_records,
+    load_jsonl_library,
+    write_jsonl_library,
+)
+
+library: dict[str, Any] = {
+    "settings": {"middle_c": "C4"},
+    "products": {
+        "VSL": {
+            "settings": {"mpe_support": True},
+            "instrument_groups": {
+                "Strings": {
+                    "settings": {"send_main_key": False},
+                    "instruments": {
+                        "Violin": {"keyswitches": {"mapping": ["name"], "values": []}},
+                        "Cello": {
+                            "settings": {"middle_c": "C3"},
+                            "keyswitches": {"mapping": ["name"], "values": [["A"]]},
+                        },
+                    },
+                }
+            },
+        },
+        "BBC": {
+            "instrument_groups": {
+                "Brass": {
+                    "instruments": {
+                        "Horn": {"keyswitches": {"mapping": ["name"], "values": []}}
+                    }
+                }
+            }
+        },
+    },
+}
+
+
+def test_round_trip(tmp_path: Path):
+    file = tmp_path / "library.jsonl"
+    write_jsonl_library(file, library)
+
+    assert len(list(iter_jsonl_records(file))) == 6
+    assert load_jsonl_library(file) == library
+
+
+def test_filtered_containers_are_left_out(tmp_path: Path):
+    file = tmp_path / "library.jsonl"
+    write_jsonl_library(file, library)
+
+    assert load_jsonl_library(file, lambda path: path[0] == "BBC") == {
+        "settings": {"middle_c": "C4"},
+        "products": {"BBC": library["products"]["BBC"]},
+    }
+
+
+def test_appended_records_are_merged(tmp_path: Path):
+    file = tmp_path / "library.jsonl"
+    write_jsonl_library(file, library)
+    append_to_jsonl_library(
+        file,
+        {
+            "products": {
+                "VSL": {
+                    "instrument_groups": {
+                        "Strings": {
+                            "instruments": {
+                                "Cello": {"keyswitches": {"values": [["B"]]}}
+                            }
+                        }
+                    }
+                }
+            }
+        },
+    )
+
+    strings = load_jsonl_library(file)["products"]["VSL"]["instrument_groups"][
+        "Strings"
+    ]
+    assert strings["instruments"]["Cello"] == {
+        "settings": {"middle_c": "C3"},
+        "keyswitches": {"mapping": ["name"], "values": [["B"]]},
+    }
+    assert strings["settings"] == {"send_main_key": False}
@@ -0,0 +1,72 @@
+import os
+from pathlib import Path
+
+from ksem_transformer.models.root import Root
+from ksem_transformer.storage.render_cache import RenderCache
+
+example = Path(__file__).parent.parent / "example.yaml"
+
+
+def _read_tree(directory: Path) -> dict[Path, str]:
+    return {
+        file.relative_to(directory): file.read_text()
+        for file in sorted(directory.rglob("*.json"))
+    }
+
+
+def test_cached_build_matches_uncached_build(tmp_path: Path):
+    root = Root.from_file(example)
+    root.write_ksem_config_files(tmp_path / "plain")
+
+    cache = RenderCache(tmp_path / "cache")
+    root.write_ksem_config_files(tmp_path / "first", cache)
+    assert cache.stats.hits == 0
+    assert cache.stats.misses == cache.stats.stored
+
+    cache = RenderCache(tmp_path / "cache", hard_link=True)
+    root.write_ksem_config_files(tmp_path / "second", cache)
+    assert cache.stats.misses == 0
+
+    expected = _read_tree(tmp_path / "plain")
+    assert _read_tree(tmp_path / "first") == expected
+    assert _read_tree(tmp_path / "second") == expected
+
+
+def test_identical_configs_are_stored_once(tmp_path: Path):
+    cache = RenderCache(tmp_path / "cache")
+    cache.store("a" * 64, tmp_path / "a.json", "{}")
+    cache.store("b" * 64, tmp_path / "b.json", "{}")
+    assert cache.stats.stored == 1
+    assert cache.restore("b" * 64, tmp_path / "c.json")
+    assert (tmp_path / "c.json").read_text() == "{}"
+
+
+def test_least_recently_used_configs_are_evicted(tmp_path: Path):
+    # Room for one 100 byte config and the 64 byte digest its key points to it with
+    cache = RenderCache(tmp_path / "cache", max_size=200)
+    for i, key in enumerate(("a" * 64, "b" * 64, "c" * 64)):
+        cache.store(key, tmp_path / "out.json", str(i) * 100)
+    object_files = sorted((tmp_path / "cache" / "objects").glob("*/*.json"))
+    for age, object_file in enumerate(object_files):
+        os.utime(object_file, (age, age))
+    # Using the oldest one makes it the most recently used
+    assert cache.restore("a" * 64, tmp_path / "out.json")
+
+    cache.evict()
+    assert cache.stats.evicted == 2
+    assert cache.restore("a" * 64, tmp_path / "out.json")
+    assert not cache.restore("b" * 64, tmp_path / "out.json")
+    assert not cache.restore("c" * 64, tmp_path / "out.json")
+    # The keys of the evicted configs went with them
+    key_files = (tmp_path / "cache" / "keys").glob("*/*")
+    assert [key_file.name for key_file in key_files] == ["a" * 64]
+
+
+def test_keys_of_configs_evicted_elsewhere_are_removed(tmp_path: Path):
+    cache = RenderCache(tmp_path / "cache")
+    cache.store("a" * 64, tmp_path / "out.json", "{}")
+    for object_file in (tmp_path / "cache" / "objects").glob("*/*.json"):
+        object_file.unlink()
+
+    cache.evict()
+    assert not list((tmp_path / "cache" / "keys").glob("*/*"))
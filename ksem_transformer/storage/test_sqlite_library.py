@@ -0,0 +1,121 @@
+from pathlib import Path
+from typing import Any
+
+from ksem_transformer.storage.sqlite_library import SqliteLibrary
+
+
+def make_instrument(*names: str, **settings: Any) -> dict[str, Any]:
+    instrument: dict[str, Any] = {
+        "keyswitches": {
+            "root_octaves": {"key": 0},
+            "mapping": ["name", "key", "cc_n"],
+            "values": [[name, "C", i] for i, name in enumerate(names)],
+        }
+    }
+    if settings:
+        instrument["settings"] = settings
+    return instrument
+
+
+library: dict[str, Any] = {
+    "settings": {"middle_c": "C4"},
+    "products": {
+        "VSL": {
+            "settings": {"mpe_support": True},
+            "instrument_groups": {
+                "Strings": {
+                    "instruments": {
+                        "Violin": make_instrument("Legato", "1"),
+                        "Cello": make_instrument("Pizzicato", send_main_key=False),
+                    }
+                }
+            },
+        },
+        "BBC": {
+            "instrument_groups": {
+                "Brass": {
+                    "settings": {"comment_template": "{instrument}"},
+                    "instruments": {"Horn": make_instrument("Staccato")},
+                }
+            }
+        },
+    },
+}
+
+
+def test_round_trip(tmp_path: Path):
+    with SqliteLibrary.open(tmp_path / "library.db") as db:
+        db.merge(library)
+    with SqliteLibrary.open(tmp_path / "library.db") as db:
+        assert db.load() == library
+
+
+def test_selective_load(tmp_path: Path):
+    with SqliteLibrary.open(tmp_path / "library.db") as db:
+        db.merge(library)
+        assert db.load(lambda path: path[2] == "Cello") == {
+            "settings": {"middle_c": "C4"},
+            "products": {
+                "VSL": {
+                    "settings": {"mpe_support": True},
+                    "instrument_groups": {
+                        "Strings": {
+                            "instruments": {
+                                "Cello": make_instrument(
+                                    "Pizzicato", send_main_key=False
+                                )
+                            }
+                        }
+                    },
+                }
+            },
+        }
+
+
+def test_merge_only_touches_new_data(tmp_path: Path):
+    with SqliteLibrary.open(tmp_path / "library.db") as db:
+        db.merge(library)
+        db.merge(
+            {
+                "settings": {"mpe_support": True},
+                "products": {
+                    "BBC": {
+                        "instrument_groups": {
+                            "Brass": {
+                                "instruments": {
+                                    "Horn": make_instrument("Legato", "Marcato"),
+                                    "Tuba": make_instrument("Sustain"),
+                                }
+                            }
+                        }
+                    }
+                },
+            }
+        )
+        loaded = db.load()
+
+    assert loaded["settings"] == {"middle_c": "C4", "mpe_support": True}
+    assert loaded["products"]["VSL"] == library["products"]["VSL"]
+    assert loaded["products"]["BBC"]["instrument_groups"]["Brass"] == {
+        "settings": {"comment_template": "{instrument}"},
+        "instruments": {
+            "Horn": make_instrument("Legato", "Marcato"),
+            "Tuba": make_instrument("Sustain"),
+        },
+    }
+
+
+def test_containers_without_instruments_round_trip(tmp_path: Path):
+    data: dict[str, Any] = {
+        "products": {
+            "Empty": {"settings": {"mpe_support": True}, "instrument_groups": {}},
+            "VSL": {
+                "instrument_groups": {
+                    "Unused": {"settings": {"send_main_key": False}, "instruments": {}}
+                }
+            },
+        }
+    }
+    with SqliteLibrary.open(tmp_path / "library.db") as db:
+        db.merge(data)
+        assert db.load() == data
@@ -1,4 +1,6 @@
+import threading
 from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from functools import cached_property
 from typing import Never, cast, get_args
 
@@ -150,3 +152,29 @@ class TestNaiveNotes:
             with Note.with_middle_c("C5"):
                 assert Note("C", 0).to_midi() == 0
             assert Note("C", -1).to_midi() == 0
+
+    def test_threads_convert_with_their_own_middle_c(self):
+        middle_c_values = get_args(MiddleCLiteral.__value__)
+        # Every thread has set its middle C before any of them converts a note
+        barrier = threading.Barrier(len(middle_c_values))
+
+        def convert(middle_c: MiddleCLiteral) -> list[int]:
+            with Note.with_middle_c(middle_c):
+                barrier.wait()
+                return [
+                    Note(note, octave).to_midi()
+                    for _ in range(200)
+                    for note in ("C", "F#", "B")
+                    for octave in range(1, 6)
+                ]
+
+        with ThreadPoolExecutor(len(middle_c_values)) as executor:
+            results = list(executor.map(convert, middle_c_values))
+
+        for middle_c, midi_values in zip(middle_c_values, results):
+            assert midi_values == [
+                Note(note, octave, middle_c=middle_c).to_midi()
+                for _ in range(200)
+                for note in ("C", "F#", "B")
+                for octave in range(1, 6)
+            ]
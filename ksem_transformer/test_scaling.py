@@ -0,0 +1,132 @@
+"""
+Checks that the core operations don't get accidentally quadratic, by counting the
+function calls they make at a few input sizes. Call counts, unlike timings, are the
+same on every run and every machine.
+"""
+
+import math
+import sys
+from collections.abc import Callable
+from types import FrameType
+from typing import Any
+
+import pytest
+
+from ksem_transformer.models.ksem_parsing import make_keyswitches
+from ksem_transformer.models.root import Root
+from ksem_transformer.models.settings.settings import Settings
+from ksem_transformer.note import Note
+from ksem_transformer.utils.generate import generate_library
+from ksem_transformer.utils.tree import deep_join_trees
+
+# How much more than n·log n an operation's call count may grow by, to leave room
+# for fixed costs and rounding
+SLACK = 1.5
+
+
+def count_calls(operation: Callable[[], object]) -> int:
+    """
+    Counts the Python and C function calls `operation` makes.
+    """
+    calls = 0
+
+    def profile(frame: FrameType, event: str, arg: Any) -> None:
+        nonlocal calls
+        if event in ("call", "c_call"):
+            calls += 1
+
+    sys.setprofile(profile)
+    try:
+        operation()
+    finally:
+        sys.setprofile(None)
+    return calls
+
+
+def assert_n_log_n(make_operation: Callable[[int], Callable[[], object]], sizes):
+    """
+    Asserts the calls made by the operations `make_operation` returns for each size
+    grow no faster than n·log n from the smallest size to the largest.
+    """
+    smallest, largest = min(sizes), max(sizes)
+    calls = {size: count_calls(make_operation(size)) for size in sizes}
+    growth = calls[largest] / calls[smallest]
+    bound = (largest * math.log2(largest)) / (smallest * math.log2(smallest))
+    assert growth <= SLACK * bound, f"{calls} grew {growth:.1f}x, over n·log n"
+
+
+def single_instrument_roots(instruments: int) -> list[Root]:
+    data = generate_library(1, 1, instruments, keyswitches_per_instrument=4)
+    [product] = data["products"].values()
+    [group] = product["instrument_groups"].values()
+    return [
+        Root.model_validate(
+            {
+                **data,
+                "products": {
+                    "Product": {
+                        "instrument_groups": {
+                            "Group": {"instruments": {name: instrument}}
+                        }
+                    }
+                },
+            }
+        )
+        for name, instrument in group["instruments"].items()
+    ]
+
+
+def nested_tree(depth: int, leaf: str) -> dict[str, Any]:
+    tree: dict[str, Any] = {"leaf": leaf}
+    for level in range(depth):
+        tree = {"level": level, "child": tree}
+    return tree
+
+
+def test_deep_join_trees_scales():
+    assert_n_log_n(
+        lambda n: lambda: deep_join_trees(nested_tree(n, "a"), nested_tree(n, "b")),
+        [25, 50, 100, 200],
+    )
+
+
+def test_combine_scales():
+    def make_operation(n: int):
+        roots = single_instrument_roots(n)
+        return lambda: Root.combine(*roots)
+
+    assert_n_log_n(make_operation, [10, 20, 40])
+
+
+def test_make_keyswitches_scales():
+    def make_operation(n: int):
+        data = generate_library(1, 1, 1, keyswitches_per_instrument=n)
+        # Give every keyswitch its own colour
+        colors = {f"Color_{i:06x}": f"#{i:06x}" for i in range(n)}
+        data["settings"]["colors"] = colors
+        [product] = data["products"].values()
+        [group] = product["instrument_groups"].values()
+        [instrument] = group["instruments"].values()
+        for row, color in zip(instrument["keyswitches"]["values"], colors):
+            row[3] = color
+        [config] = Root.model_validate(data).to_ksem_configs()
+        return lambda: make_keyswitches(config.data, Settings(middle_c="C3"))
+
+    assert_n_log_n(make_operation, [8, 16, 32, 64])
+
+
+@pytest.mark.parametrize("operation", ["to_ksem_configs", "to_yaml"])
+def test_rendering_scales(operation: str):
+    def make_operation(n: int):
+        root = Root.model_validate(generate_library(2, 2, n))
+        return getattr(root, operation)
+
+    assert_n_log_n(make_operation, [2, 4, 8])
+
+
+def test_note_sorting_scales():
+    def make_operation(n: int):
+        notes = [Note.from_midi((i * 37) % 128, "C3") for i in range(n)]
+        return lambda: sorted(notes)
+
+    assert_n_log_n(make_operation, [100, 200, 400])
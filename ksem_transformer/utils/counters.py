@@ -0,0 +1,120 @@
+"""
+Counters for hot-path operations (validations, dumps, settings merges, `Note`
+construction, ...), to make it obvious when a change makes a build do more of them.
+
+Counting only happens inside `counting()`, and only counts what's done in the same
+context (so not what other threads do). Outside of it, `count` returns straight
+away.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+import attrs
+from pydantic import BaseModel
+
+from ksem_transformer.utils.instrumentation import Observer
+
+_active: ContextVar[Counter[str] | None] = ContextVar("counters", default=None)
+# Work run in a copy of the context (like `contextvars.copy_context().run` in a
+# thread pool) counts into the same `Counter`
+_lock = threading.Lock()
+
+
+def count(name: str, amount: int = 1) -> None:
+    if (counts := _active.get()) is not None:
+        with _lock:
+            counts[name] += amount
+
+
+def is_counting() -> bool:
+    """
+    Whether anything is counting. Worth checking before working out a counter's
+    name.
+    """
+    return _active.get() is not None
+
+
+@contextmanager
+def counting() -> Generator[Counter[str], None, None]:
+    """
+    Counts the operations done in the block. Nested blocks count towards the outer
+    block too.
+    """
+    outer = _active.get()
+    counts = Counter[str]()
+    token = _active.set(counts)
+    try:
+        yield counts
+    finally:
+        _active.reset(token)
+        if outer is not None:
+            with _lock:
+                outer.update(counts)
+
+
+class CountedModel(BaseModel):
+    """
+    A pydantic model whose validations are counted, as `validate.<class name>`.
+    Subclasses that override `model_post_init` have to call this one.
+    """
+
+    def model_post_init(self, context: Any, /) -> None:
+        if _active.get() is not None:
+            count(f"validate.{type(self).__name__}")
+
+
+@attrs.define()
+class OperationStats(Observer):
+    """
+    Splits the operations counted in a run between the items (instruments) of its
+    stages, to give the average and maximum per item alongside the totals.
+    """
+
+    counts: Counter[str]
+    items: int = 0
+    # The most of each operation any one item did, and which item it was
+    item_max: dict[str, tuple[int, tuple[str, ...]]] = attrs.field(factory=dict)
+    _at_last_item: Counter[str] = attrs.field(factory=Counter[str])
+
+    def stage_started(self, stage: str, total: int | None) -> None:
+        # Operations between items (e.g. loading the library) aren't put on any item
+        self._at_last_item = self.counts.copy()
+
+    def item_done(
+        self, path: tuple[str, ...], seconds: float, size: int, cached: bool | None
+    ) -> None:
+        self.items += 1
+        for name, amount in (self.counts - self._at_last_item).items():
+            if amount > self.item_max.get(name, (0, ()))[0]:
+                self.item_max[name] = (amount, path)
+        self._at_last_item = self.counts.copy()
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            name: {
+                "total": total,
+                "per_item": total / self.items if self.items else None,
+                "max_per_item": self.item_max.get(name, (0, ()))[0],
+                "max_item": "/".join(self.item_max.get(name, (0, ()))[1]) or None,
+            }
+            for name, total in sorted(self.counts.items())
+        }
+
+    def format(self) -> str:
+        lines = [f"{'operation':<32} {'total':>12} {'per item':>10} {'max':>8}"]
+        for name, stats in self.to_json().items():
+            per_item = (
+                f"{stats['per_item']:.1f}" if stats["per_item"] is not None else "-"
+            )
+            lines.append(
+                f"{name:<32} {stats['total']:>12} {per_item:>10} "
+                f"{stats['max_per_item']:>8}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import errno
+import os
+import shutil
+import sys
+import time
+import uuid
+from collections.abc import Generator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TextIO
+
+# How long to wait on Windows for another process to release a lock before giving up
+# (`flock` has no timeout, so elsewhere it waits for as long as it takes)
+LOCK_TIMEOUT = 10 * 60
+
+if sys.platform == "win32":
+    import msvcrt
+
+    def _lock(fd: int) -> None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while True:
+            try:
+                # Gives up with `EDEADLOCK` after 10 attempts, a second apart
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError as e:
+                # Anything but the lock still being held elsewhere is a real error
+                if e.errno != errno.EDEADLOCK or time.monotonic() >= deadline:
+                    raise
+
+    def _unlock(fd: int) -> None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def _unlock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(file: Path) -> Generator[None, None, None]:
+    """
+    Holds an exclusive lock on `file` for the duration of the block, waiting for any
+    other process that holds it to finish first. On Windows, raises an `OSError` if
+    it's still held elsewhere after `LOCK_TIMEOUT` seconds.
+
+    The lock is taken on a `<file>.lock` file next to it rather than on the file
+    itself, since the file may be replaced while the lock is held. The lock file is
+    left in place afterwards: removing it could let two processes lock different
+    files of the same name. It's empty, and safe to delete whenever nothing is
+    writing to `file`.
+    """
+    lock_file = file.with_name(f"{file.name}.lock")
+    fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        _lock(fd)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+def _temp_file_for(file: Path) -> Path:
+    return file.with_name(f".{file.name}.{uuid.uuid4().hex}.tmp")
+
+
+@contextmanager
+def atomic_write(file: Path) -> Generator[TextIO, None, None]:
+    """
+    Opens a temporary file next to `file` for writing, then moves it over `file` once
+    the block finishes. Anything reading `file` sees either all of the old contents
+    or all of the new ones, never a partly written file, and nothing is changed if
+    the block raises.
+    """
+    temp_file = _temp_file_for(file)
+    # Created like any other file, so it gets the usual permissions
+    fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "w") as f:
+            yield f
+        os.replace(temp_file, file)
+    except BaseException:
+        temp_file.unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_text(file: Path, text: str) -> None:
+    with atomic_write(file) as f:
+        f.write(text)
+
+
+def atomic_copy(source: Path, file: Path, hard_link: bool = False) -> None:
+    """
+    Copies `source` over `file`, atomically like `atomic_write`. If `hard_link`, the
+    file is hard linked to `source` instead where possible, so they share their
+    contents (and changing one changes the other).
+    """
+    temp_file = _temp_file_for(file)
+    try:
+        if hard_link:
+            try:
+                os.link(source, temp_file)
+            except OSError:
+                # Not possible, e.g. across drives
+                hard_link = False
+        if not hard_link:
+            shutil.copyfile(source, temp_file)
+        os.replace(temp_file, file)
+    except BaseException:
+        temp_file.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,81 @@
+"""
+Generates synthetic libraries of any size, for benchmarks and scaling tests.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Any
+
+# Colours the generated keyswitches are given, as KSEM-style names
+_PALETTE = ("#334b54", "#373354", "#533354", "#543338", "#425433", "#335441")
+_NOTES = ("C", "C#", "D", "Eb", "E", "F", "F#", "G", "G#", "A", "Bb", "B")
+_ARTICULATIONS = (
+    "Legato",
+    "Sustain",
+    "Staccato",
+    "Spiccato",
+    "Pizzicato",
+    "Tremolo",
+    "Trill",
+    "Harmonics",
+)
+
+
+def generate_library(
+    products: int,
+    groups_per_product: int,
+    instruments_per_group: int,
+    keyswitches_per_instrument: int = 16,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """
+    Generates a valid library, shaped like a library file before validation. The
+    same arguments always give the same library.
+
+    Every product and group overrides a few settings, so settings are merged at
+    every level, and keyswitches get a mix of notes, names and colours.
+    """
+    if not 0 < keyswitches_per_instrument <= 64:
+        raise ValueError("Instruments can only have 1 to 64 keyswitches")
+
+    rng = random.Random(seed)
+    colors = {f"Color_{color[1:]}": color for color in _PALETTE}
+    color_names = list(colors)
+
+    def make_instrument() -> dict[str, Any]:
+        return {
+            "keyswitches": {
+                "root_octaves": {"key": 0, "second_key": 1},
+                "mapping": ["name", "key", "second_key", "color"],
+                "values": [
+                    [
+                        f"{rng.choice(_ARTICULATIONS)} {i}",
+                        rng.choice(_NOTES),
+                        rng.choice(_NOTES),
+                        rng.choice(color_names),
+                    ]
+                    for i in range(keyswitches_per_instrument)
+                ],
+            }
+        }
+
+    return {
+        "settings": {"middle_c": "C3", "colors": colors},
+        "products": {
+            f"Product {p}": {
+                "settings": {"mpe_support": p % 2 == 0},
+                "instrument_groups": {
+                    f"Group {g}": {
+                        "settings": {"send_main_key": g % 2 == 0},
+                        "instruments": {
+                            f"Instrument {i}": make_instrument()
+                            for i in range(instruments_per_group)
+                        },
+                    }
+                    for g in range(groups_per_product)
+                },
+            }
+            for p in range(products)
+        },
+    }
@@ -0,0 +1,86 @@
+"""
+Hooks that long-running work (rendering, importing) reports its progress through.
+
+Work is split into stages, each made up of items (usually instruments). Observers
+registered with `observe` are told when each stage starts and finishes and when
+each item is done. With no observers registered, reporting costs next to nothing.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_observers: ContextVar[tuple[Observer, ...]] = ContextVar("observers", default=())
+
+
+class Observer:
+    """
+    Receives instrumentation events. Every method does nothing unless overridden.
+    """
+
+    def stage_started(self, stage: str, total: int | None) -> None:
+        """
+        Called when a stage starts, with how many items it has if that's known.
+        """
+
+    def item_done(
+        self, path: tuple[str, ...], seconds: float, size: int, cached: bool | None
+    ) -> None:
+        """
+        Called when an item is done. `size` is how many bytes of KSEM config it
+        produced or read, and `cached` is whether it came from the render cache
+        (`None` if there isn't one).
+        """
+
+    def stage_finished(self, stage: str, seconds: float) -> None:
+        """
+        Called when a stage finishes, whether or not it succeeded.
+        """
+
+
+@contextmanager
+def observe(*observers: Observer) -> Generator[None, None, None]:
+    """
+    Reports everything that happens in the block to `observers`, along with any
+    observers already registered.
+    """
+    token = _observers.set((*_observers.get(), *observers))
+    try:
+        yield
+    finally:
+        _observers.reset(token)
+
+
+def is_observed() -> bool:
+    """
+    Whether anything is observing. Worth checking before working anything out just
+    to report it.
+    """
+    return bool(_observers.get())
+
+
+@contextmanager
+def stage(name: str, total: int | None = None) -> Generator[None, None, None]:
+    """
+    Reports the block as a stage of the work.
+    """
+    observers = _observers.get()
+    for observer in observers:
+        observer.stage_started(name, total)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        for observer in observers:
+            observer.stage_finished(name, seconds)
+
+
+def item_done(
+    path: tuple[str, ...], seconds: float, size: int, cached: bool | None = None
+) -> None:
+    for observer in _observers.get():
+        observer.item_done(path, seconds, size, cached)
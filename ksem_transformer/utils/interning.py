@@ -0,0 +1,211 @@
+# pyright: reportUnknownArgumentType=none
+"""
+Shares structurally identical immutable values (settings sub-models, colour palettes,
+keyswitch names and rows) between the containers of a library while it's loaded, so
+a library that repeats them thousands of times only holds each one once.
+
+Values are only shared inside `interning()`. Outside of it, every function here
+returns its argument as it is (or, for rows, as a tuple). Shared values are
+immutable, so they can't be changed through one container and leak into the others:
+models have to be frozen, dicts are shared as `FrozenDict`s and rows as tuples.
+"""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Callable, Generator, Hashable, Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+import attrs
+from pydantic import BaseModel
+
+from ksem_transformer.note import Note
+from ksem_transformer.utils import counters
+
+_interner: ContextVar[Interner | None] = ContextVar("interner", default=None)
+
+
+class FrozenDict[K, V](Mapping[K, V]):
+    """
+    A read-only dict. Unlike `MappingProxyType`, it can be pickled and copied.
+    """
+
+    __slots__ = ("_items",)
+
+    def __init__(self, items: Mapping[K, V]) -> None:
+        self._items = dict(items)
+
+    def __getitem__(self, key: K) -> V:
+        return self._items[key]
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._items!r})"
+
+
+@attrs.define()
+class Interner:
+    """
+    Maps each value's key to the first value seen with that key, and the value's
+    size in bytes (worked out the first time it's shared).
+    """
+
+    # Distinct values kept
+    values: int = 0
+    # Duplicates replaced with the kept value
+    shared: int = 0
+    # Roughly how many bytes the replaced duplicates would have taken. An overestimate
+    # when parts of the duplicates (like default values) were already shared
+    bytes_saved: int = 0
+    _canonical: dict[Hashable, tuple[Any, int | None]] = attrs.field(factory=dict)
+
+    def intern[T](
+        self, value: T, key: Hashable, prepare: Callable[[T], T] | None = None
+    ) -> T:
+        """
+        Returns the value kept for `key`, keeping `value` (passed through `prepare`
+        first, if given) if there isn't one yet.
+        """
+        found = self._canonical.get(key)
+        if found is None:
+            if prepare is not None:
+                value = prepare(value)
+            self._canonical[key] = (value, None)
+            self.values += 1
+            return value
+        canonical, size = found
+        if size is None:
+            size = deep_size(canonical)
+            self._canonical[key] = (canonical, size)
+        self.shared += 1
+        self.bytes_saved += size
+        return canonical
+
+
+@contextmanager
+def interning() -> Generator[Interner, None, None]:
+    """
+    Shares identical values made in the block. Nested blocks share with the outer
+    block. What was saved is counted by `counters` as `interning.shared` and
+    `interning.bytes_saved`.
+    """
+    if (outer := _interner.get()) is not None:
+        yield outer
+        return
+
+    interner = Interner()
+    token = _interner.set(interner)
+    try:
+        yield interner
+    finally:
+        _interner.reset(token)
+        counters.count("interning.shared", interner.shared)
+        counters.count("interning.bytes_saved", interner.bytes_saved)
+
+
+def is_interning() -> bool:
+    return _interner.get() is not None
+
+
+def intern_str(value: str) -> str:
+    if (interner := _interner.get()) is None:
+        return value
+    return interner.intern(value, value)
+
+
+def intern_dict[K, V](value: Mapping[K, V]) -> Mapping[K, V]:
+    """
+    Shares dicts with the same items in the same order, as `FrozenDict`s. The keys
+    and values have to be hashable.
+    """
+    if (interner := _interner.get()) is None:
+        return value
+    return interner.intern(value, (dict, *value.items()), FrozenDict)
+
+
+def intern_row[T: str | int](row: Iterable[T]) -> tuple[T, ...]:
+    """
+    Shares rows of strings and ints (like keyswitch rows), and the strings in them.
+    Rows are returned as tuples, whether or not they're shared.
+    """
+    row = tuple(row)
+    if (interner := _interner.get()) is None:
+        return row
+    return interner.intern(
+        row,
+        (tuple, *row),
+        # Kept, so its strings are worth sharing too
+        lambda r: tuple(interner.intern(v, v) if isinstance(v, str) else v for v in r),
+    )
+
+
+def intern_rows[T](rows: Iterable[tuple[T, ...]]) -> tuple[tuple[T, ...], ...]:
+    """
+    Shares tuples of rows that have already been through `intern_row`.
+    """
+    rows = tuple(rows)
+    if (interner := _interner.get()) is None:
+        return rows
+    # Interned rows are kept alive by the interner, so their ids stay unique
+    return interner.intern(rows, (tuple, tuple, *map(id, rows)))
+
+
+def intern_model[T: BaseModel](model: T) -> T:
+    """
+    Shares frozen models with the same field values. Models with fields that aren't
+    hashable are left as they are.
+    """
+    if (interner := _interner.get()) is None:
+        return model
+    key = (type(model), *map(_key_part, model.__dict__.values()))
+    try:
+        return interner.intern(model, key)
+    except TypeError:
+        return model
+
+
+def _key_part(value: object) -> object:
+    # Notes are equal to any note with the same MIDI value, whatever their octave and
+    # middle C, so they're compared field by field instead
+    if isinstance(value, Note):
+        return (Note, value.note, value.octave, value.middle_c)
+    return value
+
+
+def deep_size(value: object) -> int:
+    """
+    Roughly how many bytes `value` takes, along with everything it holds. Objects
+    held more than once are only counted once.
+    """
+    seen: set[int] = set()
+    size = 0
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        match obj:
+            case dict():
+                stack.extend(obj.keys())
+                stack.extend(obj.values())
+            case FrozenDict():
+                stack.append(obj._items)
+            case list() | tuple() | set() | frozenset():
+                stack.extend(obj)
+            case BaseModel():
+                stack.append(obj.__dict__)
+                stack.append(obj.__pydantic_fields_set__)
+            case _ if attrs.has(type(obj)):
+                stack.extend(getattr(obj, a.name) for a in attrs.fields(type(obj)))
+            case _:
+                pass
+    return size
@@ -0,0 +1,150 @@
+"""
+Profiles how much memory each stage of a run takes, with `tracemalloc`.
+"""
+
+from __future__ import annotations
+
+import linecache
+import tracemalloc
+from collections.abc import Generator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import attrs
+
+from ksem_transformer.utils.instrumentation import Observer
+from ksem_transformer.utils.progress import format_size
+
+TOP_SITE_COUNT = 10
+# Allocations made by tracemalloc itself aren't worth reporting
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+@contextmanager
+def tracing() -> Generator[None, None, None]:
+    """
+    Traces memory allocations in the block, unless they're already being traced.
+    """
+    if tracemalloc.is_tracing():
+        yield
+        return
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        tracemalloc.stop()
+
+
+@attrs.define(frozen=True)
+class AllocationSite:
+    file: str
+    line: int
+    size: int
+    count: int
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "site": f"{self.file}:{self.line}",
+            "bytes": self.size,
+            "blocks": self.count,
+        }
+
+
+@attrs.define(frozen=True)
+class StageMemory:
+    stage: str
+    # Most memory allocated at once during the stage, on top of what was allocated
+    # when it started
+    peak: int
+    # Memory allocated during the stage that was still allocated when it finished
+    retained: int
+    # Where the retained memory was allocated, biggest first
+    top_sites: tuple[AllocationSite, ...]
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "peak_bytes": self.peak,
+            "retained_bytes": self.retained,
+            "top_sites": [site.to_json() for site in self.top_sites],
+        }
+
+
+@attrs.define()
+class MemoryProfile(Observer):
+    """
+    Records the peak and retained memory of each stage, and where what each stage
+    retained was allocated. Only sees allocations traced by `tracemalloc` (see
+    `tracing`), so nothing allocated in worker processes.
+    """
+
+    top: int = TOP_SITE_COUNT
+    stages: list[StageMemory] = attrs.field(factory=list)
+    _at_start: int = attrs.field(init=False, default=0)
+    _snapshot: tracemalloc.Snapshot | None = attrs.field(init=False, default=None)
+
+    def stage_started(self, stage: str, total: int | None) -> None:
+        if not tracemalloc.is_tracing():
+            return
+        self._snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        tracemalloc.reset_peak()
+        self._at_start = tracemalloc.get_traced_memory()[0]
+
+    def stage_finished(self, stage: str, seconds: float) -> None:
+        if self._snapshot is None:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        top_sites = tuple(
+            AllocationSite(
+                file=difference.traceback[0].filename,
+                line=difference.traceback[0].lineno,
+                size=difference.size_diff,
+                count=difference.count_diff,
+            )
+            for difference in snapshot.compare_to(self._snapshot, "lineno")[: self.top]
+            if difference.size_diff > 0
+        )
+        self.stages.append(
+            StageMemory(
+                stage,
+                peak=peak - self._at_start,
+                retained=current - self._at_start,
+                top_sites=top_sites,
+            )
+        )
+        self._snapshot = None
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "peak_bytes": max((stage.peak for stage in self.stages), default=0),
+            "stages": {stage.stage: stage.to_json() for stage in self.stages},
+        }
+
+    def format(self) -> str:
+        lines = [f"{'stage':<12} {'peak':>12} {'retained':>12}"]
+        for stage in self.stages:
+            lines.append(
+                f"{stage.stage:<12} {format_size(stage.peak):>12} "
+                f"{format_size(stage.retained):>12}"
+            )
+            for site in stage.top_sites:
+                lines.append(
+                    f"  {format_size(site.size):>10}  {_short_path(site.file)}:"
+                    f"{site.line}"
+                )
+        return "\n".join(lines)
+
+
+def _short_path(file: str) -> str:
+    # Paths in this package are shown relative to it
+    package = Path(__file__).parent.parent
+    path = Path(file)
+    if path.is_relative_to(package):
+        return str(path.relative_to(package.parent))
+    return file
@@ -0,0 +1,20 @@
+import os
+
+# Below this many instruments, starting worker processes costs more than it saves
+MIN_INSTRUMENTS_PER_WORKER = 32
+
+
+def get_worker_count(
+    instrument_count: int,
+    jobs: int | None = None,
+    min_instruments_per_worker: int = MIN_INSTRUMENTS_PER_WORKER,
+) -> int:
+    """
+    Picks how many worker processes to spread `instrument_count` instruments over:
+    `jobs` (defaulting to the number of CPUs), but never so many that a worker gets
+    fewer than `min_instruments_per_worker` instruments. The work should be done
+    in-process when this returns 1 or less.
+    """
+    return min(
+        jobs or os.cpu_count() or 1, instrument_count // min_instruments_per_worker
+    )
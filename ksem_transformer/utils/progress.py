@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import heapq
+import time
+from typing import Any, TextIO
+
+import attrs
+
+from ksem_transformer.utils.instrumentation import Observer
+
+SLOWEST_ITEM_COUNT = 10
+
+
+def format_size(size: float) -> str:
+    if abs(size) < 1024:
+        return f"{size:.0f} B"
+    for unit in ("KiB", "MiB"):
+        size /= 1024
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+    return f"{size / 1024:.1f} GiB"
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+@attrs.define()
+class ProgressDisplay(Observer):
+    """
+    Shows the current stage, items per second, bytes so far and an ETA on a single
+    line of `stream`, redrawn at most every `interval` seconds. Shows nothing if
+    `stream` isn't a terminal.
+    """
+
+    stream: TextIO
+    interval: float = 0.1
+    enabled: bool = attrs.field(init=False)
+    _stage: str = attrs.field(init=False, default="")
+    _total: int | None = attrs.field(init=False, default=None)
+    _done: int = attrs.field(init=False, default=0)
+    _size: int = attrs.field(init=False, default=0)
+    _start: float = attrs.field(init=False, default=0.0)
+    _last_draw: float = attrs.field(init=False, default=0.0)
+    _line_length: int = attrs.field(init=False, default=0)
+
+    def __attrs_post_init__(self) -> None:
+        self.enabled = self.stream.isatty()
+
+    def stage_started(self, stage: str, total: int | None) -> None:
+        if not self.enabled:
+            return
+        self._stage, self._total = stage, total
+        self._done = self._size = 0
+        self._start = time.monotonic()
+        self._draw(self._start)
+
+    def item_done(
+        self, path: tuple[str, ...], seconds: float, size: int, cached: bool | None
+    ) -> None:
+        if not self.enabled:
+            return
+        self._done += 1
+        self._size += size
+        now = time.monotonic()
+        if now - self._last_draw >= self.interval:
+            self._draw(now)
+
+    def stage_finished(self, stage: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        self._draw(time.monotonic())
+        self.stream.write("\n")
+        self.stream.flush()
+        self._line_length = 0
+
+    def _draw(self, now: float) -> None:
+        self._last_draw = now
+        elapsed = now - self._start
+        rate = self._done / elapsed if elapsed > 0 else 0.0
+        count = (
+            f"{self._done}" if self._total is None else f"{self._done}/{self._total}"
+        )
+        parts = [f"[{self._stage}]", count, f"{rate:.1f}/s", format_size(self._size)]
+        if self._total is not None and rate > 0:
+            parts.append(f"ETA {_format_duration((self._total - self._done) / rate)}")
+        line = "  ".join(parts)
+        # Pad over whatever's left of the previous line
+        self.stream.write(f"\r{line.ljust(self._line_length)}")
+        self.stream.flush()
+        self._line_length = len(line)
+
+
+@attrs.define()
+class BuildSummary(Observer):
+    """
+    Collects the counts and durations of a run, for writing out as JSON at the end.
+    """
+
+    items: int = 0
+    size: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    stage_seconds: dict[str, float] = attrs.field(factory=dict)
+    # Min-heap of the slowest items so far
+    _slowest: list[tuple[float, tuple[str, ...]]] = attrs.field(factory=list)
+    _start: float = attrs.field(factory=time.perf_counter)
+
+    def stage_finished(self, stage: str, seconds: float) -> None:
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    def item_done(
+        self, path: tuple[str, ...], seconds: float, size: int, cached: bool | None
+    ) -> None:
+        self.items += 1
+        self.size += size
+        if cached is not None:
+            if cached:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        if len(self._slowest) < SLOWEST_ITEM_COUNT:
+            heapq.heappush(self._slowest, (seconds, path))
+        elif seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (seconds, path))
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "items": self.items,
+            "bytes": self.size,
+            "seconds": time.perf_counter() - self._start,
+            "stages": self.stage_seconds,
+            "cache": {"hits": self.cache_hits, "misses": self.cache_misses},
+            "slowest": [
+                {"path": "/".join(path), "seconds": seconds}
+                for seconds, path in sorted(self._slowest, reverse=True)
+            ],
+        }
@@ -0,0 +1,54 @@
+import threading
+from pathlib import Path
+
+from ksem_transformer.models.root import Root
+from ksem_transformer.utils import counters, instrumentation
+from ksem_transformer.utils.counters import OperationStats
+
+example = Path(__file__).parent.parent / "example.yaml"
+
+
+def test_operations_of_a_render(tmp_path: Path):
+    with counters.counting() as counts:
+        root = Root.from_file(example)
+        stats = OperationStats(counts)
+        with instrumentation.observe(stats):
+            files_written = root.write_ksem_config_files(tmp_path)
+
+    assert counts["validate.Root"] == 1
+    assert counts["validate.Settings"] > 0
+    # Every model class counts its validations, not just the containers
+    assert counts["validate.KeyswitchesRootOctaves"] > 0
+    assert counts["validate.MidiControls"] > 0
+    assert counts["settings.merge"] == files_written
+    # Each merge dumps the defaults and each of the settings merged
+    assert counts["dump.Settings"] >= 2 * files_written
+    # Counted before text mode translates line endings
+    assert counts["json.bytes_encoded"] == sum(
+        len(f.read_text()) for f in tmp_path.rglob("*.json")
+    )
+
+    data = stats.to_json()
+    assert data["settings.merge"]["per_item"] == 1
+    assert data["settings.merge"]["max_per_item"] == 1
+    # Validating the library happened before any instrument was rendered
+    assert data["validate.Root"]["max_item"] is None
+
+
+def test_nothing_is_counted_outside_counting():
+    with counters.counting() as outer:
+        with counters.counting() as inner:
+            counters.count("a")
+        counters.count("b", 2)
+    counters.count("c")
+    assert inner == {"a": 1}
+    assert outer == {"a": 1, "b": 2}
+
+
+def test_other_threads_are_not_counted():
+    with counters.counting() as counts:
+        thread = threading.Thread(target=counters.count, args=("a",))
+        thread.start()
+        thread.join()
+        counters.count("b")
+    assert counts == {"b": 1}
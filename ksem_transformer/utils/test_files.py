@@ -0,0 +1,17 @@
+from pathlib import Path
+
+import pytest
+
+from ksem_transformer.utils.files import atomic_write, atomic_write_text
+
+
+def test_failed_atomic_write_leaves_the_file_alone(tmp_path: Path):
+    file = tmp_path / "out.json"
+    atomic_write_text(file, "old")
+
+    with pytest.raises(RuntimeError), atomic_write(file) as f:
+        f.write("new")
+        raise RuntimeError
+
+    assert file.read_text() == "old"
+    assert list(tmp_path.iterdir()) == [file]
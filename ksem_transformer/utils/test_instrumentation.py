@@ -0,0 +1,39 @@
+from io import StringIO
+from pathlib import Path
+
+from ksem_transformer.models.root import Root
+from ksem_transformer.utils import instrumentation
+from ksem_transformer.utils.progress import BuildSummary, ProgressDisplay
+
+example = Path(__file__).parent.parent / "example.yaml"
+
+
+def test_summary_of_a_render(tmp_path: Path):
+    summary = BuildSummary()
+    root = Root.from_file(example)
+    with instrumentation.observe(summary):
+        files_written = root.write_ksem_config_files(tmp_path)
+
+    data = summary.to_json()
+    assert data["items"] == files_written
+    assert data["bytes"] == sum(f.stat().st_size for f in tmp_path.rglob("*.json"))
+    assert list(data["stages"]) == ["render"]
+    assert len(data["slowest"]) == files_written
+    assert data["cache"] == {"hits": 0, "misses": 0}
+
+
+def test_observers_only_see_their_block():
+    summary = BuildSummary()
+    with instrumentation.observe(summary):
+        instrumentation.item_done(("a",), 0.1, 10)
+    instrumentation.item_done(("b",), 0.1, 10)
+    assert summary.items == 1
+    assert not instrumentation.is_observed()
+
+
+def test_progress_is_hidden_when_not_a_terminal():
+    stream = StringIO()
+    with instrumentation.observe(ProgressDisplay(stream)):
+        with instrumentation.stage("render", total=1):
+            instrumentation.item_done(("a",), 0.1, 10)
+    assert stream.getvalue() == ""
@@ -0,0 +1,62 @@
+import pickle
+
+import pytest
+
+from ksem_transformer.models.root import Root
+from ksem_transformer.models.settings.settings import PitchRange, Settings
+from ksem_transformer.note import Note
+from ksem_transformer.utils import counters
+from ksem_transformer.utils.generate import generate_library
+from ksem_transformer.utils.interning import (
+    intern_dict,
+    intern_model,
+    intern_row,
+    interning,
+)
+
+
+def test_loaded_libraries_share_identical_values():
+    data = generate_library(1, 2, 2)
+    [product] = data["products"].values()
+    for group in product["instrument_groups"].values():
+        for instrument in group["instruments"].values():
+            instrument["settings"] = {"xy_pad": {"pad_shape": "line"}}
+
+    with counters.counting() as counts, interning() as interner:
+        root = Root.model_validate(data)
+    instruments = [instrument for *_, instrument in root.iter_instruments()]
+    first, *others = instruments
+    for other in others:
+        assert other.settings.xy_pad is first.settings.xy_pad
+        assert other.keyswitches.mapping is first.keyswitches.mapping
+    assert interner.shared > 0
+    assert counts["interning.bytes_saved"] == interner.bytes_saved > 0
+
+    # Nothing's shared outside of `interning`
+    root = Root.model_validate(data)
+    first, second, *_ = [instrument for *_, instrument in root.iter_instruments()]
+    assert first.settings.xy_pad is not second.settings.xy_pad
+    assert first.settings.xy_pad == second.settings.xy_pad
+
+
+def test_notes_are_only_shared_when_written_the_same_way():
+    c3 = PitchRange(low=Note("C", 3, "C3"), high=Note("C", 4, "C3"))
+    c4 = PitchRange(low=Note("C", 4, "C4"), high=Note("C", 5, "C4"))
+    assert c3 == c4
+
+    with interning():
+        assert intern_model(c3) is c3
+        assert intern_model(c4) is c4
+        assert intern_model(c3.model_copy()) is c3
+
+
+def test_shared_values_cant_be_changed():
+    with interning():
+        colors = intern_dict({"red": "#ff0000"})
+        assert intern_dict({"red": "#ff0000"}) is colors
+        assert intern_row(["Legato", 1]) is intern_row(("Legato", 1))
+        # Default palettes are made fresh, so they aren't shared either
+        assert Settings().colors is not Settings().colors
+    with pytest.raises(TypeError):
+        colors["red"] = "#00ff00"  # type: ignore[index]
+    assert pickle.loads(pickle.dumps(colors)) == {"red": "#ff0000"}
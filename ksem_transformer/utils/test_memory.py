@@ -0,0 +1,29 @@
+from pathlib import Path
+
+from ksem_transformer.models.root import Root
+from ksem_transformer.utils import instrumentation
+from ksem_transformer.utils.memory import MemoryProfile, tracing
+
+example = Path(__file__).parent.parent / "example.yaml"
+
+
+def test_memory_of_each_stage(tmp_path: Path):
+    profile = MemoryProfile()
+    with tracing(), instrumentation.observe(profile):
+        root = Root.from_file(example)
+        root.write_ksem_config_files(tmp_path)
+
+    assert [stage.stage for stage in profile.stages] == ["load", "validate", "render"]
+    for stage in profile.stages:
+        assert stage.peak >= stage.retained
+    validate = profile.stages[1]
+    assert validate.retained > 0
+    assert 0 < len(validate.top_sites) <= profile.top
+    assert profile.to_json()["peak_bytes"] == max(s.peak for s in profile.stages)
+
+
+def test_nothing_is_recorded_without_tracing():
+    profile = MemoryProfile()
+    with instrumentation.observe(profile):
+        Root.from_file(example)
+    assert profile.stages == []
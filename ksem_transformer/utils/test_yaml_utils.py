@@ -0,0 +1,84 @@
+from ksem_transformer.utils.tree import deep_update_tree
+from ksem_transformer.utils.yaml_utils import (
+    to_commented,
+    yaml_dumps,
+    yaml_load,
+    yaml_load_round_trip,
+)
+
+existing_document = """\
+# Library of all my instruments
+settings:
+  middle_c: C3  # Ableton's default
+products:
+  VSL:
+    instrument_groups:
+      Strings:
+        instruments:
+          Violin:
+            keyswitches:
+              mapping: [name]
+              values:
+                - ['Legato']  # The good one
+"""
+
+
+class TestYamlLoadRoundTrip:
+    def test_untouched_document_is_unchanged(self):
+        document, dumper = yaml_load_round_trip(existing_document)
+        assert yaml_dumps(document, dumper) == existing_document
+
+    def test_empty_document(self):
+        document, _ = yaml_load_round_trip("")
+        assert document == {}
+
+
+class TestSplice:
+    def test_untouched_lines_are_preserved(self):
+        document, dumper = yaml_load_round_trip(existing_document)
+        deep_update_tree(
+            document,
+            yaml_load(
+                {
+                    "products": {
+                        "VSL": {
+                            "instrument_groups": {
+                                "Strings": {
+                                    "instruments": {
+                                        "Cello": {
+                                            "keyswitches": {
+                                                "mapping": ["name"],
+                                                "values": [["Pizzicato"]],
+                                            }
+                                        }
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+            ),
+        )
+        dumped = yaml_dumps(document, dumper)
+
+        assert dumped.startswith(existing_document)
+        assert "Cello" in dumped
+        assert "Pizzicato" in dumped
+
+    def test_existing_values_are_overwritten(self):
+        document, dumper = yaml_load_round_trip(existing_document)
+        deep_update_tree(document, yaml_load({"settings": {"middle_c": "C4"}}))
+        dumped = yaml_dumps(document, dumper)
+
+        assert "middle_c: C4  # Ableton's default" in dumped
+        assert dumped.replace("C4", "C3") == existing_document
+
+
+def test_to_commented_matches_yaml_load():
+    data = {"a": [1, 2.5, None, "-"], "b": {"c": [[True, "C#"]], "d": {}}, "e": []}
+    converted = to_commented(data)
+    converted["b"]["c"][0].fa.set_flow_style()
+    loaded = yaml_load(data)
+    loaded["b"]["c"][0].fa.set_flow_style()
+
+    assert yaml_dumps(converted) == yaml_dumps(loaded)
@@ -2,28 +2,31 @@ from __future__ import annotations
 
 from collections.abc import MutableMapping
 from copy import deepcopy
-from typing import Any, cast
+from typing import cast
 
 type Tree[K, V] = MutableMapping[K, V]
 
 
 def deep_join_trees[K, V](tree1: Tree[K, V], tree2: Tree[K, V]) -> Tree[K, V]:
+    # Copy `tree1` once up front, rather than again at every level of the merge
     out = deepcopy(tree1)
+    deep_update_tree(out, tree2)
+    return out
+
 
+def deep_update_tree[K, V](tree1: Tree[K, V], tree2: Tree[K, V]) -> None:
+    """
+    Merges `tree2` into `tree1` in place, following the same rules as
+    `deep_join_trees`. Anything in `tree1` that `tree2` doesn't touch is left alone.
+    """
     for k, v in tree2.items():
         if (
             isinstance(v, MutableMapping)
-            and k in out
-            and isinstance(out[k], MutableMapping)
+            and k in tree1
+            and isinstance(tree1[k], MutableMapping)
         ):
-            # Merge this mapping into the one in out
-            out[k] = cast(
-                Any,  # Sorry, taking the cheater's route here :(
-                deep_join_trees(
-                    cast(Tree[object, object], out[k]), cast(Tree[object, object], v)
-                ),
+            deep_update_tree(
+                cast(Tree[object, object], tree1[k]), cast(Tree[object, object], v)
             )
         else:
-            out[k] = v
-
-    return out
+            tree1[k] = v
@@ -1,12 +1,23 @@
 # pyright: reportUnknownMemberType=none, reportUnknownVariableType=none
 
+from collections.abc import Mapping
 from io import StringIO
+from pathlib import Path
 from typing import Any
 
 import ruamel.yaml  # pyright: ignore[reportMissingTypeStubs]
 import ruamel.yaml.comments
 
 yaml = ruamel.yaml.YAML(typ="rt")
+safe_yaml = ruamel.yaml.YAML(typ="safe")
+
+
+def yaml_load_file(file: Path) -> Any:
+    """
+    Loads a YAML file into plain Python objects.
+    """
+    with file.open() as f:
+        return safe_yaml.load(f)
 
 
 def yaml_load(data: Any) -> ruamel.yaml.comments.CommentedMap:
@@ -16,7 +27,76 @@ def yaml_load(data: Any) -> ruamel.yaml.comments.CommentedMap:
     return yaml.load(stream)
 
 
-def yaml_dumps(yaml_data: ruamel.yaml.comments.CommentedMap) -> str:
+def to_commented(data: Any) -> Any:
+    """
+    Converts plain Python data into round-trip YAML objects, so their style can be
+    set before they're dumped. This gives the same result as `yaml_load`, without
+    dumping and parsing the data along the way.
+    """
+    if isinstance(data, Mapping):
+        return ruamel.yaml.comments.CommentedMap(
+            (k, to_commented(v)) for k, v in data.items()
+        )
+    if isinstance(data, (list, tuple)):
+        return ruamel.yaml.comments.CommentedSeq(to_commented(v) for v in data)
+    return data
+
+
+def yaml_dumps(
+    yaml_data: ruamel.yaml.comments.CommentedMap, dumper: ruamel.yaml.YAML | None = None
+) -> str:
     stream = StringIO()
-    yaml.dump(yaml_data, stream)
+    (dumper or yaml).dump(yaml_data, stream)
     return stream.getvalue()
+
+
+def yaml_load_round_trip(
+    text: str,
+) -> tuple[ruamel.yaml.comments.CommentedMap, ruamel.yaml.YAML]:
+    """
+    Loads an existing YAML document for editing. Along with the document, this returns
+    a YAML instance set up to dump it back out with its original indentation and
+    quoting, so that untouched parts of the document come back out unchanged.
+    """
+    rt_yaml = ruamel.yaml.YAML(typ="rt")
+    rt_yaml.preserve_quotes = True
+    document = rt_yaml.load(text)
+    indent, block_seq_indent = _guess_indent(text)
+    if indent is not None:
+        offset = block_seq_indent or 0
+        rt_yaml.indent(mapping=indent - offset, sequence=indent, offset=offset)
+    if document is None:
+        document = ruamel.yaml.comments.CommentedMap()
+    return document, rt_yaml
+
+
+def _leading_spaces(line: str) -> int:
+    return len(line) - len(line.lstrip(" "))
+
+
+def _guess_indent(text: str) -> tuple[int | None, int | None]:
+    """
+    Guesses a document's indent and how far its block sequences' dashes are indented,
+    the same way as ruamel's `load_yaml_guess_indent`, without loading it again (and
+    without its `yaml=` argument, which older ruamel versions don't have).
+    """
+    map_indent: int | None = None
+    key_only_indent: int | None = None
+    key_indent = 0
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("- "):
+            dash = _leading_spaces(line)
+            item = _leading_spaces(line[dash + 1 :]) + dash + 1
+            if line[item] == "#":
+                continue
+            return item - key_indent, dash - key_indent
+        if map_indent is None and key_only_indent is not None and stripped:
+            idx = len(line) - len(line.lstrip(" -"))
+            if idx > key_only_indent:
+                map_indent = idx - key_only_indent
+        if line.rstrip().endswith(":"):
+            key_indent = key_only_indent = _leading_spaces(line)
+            continue
+        key_only_indent = None
+    return map_indent, None